@@ -0,0 +1,171 @@
+import os
+import time
+import shutil
+import asyncio
+import functools
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+from mtz_extractor import (
+    DEFAULT_MAX_DEPTH,
+    DEFAULT_MEMORY_THRESHOLD,
+    BlobStore,
+    ExtractionCache,
+    ExtractionPlan,
+    MTZExtractor,
+    free_space,
+)
+
+
+class ExtractionError(Exception):
+    """Raised when an MTZ file cannot be extracted as requested"""
+
+
+@dataclass
+class ExtractionResult:
+    """Outcome of one extraction"""
+
+    input_path: str
+    output_path: str
+    files: int
+    compressed_size: int
+    extracted_size: int
+    seconds: float
+    cache_hit: bool = False
+    unchanged_files: int = 0
+    removed_files: int = 0
+    plan: Optional[ExtractionPlan] = None
+    metrics: dict = field(default_factory=dict)
+
+
+def extract(
+    input_path: str,
+    output_path: str,
+    *,
+    workers: int = 1,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    memory_threshold: int = DEFAULT_MEMORY_THRESHOLD,
+    allowed_extensions: Optional[Iterable[str]] = None,
+    incremental: bool = False,
+    store: Optional[BlobStore] = None,
+    cache: Optional[ExtractionCache] = None,
+    patterns: Optional[Iterable[str]] = None,
+    check_space: bool = True,
+) -> ExtractionResult:
+    """Extract input_path into output_path and return what was done.
+
+    Nothing is printed, no log file is written and the working directory is
+    never used, so relative paths are the caller's own. Every call gets its
+    own extractor, so calls may run concurrently. output_path must not exist
+    unless incremental is set. Free space is checked against a planning
+    pass first unless check_space is False; incremental runs and cache
+    hits skip that pass. patterns select what is written, see
+    mtz_filter.PathFilter. If the extraction fails, a folder created by
+    this call is removed again and the error is raised.
+    """
+    input_path = os.path.abspath(input_path)
+    output_path = os.path.abspath(output_path)
+    if not os.path.isfile(input_path):
+        raise ExtractionError(f"File not found: {input_path}")
+    if not input_path.endswith(".mtz"):
+        raise ExtractionError(f"File is not MTZ format: {input_path}")
+
+    started = time.perf_counter()
+    extractor = MTZExtractor(
+        allowed_extensions=set(allowed_extensions) if allowed_extensions else None,
+        memory_threshold=memory_threshold,
+        workers=workers,
+        max_depth=max_depth,
+        incremental=incremental,
+        store=store,
+        cache=cache,
+        quiet=True,
+        patterns=list(patterns) if patterns else None,
+    )
+
+    plan = None
+    if check_space:
+        # Cache hits are planned from the entry, incremental runs only rewrite changes
+        plan = extractor.cached_plan(input_path)
+        if plan is None and not incremental:
+            plan = extractor.plan(input_path)
+    if plan is not None:
+        available = free_space(output_path)
+        if available < plan.peak_bytes:
+            raise ExtractionError(
+                f"Not enough disk space: need {plan.peak_bytes} bytes, {available} available"
+            )
+
+    created = not os.path.exists(output_path)
+    Path(output_path).mkdir(parents=True, exist_ok=incremental)
+    try:
+        extractor.run(input_path, output_path)
+    except BaseException:
+        if created:
+            shutil.rmtree(output_path, ignore_errors=True)
+        raise
+
+    stats = extractor.stats
+    return ExtractionResult(
+        input_path=input_path,
+        output_path=output_path,
+        files=stats["total_files"],
+        compressed_size=stats["total_size"],
+        extracted_size=stats["extracted_size"],
+        seconds=time.perf_counter() - started,
+        cache_hit=stats["cache_hit"],
+        unchanged_files=stats["unchanged_files"],
+        removed_files=stats["removed_files"],
+        plan=plan,
+        metrics=extractor.metrics.to_dict(),
+    )
+
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> Executor:
+    """The executor shared by extract_async, created on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 1, thread_name_prefix="mtz-extract"
+            )
+        return _executor
+
+
+def set_executor(executor: Optional[Executor]) -> None:
+    """Replace the shared executor, None creates a default one on next use"""
+    global _executor
+    with _executor_lock:
+        _executor = executor
+
+
+def shutdown(wait: bool = True) -> None:
+    """Shut the shared executor down, e.g. from an application's shutdown hook"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+async def extract_async(
+    input_path: str, output_path: str, *, executor: Optional[Executor] = None, **options
+) -> ExtractionResult:
+    """Run extract in an executor so the event loop keeps serving other work.
+
+    Uses the shared executor unless one is given. Extraction spends most of
+    its time in file I/O and zlib, which release the GIL, so threads overlap
+    well. Options are the keyword arguments of extract.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor or get_executor(),
+        functools.partial(extract, input_path, output_path, **options),
+    )
@@ -0,0 +1,450 @@
+import os
+import sys
+import io
+import json
+import math
+import time
+import random
+import shutil
+import zipfile
+import argparse
+import tempfile
+import resource
+import subprocess
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional
+
+from mtz_extractor import MTZExtractor
+from mtz_packing import MTZCompressor, SKIPPED_FOLDERS
+
+
+COMPONENT_NAMES = [
+    "icons",
+    "framework-res",
+    "com.android.systemui",
+    "com.miui.home",
+    "com.android.contacts",
+    "com.android.mms",
+    "com.android.settings",
+    "lockscreen",
+]
+FILE_KINDS = [
+    ("res/drawable-xxhdpi", ".png", b"\x89PNG\r\n\x1a\n"),
+    ("res/drawable-xxhdpi", ".webp", b"RIFF\x00\x00\x00\x00WEBP"),
+    ("res/values", ".xml", b"<?xml version='1.0' encoding='utf-8'?>\n"),
+    ("res/raw", ".mp3", b"ID3\x03\x00"),
+]
+TEXT_PATTERN = b"<color name=\"theme_color\">#ff336699</color>\n"
+STARTUP_BUDGET_MS = 60.0
+# Only needed once an extraction runs, importing them up front is a cold-start regression
+DEFERRED_MODULES = ["psutil", "platform", "concurrent.futures.process"]
+
+
+@dataclass
+class CorpusSpec:
+    """Shape of a synthetic theme"""
+
+    components: int = 8
+    files: int = 200
+    mean_size: int = 16 * 1024
+    size_dist: str = "lognormal"
+    compressibility: float = 0.5
+    depth: int = 2
+    wallpaper_size: int = 2 * 1024 * 1024
+    seed: int = 0
+
+
+@dataclass
+class CorpusInfo:
+    """What the generator wrote, used to turn timings into throughput"""
+
+    path: str
+    files: int = 0
+    bytes: int = 0
+    archives: int = 0
+
+
+def generate_theme(path: str, spec: CorpusSpec) -> CorpusInfo:
+    """Write a deterministic synthetic MTZ theme to path"""
+    rng = random.Random(spec.seed)
+    info = CorpusInfo(path)
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as mtz:
+        mtz.writestr("description.xml", b"<theme><title>synthetic</title></theme>\n")
+        info.files += 1
+        info.bytes += 40
+        for name, size in (
+            ("wallpaper/default_wallpaper.jpg", spec.wallpaper_size),
+            ("preview/preview_0.jpg", spec.wallpaper_size // 8),
+        ):
+            data = b"\xff\xd8\xff" + _payload(rng, max(0, size - 3), 0.0)
+            mtz.writestr(name, data)
+            info.files += 1
+            info.bytes += len(data)
+
+        for index in range(spec.components):
+            if index < len(COMPONENT_NAMES):
+                name = COMPONENT_NAMES[index]
+            else:
+                name = f"com.example.component{index}"
+            mtz.writestr(name, _component(rng, spec, info, spec.files, spec.depth))
+            info.archives += 1
+
+    return info
+
+
+def _component(rng: random.Random, spec: CorpusSpec, info: CorpusInfo, files: int, depth: int) -> bytes:
+    """Build a STORED component archive, nesting further archives down to depth"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zipf:
+        for index in range(files):
+            folder, suffix, magic = FILE_KINDS[index % len(FILE_KINDS)]
+            size = max(len(magic), _size(rng, spec))
+            compressibility = spec.compressibility if suffix == ".xml" else spec.compressibility / 4
+            data = magic + _payload(rng, size - len(magic), compressibility)
+            zipf.writestr(f"{folder}/item{index}{suffix}", data)
+            info.files += 1
+            info.bytes += len(data)
+
+        if depth > 1:
+            nested = _component(rng, spec, info, max(1, files // 10), depth - 1)
+            zipf.writestr(f"extra/nested{depth}.zip", nested)
+            info.archives += 1
+    return buffer.getvalue()
+
+
+def _size(rng: random.Random, spec: CorpusSpec) -> int:
+    if spec.size_dist == "fixed":
+        return spec.mean_size
+    if spec.size_dist == "uniform":
+        return rng.randint(1, 2 * spec.mean_size)
+    # Lognormal with sigma 1 has mean exp(mu + 0.5)
+    mu = max(0.0, math.log(max(1, spec.mean_size)) - 0.5)
+    return int(rng.lognormvariate(mu, 1.0))
+
+
+def _payload(rng: random.Random, size: int, compressibility: float) -> bytes:
+    """Random bytes with a compressible run making up the given fraction"""
+    text_size = int(size * compressibility)
+    text = (TEXT_PATTERN * (text_size // len(TEXT_PATTERN) + 1))[:text_size]
+    return text + rng.randbytes(size - text_size)
+
+
+def _extract_legacy(corpus: CorpusInfo, folder: str, jobs: int) -> None:
+    extractor = MTZExtractor(workers=jobs)
+    extractor.extract_mtz(corpus.path, folder)
+    extractor.process_files(folder)
+
+
+def _extract_and_expand(corpus: CorpusInfo, folder: str, jobs: int) -> None:
+    extractor = MTZExtractor(workers=jobs)
+    extractor.extract_and_expand(corpus.path, folder)
+    extractor.process_files(folder, expand=False)
+
+
+def _zip_folder(corpus: CorpusInfo, folder: str, jobs: int) -> None:
+    compressor = MTZCompressor()
+    paths = _component_folders(folder)
+    if jobs > 1:
+        compressor.zip_folders(paths, jobs)
+    else:
+        for path in paths:
+            compressor.zip_folder(path)
+
+
+def _create_mtz(corpus: CorpusInfo, folder: str, jobs: int) -> None:
+    MTZCompressor().create_mtz(folder, jobs=jobs)
+
+
+def _pack_streaming(corpus: CorpusInfo, folder: str, jobs: int) -> None:
+    MTZCompressor().pack_streaming(folder, jobs=jobs)
+
+
+def _component_folders(folder: str) -> List[str]:
+    return [
+        os.path.join(folder, name)
+        for name in sorted(os.listdir(folder))
+        if name not in SKIPPED_FOLDERS and os.path.isdir(os.path.join(folder, name))
+    ]
+
+
+# name -> (input the case needs, timed function)
+BENCHMARKS: Dict[str, tuple] = {
+    "extract_mtz": ("mtz", _extract_legacy),
+    "extract_and_expand": ("mtz", _extract_and_expand),
+    "zip_folder": ("tree", _zip_folder),
+    "create_mtz": ("zipped", _create_mtz),
+    "pack_streaming": ("tree", _pack_streaming),
+}
+
+
+def run_benchmarks(
+    corpus: CorpusInfo, workdir: str, names: List[str], jobs: int = 1, repeat: int = 1
+) -> List[dict]:
+    """Time every case in a fresh process and return one result per run"""
+    source = os.path.join(workdir, "source")
+    zipped = os.path.join(workdir, "zipped")
+    needs = {BENCHMARKS[name][0] for name in names}
+    if needs & {"tree", "zipped"}:
+        with _quiet(workdir):
+            _extract_and_expand(corpus, source, 1)
+    if "zipped" in needs:
+        # Same state as the legacy packer right before create_mtz
+        shutil.copytree(source, zipped)
+        with _quiet(workdir):
+            _zip_folder(corpus, zipped, 1)
+            for path in _component_folders(zipped):
+                shutil.rmtree(path)
+            MTZCompressor().remove_zip_extension(zipped)
+
+    inputs = {"mtz": None, "tree": source, "zipped": zipped}
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for name in names:
+        for run in range(repeat):
+            folder = os.path.join(workdir, f"{name}-{run}")
+            need = BENCHMARKS[name][0]
+            if inputs[need] is None:
+                os.makedirs(folder)
+            else:
+                shutil.copytree(inputs[need], folder)
+
+            # A fresh interpreter per run keeps peak RSS and I/O counters per case
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(_run_case, name, corpus, folder, workdir, jobs).result()
+            result.update(run=run, mb_per_s=_rate(corpus.bytes / 1024 / 1024, result["seconds"]))
+            result["files_per_s"] = _rate(corpus.files, result["seconds"])
+            results.append(result)
+
+            shutil.rmtree(folder, ignore_errors=True)
+            if os.path.exists(folder + ".mtz"):
+                os.remove(folder + ".mtz")
+    return results
+
+
+def _run_case(name: str, corpus: CorpusInfo, folder: str, workdir: str, jobs: int) -> dict:
+    """Worker: run one case and measure it"""
+    function = BENCHMARKS[name][1]
+    io_before = _proc_io()
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    with _quiet(workdir):
+        function(corpus, folder, jobs)
+    seconds = time.perf_counter() - start
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    io_after = _proc_io()
+
+    return {
+        "case": name,
+        "seconds": seconds,
+        "user_s": usage.ru_utime - usage_before.ru_utime,
+        "sys_s": usage.ru_stime - usage_before.ru_stime,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": usage.ru_maxrss / 1024,
+        "read_syscalls": io_after.get("syscr", 0) - io_before.get("syscr", 0),
+        "write_syscalls": io_after.get("syscw", 0) - io_before.get("syscw", 0),
+        "read_mb": (io_after.get("rchar", 0) - io_before.get("rchar", 0)) / 1024 / 1024,
+        "write_mb": (io_after.get("wchar", 0) - io_before.get("wchar", 0)) / 1024 / 1024,
+    }
+
+
+def _proc_io() -> Dict[str, int]:
+    """Read/write syscall and byte counters from /proc/self/io, empty where unavailable"""
+    try:
+        with open("/proc/self/io", "r") as f:
+            return {key: int(value) for key, value in (line.split(":") for line in f)}
+    except OSError:
+        return {}
+
+
+@contextlib.contextmanager
+def _quiet(workdir: str):
+    """Run in workdir with output discarded, the tools print spinners and log to stderr"""
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            yield
+    finally:
+        os.chdir(cwd)
+
+
+def _rate(amount: float, seconds: float) -> float:
+    return amount / seconds if seconds > 0 else 0.0
+
+
+def format_results(corpus: CorpusInfo, results: List[dict]) -> str:
+    """Render results as a plain text table"""
+    lines = [
+        f"corpus: {corpus.path} ({corpus.files} files, {corpus.bytes / 1024 / 1024:.1f} MB, "
+        f"{corpus.archives} archives)",
+        f"{'case':<20}{'run':>4}{'seconds':>10}{'MB/s':>10}{'files/s':>10}{'rss MB':>9}"
+        f"{'user s':>9}{'sys s':>8}{'read sc':>10}{'write sc':>10}",
+    ]
+    for result in results:
+        lines.append(
+            f"{result['case']:<20}{result['run']:>4}{result['seconds']:>10.3f}"
+            f"{result['mb_per_s']:>10.1f}{result['files_per_s']:>10.0f}{result['peak_rss_mb']:>9.1f}"
+            f"{result['user_s']:>9.2f}{result['sys_s']:>8.2f}"
+            f"{result['read_syscalls']:>10}{result['write_syscalls']:>10}"
+        )
+    return "\n".join(lines)
+
+
+def measure_import(module: str, repeat: int = 5) -> float:
+    """Best cumulative import time of module over fresh interpreters, in milliseconds"""
+    with tempfile.TemporaryDirectory(prefix="mtz_pycache_") as cache:
+        # Warm bytecode in a private cache, a cold start should not include compiling
+        env = dict(os.environ, PYTHONPYCACHEPREFIX=cache)
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        _python(["-c", f"import {module}"], env)
+        best = math.inf
+        for _ in range(repeat):
+            stderr = _python(["-X", "importtime", "-c", f"import {module}"], env).stderr
+            # The module itself is reported last, after everything it pulled in
+            best = min(best, int(stderr.strip().splitlines()[-1].split("|")[1]) / 1000)
+    return best
+
+
+def eager_imports(module: str, names: List[str]) -> List[str]:
+    """Which of names are already loaded right after importing module"""
+    code = f"import sys, {module}; print('\\n'.join(n for n in {names!r} if n in sys.modules))"
+    return _python(["-c", code]).stdout.split()
+
+
+def _python(args: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable] + args,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _add_spec_args(parser: argparse.ArgumentParser) -> None:
+    defaults = CorpusSpec()
+    parser.add_argument("--components", type=int, default=defaults.components, help="component archives per theme")
+    parser.add_argument("--files", type=int, default=defaults.files, help="files per component")
+    parser.add_argument("--mean-size", type=int, default=defaults.mean_size, help="mean file size in bytes")
+    parser.add_argument(
+        "--size-dist",
+        choices=["fixed", "uniform", "lognormal"],
+        default=defaults.size_dist,
+        help="file size distribution",
+    )
+    parser.add_argument(
+        "--compressibility",
+        type=float,
+        default=defaults.compressibility,
+        help="compressible fraction of XML content, 0 to 1 (media gets a quarter of it)",
+    )
+    parser.add_argument("--depth", type=int, default=defaults.depth, help="archive nesting depth, 1 = no nesting")
+    parser.add_argument("--wallpaper-size", type=int, default=defaults.wallpaper_size, help="wallpaper size in bytes")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="random seed")
+
+
+def _spec_from_args(args: argparse.Namespace) -> CorpusSpec:
+    return CorpusSpec(**{key: getattr(args, key) for key in asdict(CorpusSpec())})
+
+
+def generate_main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="mtz_bench.py generate", description="Generate a synthetic MTZ theme")
+    parser.add_argument("output", help="path of the .mtz to write")
+    _add_spec_args(parser)
+    args = parser.parse_args(argv)
+
+    info = generate_theme(args.output, _spec_from_args(args))
+    print(json.dumps(asdict(info)))
+    return 0
+
+
+def run_main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="mtz_bench.py run", description="Time the extract and pack entry points")
+    parser.add_argument("--corpus", help="existing .mtz to use instead of generating one")
+    parser.add_argument(
+        "--case",
+        action="append",
+        choices=sorted(BENCHMARKS),
+        help="case to run, repeatable (default: all)",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case")
+    parser.add_argument("--jobs", type=int, default=1, help="workers/processes passed to each entry point")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    parser.add_argument("-o", "--output", help="also write the report to this file")
+    _add_spec_args(parser)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="mtz_bench_")
+    try:
+        if args.corpus:
+            # Only the outer members are known without extracting
+            with zipfile.ZipFile(args.corpus) as zip_ref:
+                infos = zip_ref.infolist()
+            corpus = CorpusInfo(
+                os.path.abspath(args.corpus),
+                files=len(infos),
+                bytes=sum(info.file_size for info in infos),
+            )
+        else:
+            corpus = generate_theme(os.path.join(workdir, "corpus.mtz"), _spec_from_args(args))
+
+        results = run_benchmarks(corpus, workdir, args.case or list(BENCHMARKS), args.jobs, args.repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        report = json.dumps({"corpus": asdict(corpus), "results": results}, indent=2)
+    else:
+        report = format_results(corpus, results)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    return 0
+
+
+def startup_main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="mtz_bench.py startup", description="Check import time against a budget, exit 1 when over"
+    )
+    parser.add_argument(
+        "--module", action="append", help="module to import, repeatable (default: mtz_extractor)"
+    )
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS, help="import time budget")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module, best is kept")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.module or ["mtz_extractor"]:
+        ms = measure_import(module, args.repeat)
+        eager = eager_imports(module, DEFERRED_MODULES)
+        ok = ms <= args.budget_ms and not eager
+        failed |= not ok
+        print(f"{module:<20}{ms:>8.1f} ms  budget {args.budget_ms:.0f} ms  {'ok' if ok else 'FAIL'}")
+        if eager:
+            print(f"  imported eagerly: {', '.join(eager)}")
+    return 1 if failed else 0
+
+
+COMMANDS: Dict[str, Callable[[List[str]], int]] = {
+    "generate": generate_main,
+    "run": run_main,
+    "startup": startup_main,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print(f"usage: mtz_bench.py {{{','.join(COMMANDS)}}} [options]", file=sys.stderr)
+        return 2
+    return COMMANDS[argv[0]](argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
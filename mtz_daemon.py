@@ -0,0 +1,409 @@
+import os
+import io
+import sys
+import json
+import time
+import uuid
+import queue
+import socket
+import argparse
+import tempfile
+import threading
+import contextlib
+import socketserver
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field, fields, asdict
+from typing import Callable, Dict, List, Optional
+
+
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_HISTORY = 1000
+
+
+def default_socket_path() -> str:
+    """MTZ_DAEMON_SOCKET, or a per-user socket in the temp directory"""
+    return os.environ.get("MTZ_DAEMON_SOCKET") or os.path.join(
+        tempfile.gettempdir(), f"mtz_daemon-{os.getuid()}.sock"
+    )
+
+
+def _warm_worker() -> None:
+    """Pool initializer: pay the imports once per worker instead of once per job"""
+    import mtz_api  # noqa: F401
+    import mtz_packing  # noqa: F401
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _extract_job(input_path: str, output_path: str, options: dict) -> dict:
+    import mtz_api
+
+    return asdict(mtz_api.extract(input_path, output_path, **options))
+
+
+def _pack_job(folder_path: str, options: dict) -> dict:
+    from mtz_packing import CompressionPolicy, MTZCompressor
+
+    if options.get("no_policy"):
+        policy = CompressionPolicy([])
+    elif options.get("policy"):
+        policy = CompressionPolicy.load(options["policy"])
+    else:
+        policy = None
+
+    started = time.perf_counter()
+    # jobs=1: the daemon's workers already fill the CPUs, a pool per job would oversubscribe them
+    with contextlib.redirect_stdout(io.StringIO()):
+        compressor = MTZCompressor(policy=policy)
+        mtz_path = compressor.pack_streaming(folder_path, full_verify=options.get("full_verify", False))
+    if not mtz_path:
+        raise RuntimeError(f"Packing failed: {folder_path}")
+
+    stats = dict(compressor.stats)
+    stats.pop("start_time")
+    return dict(
+        stats, mtz_path=mtz_path, seconds=time.perf_counter() - started, metrics=compressor.metrics.to_dict()
+    )
+
+
+JOB_KINDS: Dict[str, Callable[..., dict]] = {
+    "extract": _extract_job,
+    "pack": _pack_job,
+}
+
+
+@dataclass
+class Job:
+    """One queued extract or pack request"""
+
+    id: str
+    kind: str
+    args: list
+    state: str = "queued"
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def to_dict(self) -> dict:
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.name != "done"}
+
+
+class ExtractionDaemon:
+    """Bounded job queue in front of a pre-warmed process pool.
+
+    One dispatcher thread per worker takes jobs off the queue, so at most
+    `workers` jobs run while up to `queue_size` more wait. Finished jobs are
+    kept for status queries, the oldest are dropped past `history`.
+    """
+
+    def __init__(self, workers: int = 1, queue_size: int = DEFAULT_QUEUE_SIZE, history: int = DEFAULT_HISTORY):
+        self.workers = max(1, workers)
+        self.history = history
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.running = 0
+        self._lock = threading.Lock()
+        self._pool_lock = threading.Lock()
+        self._pool = self._new_pool()
+        self._dispatchers: List[threading.Thread] = []
+
+    def start(self) -> None:
+        self._warm(self._pool)
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._dispatch)
+            thread.daemon = True
+            thread.start()
+            self._dispatchers.append(thread)
+
+    def close(self) -> None:
+        for _ in self._dispatchers:
+            self.queue.put(None)
+        for thread in self._dispatchers:
+            thread.join()
+        self._pool.shutdown()
+
+    def submit(self, kind: str, args: list) -> Job:
+        """Queue a job, raises queue.Full when the queue is at capacity"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(uuid.uuid4().hex[:12], kind, args)
+        with self._lock:
+            self.queue.put_nowait(job)
+            self.jobs[job.id] = job
+            self._trim()
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            raise LookupError(f"Unknown job: {job_id}")
+        return job
+
+    def stats(self) -> dict:
+        with self._lock:
+            states: Dict[str, int] = {}
+            for job in self.jobs.values():
+                states[job.state] = states.get(job.state, 0) + 1
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue.qsize(),
+                "queue_size": self.queue.maxsize,
+                "running": self.running,
+                "jobs": states,
+            }
+
+    def handle(self, request: dict) -> dict:
+        """Answer one client request"""
+        op = request.get("op")
+        if op == "submit":
+            try:
+                job = self.submit(request["kind"], request["args"])
+            except queue.Full:
+                return {"ok": False, "error": "Queue is full, try again later"}
+            return {"ok": True, "job": job.to_dict()}
+        if op == "status":
+            if request.get("id"):
+                return {"ok": True, "job": self.get(request["id"]).to_dict()}
+            return {"ok": True, "daemon": self.stats()}
+        if op == "wait":
+            job = self.get(request["id"])
+            job.done.wait(request.get("timeout"))
+            return {"ok": True, "job": job.to_dict()}
+        raise ValueError(f"Unknown op: {op}")
+
+    def _dispatch(self) -> None:
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            with self._lock:
+                job.state = "running"
+                job.started = time.time()
+                self.running += 1
+            try:
+                job.result = self._run(job)
+                job.state = "done"
+            except Exception as e:
+                job.error = str(e)
+                job.state = "failed"
+            with self._lock:
+                job.finished = time.time()
+                self.running -= 1
+            job.done.set()
+
+    def _run(self, job: Job) -> dict:
+        pool = self._pool
+        try:
+            future = pool.submit(JOB_KINDS[job.kind], *job.args)
+        except BrokenProcessPool:
+            # Broken by another job before this one got in, so it never ran
+            pool = self._replace_pool(pool)
+            future = pool.submit(JOB_KINDS[job.kind], *job.args)
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            self._replace_pool(pool)
+            raise
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+
+    def _warm(self, pool: ProcessPoolExecutor) -> None:
+        # Workers are spawned on demand, one task each forces them all up now
+        for future in [pool.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        """Swap a pool whose worker died for a fresh one, once however many dispatchers notice"""
+        with self._pool_lock:
+            if self._pool is broken:
+                broken.shutdown(wait=False)
+                pool = self._new_pool()
+                self._warm(pool)
+                self._pool = pool
+            return self._pool
+
+    def _trim(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.done.is_set()]
+        for job_id in finished[:max(0, len(self.jobs) - self.history)]:
+            del self.jobs[job_id]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """One JSON request per line, one JSON response line each"""
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if request.get("op") == "shutdown":
+                    response = {"ok": True}
+                    threading.Thread(target=self.server.shutdown).start()
+                else:
+                    response = self.server.daemon.handle(request)
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, daemon: ExtractionDaemon):
+        self.daemon = daemon
+        super().__init__(socket_path, _Handler)
+
+
+def call(request: dict, socket_path: Optional[str] = None) -> dict:
+    """Send one request to a running daemon and return its response"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path or default_socket_path())
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("Daemon closed the connection")
+    return json.loads(line)
+
+
+def serve_main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="mtz_daemon.py serve", description="Run extract and pack jobs from a Unix socket"
+    )
+    parser.add_argument("--socket", default=default_socket_path(), help="socket path")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="jobs run at once")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="jobs waiting at most")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.socket):
+        try:
+            call({"op": "status"}, args.socket)
+            print(f"A daemon is already listening on {args.socket}", file=sys.stderr)
+            return 1
+        except OSError:
+            # Left behind by a daemon that did not shut down cleanly
+            os.unlink(args.socket)
+
+    daemon = ExtractionDaemon(args.workers, args.queue_size)
+    daemon.start()
+    server = DaemonServer(args.socket, daemon)
+    print(f"Listening on {args.socket} with {daemon.workers} workers", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+        daemon.close()
+    return 0
+
+
+def _client_parser(prog: str, description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog=f"mtz_daemon.py {prog}", description=description)
+    parser.add_argument("--socket", default=default_socket_path(), help="socket path")
+    return parser
+
+
+def _submit(args: argparse.Namespace, kind: str, job_args: list) -> int:
+    """Submit a job, then wait for it unless --no-wait, printing the job as JSON"""
+    response = call({"op": "submit", "kind": kind, "args": job_args}, args.socket)
+    if response["ok"] and not args.no_wait:
+        response = call({"op": "wait", "id": response["job"]["id"]}, args.socket)
+    return _print_response(response)
+
+
+def _print_response(response: dict) -> int:
+    if not response["ok"]:
+        print(response["error"], file=sys.stderr)
+        return 1
+    print(json.dumps(response.get("job") or response.get("daemon"), ensure_ascii=False))
+    return 1 if response.get("job", {}).get("state") == "failed" else 0
+
+
+def extract_main(argv: List[str]) -> int:
+    parser = _client_parser("extract", "Extract an MTZ file through the daemon")
+    parser.add_argument("input", help="MTZ file")
+    parser.add_argument("output", help="output folder, must not exist unless --incremental")
+    parser.add_argument("--workers", type=int, default=1, help="extraction threads for this job")
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("-p", "--pattern", action="append", help="include glob, '!' excludes")
+    parser.add_argument("--no-wait", action="store_true", help="print the queued job and return")
+    args = parser.parse_args(argv)
+
+    # The daemon has its own working directory
+    options = {"workers": args.workers, "incremental": args.incremental, "patterns": args.pattern}
+    return _submit(args, "extract", [os.path.abspath(args.input), os.path.abspath(args.output), options])
+
+
+def pack_main(argv: List[str]) -> int:
+    parser = _client_parser("pack", "Pack a theme folder into FOLDER.mtz through the daemon")
+    parser.add_argument("folder", help="theme folder, kept in place")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--policy", help="JSON compression rules")
+    group.add_argument("--no-policy", action="store_true")
+    parser.add_argument("--full-verify", action="store_true")
+    parser.add_argument("--no-wait", action="store_true", help="print the queued job and return")
+    args = parser.parse_args(argv)
+
+    options = {
+        "policy": os.path.abspath(args.policy) if args.policy else None,
+        "no_policy": args.no_policy,
+        "full_verify": args.full_verify,
+    }
+    return _submit(args, "pack", [os.path.abspath(args.folder), options])
+
+
+def status_main(argv: List[str]) -> int:
+    parser = _client_parser("status", "Show a job, or queue depth and job counts")
+    parser.add_argument("id", nargs="?", help="job id")
+    args = parser.parse_args(argv)
+    return _print_response(call({"op": "status", "id": args.id}, args.socket))
+
+
+def wait_main(argv: List[str]) -> int:
+    parser = _client_parser("wait", "Wait for a job to finish")
+    parser.add_argument("id", help="job id")
+    parser.add_argument("--timeout", type=float, help="seconds, the job may still be running after")
+    args = parser.parse_args(argv)
+    return _print_response(call({"op": "wait", "id": args.id, "timeout": args.timeout}, args.socket))
+
+
+def shutdown_main(argv: List[str]) -> int:
+    args = _client_parser("shutdown", "Stop the daemon once queued and running jobs finish").parse_args(argv)
+    response = call({"op": "shutdown"}, args.socket)
+    if not response["ok"]:
+        print(response["error"], file=sys.stderr)
+        return 1
+    return 0
+
+
+COMMANDS: Dict[str, Callable[[List[str]], int]] = {
+    "serve": serve_main,
+    "extract": extract_main,
+    "pack": pack_main,
+    "status": status_main,
+    "wait": wait_main,
+    "shutdown": shutdown_main,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print(f"usage: mtz_daemon.py {{{','.join(COMMANDS)}}} [options]", file=sys.stderr)
+        return 2
+    return COMMANDS[argv[0]](argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
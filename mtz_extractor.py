@@ -4,16 +4,58 @@ import zipfile
 import shutil
 import logging
 import time
-import platform
-import psutil 
 import threading
+import queue
 import random
-from typing import Set, Optional
+import tempfile
+import struct
+import io
+import mmap
+import json
+import argparse
+import hashlib
+import glob
+import re
+from concurrent.futures import as_completed
+from typing import IO, Callable, Dict, List, Set, Optional, Tuple
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from itertools import cycle
+from collections import OrderedDict
 import contextlib
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:
+    # Windows, the cache and store then only serialize their bookkeeping within a process
+    fcntl = None
+
+from mtz_filter import PathFilter
+from mtz_metrics import Metrics
+from mtz_stream import StreamMember, StreamingZipReader
+from mtz_walk import scan_tree
+
+
+DEFAULT_MEMORY_THRESHOLD = 64 * 1024 * 1024
+DEFAULT_MAX_DEPTH = 4
+DEFAULT_MAX_OPEN_ARCHIVES = 8
+COPY_BUFSIZE = 1024 * 1024
+MANIFEST_NAME = ".mtz_manifest.json"
+MANIFEST_VERSION = 1
+DEFAULT_DEDUPE_MIN_SIZE = 4096
+DEFAULT_CACHE_MAX_BYTES = 10 * 1024 * 1024 * 1024
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+LOCAL_HEADER_FORMAT = "<4s2B4HL2L2H"
+LOCAL_HEADER_SIZE = struct.calcsize(LOCAL_HEADER_FORMAT)
+DEFAULT_ALLOWED_EXTENSIONS = {
+    ".java", ".kt", ".so", ".aar", ".jar", ".mp3", ".wav",
+    ".mp4", ".3gp", ".txt", ".json", ".xml", ".html", ".css",
+    ".js", ".ttf", ".otf", ".png", ".jpg", ".jpeg", ".gif",
+    ".webp", ".pdf", ".gradle", ".properties", ".MF", ".SF",
+    ".RSA",
+}
+
 
 class ColorText:
     """Class for handling text colors in terminal"""
@@ -114,10 +156,20 @@ class LoadingAnimation:
                 time.sleep(0.1)
 
 
+def clear_screen() -> None:
+    """Clear the terminal, leaving redirected output untouched"""
+    if sys.stdout.isatty():
+        os.system("cls" if os.name == "nt" else "clear")
+
+
 @contextlib.contextmanager
 def loading_animation(description: str = "Processing"):
-    """Context manager for loading animation"""
+    """Context manager for loading animation, silent when stdout is not a terminal"""
     spinner = LoadingAnimation(description)
+    if not sys.stdout.isatty():
+        yield spinner
+        return
+
     spinner.start()
     try:
         yield spinner
@@ -125,27 +177,914 @@ def loading_animation(description: str = "Processing"):
         spinner.stop()
 
 
+@dataclass
+class ExtractionPlan:
+    """Sizes and counts of an extraction, read from central directories only"""
+
+    file_path: str
+    compressed_size: int = 0
+    outer_files: int = 0
+    file_count: int = 0
+    archive_count: int = 0
+    total_bytes: int = 0
+    peak_bytes: int = 0
+    components: Dict[str, int] = field(default_factory=dict)
+
+
+class _MemberSlice(io.RawIOBase):
+    """Read-only window onto a STORED member inside its parent archive file"""
+
+    def __init__(self, fileobj: IO[bytes], start: int, size: int):
+        self._fileobj = fileobj
+        self._start = start
+        self._size = size
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self._size
+        self._pos = min(max(offset, 0), self._size)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        length = min(len(buffer), self._size - self._pos)
+        if length <= 0:
+            return 0
+        self._fileobj.seek(self._start + self._pos)
+        data = self._fileobj.read(length)
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+class _BufferReader(io.RawIOBase):
+    """Seekable reader over a memoryview, slices share its memory instead of copying"""
+
+    def __init__(self, buffer: memoryview, name: Optional[str] = None):
+        self._buffer = buffer
+        self._pos = 0
+        if name is not None:
+            self.name = name
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += len(self._buffer)
+        self._pos = min(max(offset, 0), len(self._buffer))
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._buffer) if size is None or size < 0 else min(self._pos + size, len(self._buffer))
+        data = self._buffer[self._pos:end].tobytes()
+        self._pos = end
+        return data
+
+    def readinto(self, buffer) -> int:
+        length = max(0, min(len(buffer), len(self._buffer) - self._pos))
+        buffer[:length] = self._buffer[self._pos:self._pos + length]
+        self._pos += length
+        return length
+
+    def pread(self, offset: int, size: int) -> bytes:
+        """Read at offset without moving the position, safe next to other readers"""
+        return self._buffer[offset:offset + size].tobytes()
+
+    def slice(self, start: int, size: int) -> "_BufferReader":
+        return _BufferReader(self._buffer[start:start + size])
+
+    def close(self) -> None:
+        if not self.closed:
+            self._buffer.release()
+        super().close()
+
+
+class _MappedFile(_BufferReader):
+    """Read-only memory map of a whole file"""
+
+    def __init__(self, mapping: mmap.mmap, name: str):
+        super().__init__(memoryview(mapping), name)
+        self._mapping = mapping
+
+    def close(self) -> None:
+        super().close()
+        try:
+            self._mapping.close()
+        except BufferError:
+            # A slice is still open, the mapping goes away with the last one
+            pass
+
+
+class ContentSniffer:
+    """Class for detecting file types from their leading bytes"""
+
+    HEADER_SIZE = 16
+    SIGNATURES = [
+        ("zip", 0, b"PK\x03\x04"),
+        ("zip", 0, b"PK\x05\x06"),
+        ("png", 0, b"\x89PNG\r\n\x1a\n"),
+        ("jpeg", 0, b"\xff\xd8\xff"),
+        ("gif", 0, b"GIF87a"),
+        ("gif", 0, b"GIF89a"),
+        ("webp", 8, b"WEBP"),
+        ("wav", 8, b"WAVE"),
+        ("mp3", 0, b"ID3"),
+        ("ogg", 0, b"OggS"),
+        ("mp4", 4, b"ftyp"),
+        ("ttf", 0, b"\x00\x01\x00\x00"),
+        ("ttf", 0, b"true"),
+        ("otf", 0, b"OTTO"),
+        ("pdf", 0, b"%PDF"),
+        ("xml", 0, b"<?xml"),
+        ("elf", 0, b"\x7fELF"),
+    ]
+
+    def __init__(self, signatures: Optional[List[Tuple[str, int, bytes]]] = None):
+        self.signatures = list(signatures or self.SIGNATURES)
+        self.detectors = []
+        self._cache = {}
+
+    def register(self, kind: str, magic: bytes, offset: int = 0) -> None:
+        """Add a magic-byte signature"""
+        self.signatures.append((kind, offset, magic))
+        self._cache.clear()
+
+    def add_detector(self, detector: Callable[[bytes], Optional[str]]) -> None:
+        """Add a custom detector, consulted before the signature table"""
+        self.detectors.append(detector)
+        self._cache.clear()
+
+    def detect(self, header: bytes) -> Optional[str]:
+        """Return the detected kind of a header, or None if unknown"""
+        for detector in self.detectors:
+            kind = detector(header)
+            if kind:
+                return kind
+        for kind, offset, magic in self.signatures:
+            if header[offset:offset + len(magic)] == magic:
+                return kind
+        return None
+
+    def sniff(self, zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo) -> Optional[str]:
+        """Detect the kind of an archive member, reading only its first bytes"""
+        key = (info.filename, info.CRC, info.file_size)
+        if key not in self._cache:
+            with zip_ref.open(info) as source:
+                self._cache[key] = self.detect(source.read(self.HEADER_SIZE))
+        return self._cache[key]
+
+    def sniff_file(self, path: Path) -> Optional[str]:
+        """Detect the kind of a file on disk"""
+        with open(path, "rb") as source:
+            return self.detect(source.read(self.HEADER_SIZE))
+
+
+class ExtractionManifest:
+    """Sidecar manifest of CRC32 and size per extracted file, used for incremental runs"""
+
+    def __init__(self, root: Path, previous: Optional[dict] = None):
+        self.root = Path(root)
+        previous = previous or {}
+        self.previous_files = previous.get("files", {})
+        self.previous_archives = previous.get("archives", {})
+        self.files = {}
+        self.archives = {}
+        self.unchanged = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, root: Path) -> "ExtractionManifest":
+        """Load the manifest left in root by the previous run, if any"""
+        try:
+            with open(Path(root) / MANIFEST_NAME, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+            if previous.get("version") != MANIFEST_VERSION:
+                previous = None
+        except (OSError, ValueError):
+            previous = None
+        return cls(root, previous)
+
+    def save(self) -> None:
+        data = {"version": MANIFEST_VERSION, "files": self.files, "archives": self.archives}
+        with open(self.root / MANIFEST_NAME, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"), sort_keys=True)
+
+    def unchanged_file(self, target: Path, info: zipfile.ZipInfo) -> bool:
+        """Check a leaf against the previous run, recording it when it can be kept"""
+        key = self._key(target)
+        entry = [info.CRC, info.file_size]
+        if self.previous_files.get(key) != entry or not _has_size(target, info.file_size):
+            return False
+        with self._lock:
+            self.files[key] = entry
+            self.unchanged += 1
+        return True
+
+    def unchanged_archive(self, folder: Path, info: zipfile.ZipInfo) -> bool:
+        """Check an inner archive against the previous run, carrying over its files if kept"""
+        key = self._key(folder)
+        if self.previous_archives.get(key) != [info.CRC, info.file_size]:
+            return False
+
+        prefix = key + "/"
+        files = {
+            name: entry
+            for name, entry in self.previous_files.items()
+            if name == key or name.startswith(prefix)
+        }
+        if not all(_has_size(self.root / name, entry[1]) for name, entry in files.items()):
+            return False
+
+        archives = {
+            name: entry
+            for name, entry in self.previous_archives.items()
+            if name == key or name.startswith(prefix)
+        }
+        with self._lock:
+            self.files.update(files)
+            self.archives.update(archives)
+            self.unchanged += len(files)
+        return True
+
+    def record_file(self, target: Path, info: zipfile.ZipInfo) -> None:
+        with self._lock:
+            self.files[self._key(target)] = [info.CRC, info.file_size]
+
+    def record_archive(self, folder: Path, info: zipfile.ZipInfo) -> None:
+        with self._lock:
+            self.archives[self._key(folder)] = [info.CRC, info.file_size]
+
+    def remove_stale(self) -> int:
+        """Delete files of the previous run that are no longer in the archive"""
+        removed = 0
+        for name in self.previous_files:
+            if name not in self.files:
+                try:
+                    (self.root / name).unlink()
+                    removed += 1
+                except OSError:
+                    continue
+        return removed
+
+    def _key(self, path: Path) -> str:
+        return path.relative_to(self.root).as_posix()
+
+
+class BlobStore:
+    """Content-addressed store of extracted files shared across themes.
+
+    Blobs are indexed by member CRC32 and size and confirmed with SHA-256,
+    then materialized into theme folders as hardlinks (or copies when the
+    filesystem refuses). Hardlinked files share their content, so edit
+    extracted files by replacing them rather than writing in place.
+    """
+
+    def __init__(self, root: str, min_size: int = DEFAULT_DEDUPE_MIN_SIZE):
+        self.root = Path(root)
+        self.min_size = min_size
+        self.stats = {"stored": 0, "linked": 0, "copied": 0, "bytes_saved": 0}
+        self._lock = threading.Lock()
+        self._users = 0
+        self._lock_file: Optional[IO[str]] = None
+        for name in ("objects", "index", "tmp"):
+            (self.root / name).mkdir(parents=True, exist_ok=True)
+
+    def materialize(
+        self, opener: Callable[[], IO[bytes]], target: Path, crc: int, size: int
+    ) -> bool:
+        """Place content at target, returns True if an existing blob was reused"""
+        key_dir = self.root / "index" / f"{crc:08x}-{size}"
+        try:
+            candidates = set(os.listdir(key_dir))
+        except FileNotFoundError:
+            candidates = set()
+
+        with self._shared():
+            if candidates:
+                # Same CRC and size, confirm with the strong hash before trusting it
+                digest = hashlib.sha256()
+                with opener() as source:
+                    for chunk in iter(lambda: source.read(COPY_BUFSIZE), b""):
+                        digest.update(chunk)
+                blob = self._blob_path(digest.hexdigest())
+                if digest.hexdigest() in candidates and blob.exists():
+                    self._link(blob, target)
+                    with self._lock:
+                        self.stats["bytes_saved"] += size
+                    return True
+
+            fd, tmp_path = tempfile.mkstemp(dir=self.root / "tmp")
+            digest = hashlib.sha256()
+            try:
+                with os.fdopen(fd, "wb") as dest, opener() as source:
+                    for chunk in iter(lambda: source.read(COPY_BUFSIZE), b""):
+                        digest.update(chunk)
+                        dest.write(chunk)
+                blob = self._blob_path(digest.hexdigest())
+                blob.parent.mkdir(exist_ok=True)
+                # Only the first writer of a digest creates the blob, a later one reuses it
+                stored = self._claim(tmp_path, blob)
+            finally:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_path)
+
+            key_dir.mkdir(exist_ok=True)
+            (key_dir / digest.hexdigest()).touch()
+            with self._lock:
+                if stored:
+                    self.stats["stored"] += 1
+                else:
+                    self.stats["bytes_saved"] += size
+            self._link(blob, target)
+            return not stored
+
+    def gc(self) -> Tuple[int, int]:
+        """Drop blobs no theme folder links to, returns (blobs, bytes) removed"""
+        removed, freed = 0, 0
+        # Exclusive against extractions holding the shared lock, a blob with one link may be about to get more
+        with open(self.root / "lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            for blob in (self.root / "objects").glob("*/*"):
+                stat = blob.stat()
+                if stat.st_nlink <= 1:
+                    blob.unlink()
+                    removed += 1
+                    freed += stat.st_size
+
+            for key_dir in (self.root / "index").iterdir():
+                for marker in key_dir.iterdir():
+                    if not self._blob_path(marker.name).exists():
+                        marker.unlink()
+                with contextlib.suppress(OSError):
+                    key_dir.rmdir()
+            for tmp in (self.root / "tmp").iterdir():
+                with contextlib.suppress(OSError):
+                    tmp.unlink()
+        return removed, freed
+
+    @contextlib.contextmanager
+    def _shared(self):
+        """Keep gc out while blobs are looked up and linked, one shared flock for all threads"""
+        with self._lock:
+            if self._users == 0:
+                self._lock_file = open(self.root / "lock", "a")
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_SH)
+            self._users += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._users -= 1
+                if self._users == 0:
+                    # Closing the file releases the flock
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    @staticmethod
+    def _claim(tmp_path: str, blob: Path) -> bool:
+        """Create blob from tmp_path unless it exists, returns False if it already did"""
+        try:
+            os.link(tmp_path, blob)
+        except FileExistsError:
+            return False
+        except OSError:
+            # No hardlinks on this filesystem, create the name exclusively and copy into it
+            try:
+                with open(tmp_path, "rb") as source, open(blob, "xb") as dest:
+                    shutil.copyfileobj(source, dest, COPY_BUFSIZE)
+            except FileExistsError:
+                return False
+        return True
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    def _link(self, blob: Path, target: Path) -> None:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if os.path.lexists(target):
+            target.unlink()
+        try:
+            os.link(blob, target)
+            key = "linked"
+        except OSError:
+            shutil.copyfile(blob, target)
+            key = "copied"
+        with self._lock:
+            self.stats[key] += 1
+
+
+class ExtractionCache:
+    """Cache of finished extraction trees keyed by a hash of the MTZ bytes.
+
+    Trees are copied in on a miss and copied out on a hit, never linked, so
+    editing or re-extracting an output folder cannot reach the cache.
+    Entries are evicted least recently used first once the cache grows
+    past max_bytes.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        for name in ("entries", "tmp"):
+            (self.root / name).mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key_for(file_path: str, variant: str = "") -> str:
+        """Hash the MTZ bytes, variant separates results of different settings"""
+        digest = hashlib.sha256(variant.encode("utf-8"))
+        with open(file_path, "rb") as source:
+            for chunk in iter(lambda: source.read(COPY_BUFSIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """Metadata of a cached tree, None if there is none. Not counted as a hit or miss"""
+        meta = self._read_meta(key)
+        if meta is None or not (self.root / "entries" / key).is_dir():
+            return None
+        return meta
+
+    def restore(self, key: str, folder: str) -> Optional[dict]:
+        """Clone a cached tree into folder, returns the entry metadata on a hit"""
+        meta = self.lookup(key)
+        entry = self.root / "entries" / key
+        try:
+            if meta is None:
+                raise FileNotFoundError(entry)
+            copy_tree(entry, Path(folder))
+        except FileNotFoundError:
+            # Missing, or evicted by another process while it was being copied. Whatever
+            # was copied is the same theme, the extraction that follows overwrites it.
+            self._count("misses")
+            return None
+
+        with self._locked():
+            if self._meta_path(key).exists():
+                meta["last_used"] = time.time()
+                self._write_json(self._meta_path(key), meta)
+        self._count("hits", meta["size"])
+        return meta
+
+    def store(self, key: str, folder: str, total_files: int = 0) -> None:
+        """Add a finished extraction tree to the cache"""
+        entry = self.root / "entries" / key
+        if entry.exists():
+            return
+
+        tmp = Path(tempfile.mkdtemp(dir=self.root / "tmp"))
+        size, files = copy_tree(Path(folder), tmp)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # Another process stored the same theme first
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+
+        now = time.time()
+        meta = {"size": size, "files": files, "total_files": total_files, "created": now, "last_used": now}
+        self._write_json(self._meta_path(key), meta)
+        self.evict()
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits max_bytes"""
+        with self._locked():
+            entries = []
+            for meta_path in (self.root / "entries").glob("*.json"):
+                meta = self._read_meta(meta_path.stem)
+                if meta is not None:
+                    entries.append((meta["last_used"], meta["size"], meta_path.stem))
+
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, key in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                # Drop the metadata first so a half-removed entry is never a hit. Processes
+                # without flock may have evicted it already.
+                self._meta_path(key).unlink(missing_ok=True)
+                shutil.rmtree(self.root / "entries" / key, ignore_errors=True)
+                total -= size
+                removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        """Hits, misses and bytes saved so far, plus the current cache size"""
+        stats = {"hits": 0, "misses": 0, "bytes_saved": 0}
+        stats.update(self._read_json(self.root / "stats.json") or {})
+        metas = [self._read_meta(path.stem) for path in (self.root / "entries").glob("*.json")]
+        metas = [meta for meta in metas if meta is not None]
+        stats["entries"] = len(metas)
+        stats["size"] = sum(meta["size"] for meta in metas)
+        return stats
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Serialize stats and eviction across threads, and across processes where flock exists"""
+        with self._lock, open(self.root / "lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _count(self, name: str, bytes_saved: int = 0) -> None:
+        # Batch jobs share the cache from separate processes, a thread lock alone loses counts
+        with self._locked():
+            path = self.root / "stats.json"
+            stats = {"hits": 0, "misses": 0, "bytes_saved": 0}
+            stats.update(self._read_json(path) or {})
+            stats[name] += 1
+            stats["bytes_saved"] += bytes_saved
+            self._write_json(path, stats)
+
+    def _meta_path(self, key: str) -> Path:
+        return self.root / "entries" / f"{key}.json"
+
+    def _read_meta(self, key: str) -> Optional[dict]:
+        return self._read_json(self._meta_path(key))
+
+    def _read_json(self, path: Path) -> Optional[dict]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path: Path, data: dict) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.root / "tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+
+class ArchiveExpander:
+    """Class for expanding nested archives through a work queue and a thread pool"""
+
+    def __init__(
+        self,
+        is_archive: Callable[[zipfile.ZipFile, zipfile.ZipInfo, int], bool],
+        open_nested: Callable[[zipfile.ZipFile, zipfile.ZipInfo], IO[bytes]],
+        write_file: Callable[[IO[bytes], Path], None],
+        workers: int = 1,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        manifest: Optional[ExtractionManifest] = None,
+        write_member: Optional[Callable[[zipfile.ZipFile, zipfile.ZipInfo, Path], None]] = None,
+        metrics: Optional[Metrics] = None,
+        select: Optional[Callable[[Path, bool], bool]] = None,
+    ):
+        self.is_archive = is_archive
+        self.open_nested = open_nested
+        self.write_file = write_file
+        self.write_member = write_member or self._write_member
+        # select(path, below) picks files, or folders with something wanted below
+        self.select = select
+        self.manifest = manifest
+        self.metrics = metrics or Metrics("expand")
+        self.workers = max(1, workers)
+        self.max_depth = max_depth
+        self.archives = 0
+        self.errors = []
+        # One pending archive per worker, each one may hold a buffered member
+        self._queue = queue.Queue(maxsize=self.workers)
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def __enter__(self) -> "ArchiveExpander":
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._work)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._queue.join()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self.errors and exc_type is None:
+            raise self.errors[0]
+
+    def submit(
+        self,
+        source,
+        folder: Path,
+        depth: int,
+        fallback: Optional[Path] = None,
+        info: Optional[zipfile.ZipInfo] = None,
+    ) -> None:
+        """Queue an archive (path or open buffer) for expansion into folder, waiting for room"""
+        self._queue.put((source, folder, depth, fallback, info))
+
+    def _offer(self, job: tuple) -> bool:
+        """Queue a job if there is room, False if the caller has to expand it itself"""
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            return False
+        return True
+
+    def expand(
+        self,
+        source,
+        folder: Path,
+        depth: int,
+        fallback: Optional[Path] = None,
+        info: Optional[zipfile.ZipInfo] = None,
+    ) -> bool:
+        """Expand an archive in the calling thread, nested archives are queued while there is room.
+
+        A path source is deleted once expanded. A buffer that turns out not
+        to be a zip is written to fallback instead.
+        """
+        with self.metrics.span("inner_expand"):
+            try:
+                try:
+                    zip_ref = zipfile.ZipFile(source, "r")
+                except zipfile.BadZipFile:
+                    if fallback is not None:
+                        source.seek(0)
+                        self.write_file(source, fallback)
+                        if self.manifest is not None and info is not None:
+                            self.manifest.record_file(fallback, info)
+                    return False
+
+                self.metrics.add("archives_opened")
+                with zip_ref:
+                    folder.mkdir(parents=True, exist_ok=True)
+                    for info in zip_ref.infolist():
+                        self.extract_member(zip_ref, info, folder, depth)
+            finally:
+                if not isinstance(source, Path):
+                    source.close()
+
+        if isinstance(source, Path):
+            source.unlink()
+        with self._lock:
+            self.archives += 1
+        return True
+
+    def extract_member(
+        self, zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, folder: Path, depth: int
+    ) -> None:
+        """Write a single member, queueing it for expansion if it is an archive"""
+        target = folder / _member_path(info.filename)
+        if info.is_dir():
+            if self.select is None or self.select(target, True):
+                target.mkdir(parents=True, exist_ok=True)
+            return
+
+        wanted = self.select is None or self.select(target, False)
+        if depth < self.max_depth:
+            archive_folder = folder / _member_path(_archive_name(info.filename, depth))
+            expand = self.select is None or self.select(archive_folder, True)
+            if not wanted and not expand:
+                # Skipped before a single byte of it is read
+                return
+
+            if expand and self.is_archive(zip_ref, info, depth):
+                if self.manifest is not None:
+                    if self.manifest.unchanged_archive(archive_folder, info):
+                        return
+                    self.manifest.record_archive(archive_folder, info)
+
+                buffer = self.open_nested(zip_ref, info)
+                job = (buffer, archive_folder, depth + 1, target if wanted else None, info)
+                # Component archives expand in the caller, nested ones too when every worker
+                # is busy. Blocking on the queue could deadlock workers that feed it.
+                if depth == 0 or not self._offer(job):
+                    self.expand(*job)
+                return
+
+        if not wanted:
+            return
+        if self.manifest is not None and self.manifest.unchanged_file(target, info):
+            return
+        self.write_member(zip_ref, info, target)
+        if self.manifest is not None:
+            self.manifest.record_file(target, info)
+
+    def _write_member(self, zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, target: Path) -> None:
+        with zip_ref.open(info) as source:
+            self.write_file(source, target)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self.expand(*job)
+            except Exception as e:
+                with self._lock:
+                    self.errors.append(e)
+            finally:
+                self._queue.task_done()
+
+
+class MTZArchive:
+    """Read-only view of an MTZ theme, inner archives are opened on first access"""
+
+    def __init__(
+        self,
+        file_path: str,
+        allowed_extensions: Set[str] = None,
+        memory_threshold: int = DEFAULT_MEMORY_THRESHOLD,
+        sniffer: Optional[ContentSniffer] = None,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        max_open: int = DEFAULT_MAX_OPEN_ARCHIVES,
+    ):
+        self.file_path = file_path
+        self.allowed_extensions = allowed_extensions or set(DEFAULT_ALLOWED_EXTENSIONS)
+        self.memory_threshold = memory_threshold
+        self.sniffer = sniffer or ContentSniffer()
+        self.max_depth = max_depth
+        self.max_open = max(1, max_open)
+        self._zip_ref = open_zip(file_path)
+        # archive path -> (parent archive path, member name, depth)
+        self._index = {}
+        self._archives = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __enter__(self) -> "MTZArchive":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the outer archive and every open inner archive"""
+        with self._lock:
+            while self._archives:
+                _, zip_ref = self._archives.popitem()
+                zip_ref.close()
+            self._zip_ref.close()
+
+    def namelist(self, recursive: bool = False) -> List[str]:
+        """List outer members, or every leaf file through inner archives if recursive"""
+        if not recursive:
+            return self._zip_ref.namelist()
+        return self._list("", 0)
+
+    def is_archive(self, name: str) -> bool:
+        """Check whether a path points at an inner archive"""
+        zip_ref, info, depth = self._resolve(name)
+        return not info.is_dir() and self._is_archive(zip_ref, info, depth)
+
+    def getinfo(self, name: str) -> zipfile.ZipInfo:
+        """Return the ZipInfo of a file, looking through inner archives"""
+        return self._resolve(name)[1]
+
+    def open(self, name: str) -> IO[bytes]:
+        """Open a file as a stream, e.g. icons/res/drawable-xxhdpi/foo.png"""
+        zip_ref, info, _ = self._resolve(name)
+        return zip_ref.open(info)
+
+    def read(self, name: str) -> bytes:
+        """Read a whole file, looking through inner archives"""
+        with self.open(name) as source:
+            return source.read()
+
+    def _is_archive(self, zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, depth: int) -> bool:
+        if depth >= self.max_depth or _has_extension(info.filename, self.allowed_extensions):
+            return False
+        return self.sniffer.sniff(zip_ref, info) == "zip"
+
+    def _list(self, key: str, depth: int) -> List[str]:
+        prefix = f"{key}/" if key else ""
+        names = []
+        for info in self._archive(key).infolist():
+            # Fetch the handle again, opening a child may have evicted it
+            zip_ref = self._archive(key)
+            if not info.is_dir() and self._is_archive(zip_ref, info, depth):
+                child = prefix + _archive_name(info.filename, depth)
+                self._index[child] = (key, info.filename, depth + 1)
+                names.extend(self._list(child, depth + 1))
+            else:
+                names.append(prefix + info.filename)
+        return names
+
+    def _resolve(self, name: str) -> Tuple[zipfile.ZipFile, zipfile.ZipInfo, int]:
+        """Find the archive holding name, opening inner archives along the way"""
+        parts = name.strip("/").split("/")
+        key, depth, start = "", 0, 0
+        while start < len(parts):
+            zip_ref = self._archive(key)
+            rest = "/".join(parts[start:])
+            info = _find_member(zip_ref, rest) or _find_member(zip_ref, rest + "/")
+            if info is not None:
+                return zip_ref, info, depth
+
+            # The last segment may name a nested archive by its folder name, without .zip
+            for end in range(start + 1, len(parts) + 1):
+                member = "/".join(parts[start:end])
+                candidates = [member, member + ".zip"] if depth > 0 else [member]
+                for candidate in candidates:
+                    info = _find_member(zip_ref, candidate)
+                    if info is not None and self._is_archive(zip_ref, info, depth):
+                        break
+                else:
+                    continue
+                if end == len(parts):
+                    return zip_ref, info, depth
+                child = "/".join(parts[:end])
+                self._index[child] = (key, info.filename, depth + 1)
+                key, depth, start = child, depth + 1, end
+                break
+            else:
+                break
+        raise KeyError(f"There is no item named {name!r} in the archive")
+
+    def _archive(self, key: str) -> zipfile.ZipFile:
+        """Return an open inner archive, keeping at most max_open of them alive"""
+        if not key:
+            return self._zip_ref
+        with self._lock:
+            if key in self._archives:
+                self._archives.move_to_end(key)
+                return self._archives[key]
+
+            parent_key, member, _ = self._index[key]
+            parent = self._archive(parent_key)
+            buffer = open_member_archive(parent, parent.getinfo(member), self.memory_threshold)
+            zip_ref = _owning_zip(buffer)
+            self._archives[key] = zip_ref
+            while len(self._archives) > self.max_open:
+                # Streams already opened keep their buffer alive until they are closed
+                _, evicted = self._archives.popitem(last=False)
+                evicted.close()
+            return zip_ref
+
+
 class MTZExtractor:
     """Class for handling MTZ file extraction"""
 
-    def __init__(self, allowed_extensions: Set[str] = None):
-        self.allowed_extensions = allowed_extensions or {
-            ".java", ".kt", ".so", ".aar", ".jar", ".mp3", ".wav",
-            ".mp4", ".3gp", ".txt", ".json", ".xml", ".html", ".css",
-            ".js", ".ttf", ".otf", ".png", ".jpg", ".jpeg", ".gif",
-            ".webp", ".pdf", ".gradle", ".properties", ".MF", ".SF",
-            ".RSA",
-        }
-        self.setup_logging()
+    def __init__(
+        self,
+        allowed_extensions: Set[str] = None,
+        memory_threshold: int = DEFAULT_MEMORY_THRESHOLD,
+        sniffer: Optional[ContentSniffer] = None,
+        workers: int = 1,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        incremental: bool = False,
+        store: Optional[BlobStore] = None,
+        cache: Optional[ExtractionCache] = None,
+        quiet: bool = False,
+        patterns: Optional[List[str]] = None,
+    ):
+        self.memory_threshold = memory_threshold
+        self.sniffer = sniffer or ContentSniffer()
+        self.workers = max(1, workers)
+        self.max_depth = max_depth
+        self.incremental = incremental
+        self.store = store
+        self.cache = cache
+        self.quiet = quiet
+        self.path_filter = PathFilter(patterns) if patterns else None
+        self.metrics = Metrics("extract")
+        self.allowed_extensions = allowed_extensions or set(DEFAULT_ALLOWED_EXTENSIONS)
+        # The log file is created when an extraction starts, not on construction
+        self.logger = None
+        self._cache_keys: Dict[str, str] = {}
         self.stats = {
             "start_time": None,
             "total_files": 0,
             "total_size": 0,
             "extracted_size": 0,
+            "unchanged_files": 0,
+            "removed_files": 0,
+            "cache_hit": False,
         }
 
     def setup_logging(self) -> None:
-        """Set up logging to log file"""
+        """Set up logging to log file, once per extractor"""
+        if self.logger is not None:
+            return
+        import platform
+        import psutil
+
         log_folder = Path("logs")
         log_folder.mkdir(exist_ok=True)
         
@@ -209,110 +1148,524 @@ class MTZExtractor:
 
     def format_size(self, size: int) -> str:
         """Format file size in readable format"""
-        for unit in ["B", "KB", "MB", "GB"]:
-            if size < 1024:
-                return f"{size:.2f} {unit}"
-            size /= 1024
-        return f"{size:.2f} TB"
+        return format_size(size)
+
+    def plan_extraction(self, file_path: str) -> Optional[ExtractionPlan]:
+        """Compute sizes and counts of an extraction without writing anything"""
+        try:
+            with self._animation(f"Planning {ColorText.yellow(os.path.basename(file_path))}"):
+                return self.plan(file_path)
+        except Exception as e:
+            print(f"\n{ColorText.red(f'❌ Planning failed: {str(e)}')}")
+            return None
+
+    def plan(self, file_path: str) -> ExtractionPlan:
+        """Same as plan_extraction, but errors are raised instead of printed"""
+        plan = ExtractionPlan(file_path, compressed_size=os.path.getsize(file_path))
+        spills = []
+        with self.metrics.span("plan"), open_zip(file_path) as zip_ref:
+            plan.outer_files = len(zip_ref.infolist())
+            self._plan_archive(zip_ref, plan, spills, "", 0)
+
+        # Inner archives above the memory threshold spill to temp files, one per worker
+        spills.sort(reverse=True)
+        plan.peak_bytes = plan.total_bytes + sum(spills[:self.workers])
+        return plan
+
+    def _plan_archive(
+        self, zip_ref: zipfile.ZipFile, plan: ExtractionPlan, spills: List[int], prefix: str, depth: int
+    ) -> None:
+        path_filter = self.path_filter
+        for info in zip_ref.infolist():
+            if info.is_dir():
+                continue
+
+            wanted = path_filter is None or path_filter.matches(prefix + info.filename)
+            name = prefix + _archive_name(info.filename, depth)
+            expand = depth < self.max_depth and (path_filter is None or path_filter.wants_below(name))
+            if not wanted and not expand:
+                continue
+
+            if expand and self._is_archive_member(zip_ref, info, depth):
+                with open_member_view(zip_ref, info, self.memory_threshold) as view:
+                    try:
+                        inner_ref = zipfile.ZipFile(view, "r")
+                    except zipfile.BadZipFile:
+                        inner_ref = None
+
+                    if inner_ref is not None:
+                        with inner_ref:
+                            before = plan.total_bytes
+                            self._plan_archive(inner_ref, plan, spills, name + "/", depth + 1)
+                            plan.components[name] = plan.total_bytes - before
+                            plan.archive_count += 1
+                            if info.file_size > self.memory_threshold:
+                                spills.append(info.file_size)
+                        continue
+
+            if not wanted:
+                continue
+            plan.file_count += 1
+            plan.total_bytes += info.file_size
+
+    def check_free_space(self, plan: ExtractionPlan, folder: str) -> bool:
+        """Check that the planned peak disk usage fits where folder lives"""
+        available = free_space(folder)
+        if available < plan.peak_bytes:
+            print(
+                f"\n{ColorText.red('❌ Not enough disk space!')} "
+                f"Need {self.format_size(plan.peak_bytes)}, "
+                f"available {self.format_size(available)}"
+            )
+            return False
+        return True
 
     def validate_mtz_file(self, file_path: str) -> bool:
         """Validate if file is MTZ"""
-        if not os.path.exists(file_path):
-            print(f"\n{ColorText.red('❌ File not found!')}")
-            return False
+        with self.metrics.span("validate"):
+            if not os.path.exists(file_path):
+                print(f"\n{ColorText.red('❌ File not found!')}")
+                return False
 
-        if not file_path.endswith(".mtz"):
-            print(f"\n{ColorText.red('❌ File is not MTZ format!')}")
-            return False
+            if not file_path.endswith(".mtz"):
+                print(f"\n{ColorText.red('❌ File is not MTZ format!')}")
+                return False
 
-        return True
+            return True
 
-    def create_extract_folder(self, file_path: str) -> Optional[str]:
-        """Create unique extraction folder"""
+    def create_extract_folder(
+        self, file_path: str, reuse: bool = False, base_folder: str = "./extracted"
+    ) -> Optional[str]:
+        """Create unique extraction folder, or reuse the existing one"""
         try:
             file_name = Path(file_path).stem
-            base_extract_folder = Path("./extracted")
+            base_extract_folder = Path(base_folder)
             extract_folder = base_extract_folder / file_name
 
+            # mkdir itself decides, so concurrent batch jobs never share a folder
             counter = 1
-            while extract_folder.exists():
-                extract_folder = base_extract_folder / f"{file_name}_copy{counter}"
-                counter += 1
-
-            extract_folder.mkdir(parents=True, exist_ok=True)
-            return str(extract_folder)
+            while True:
+                try:
+                    extract_folder.mkdir(parents=True, exist_ok=reuse)
+                    return str(extract_folder)
+                except FileExistsError:
+                    extract_folder = base_extract_folder / f"{file_name}_copy{counter}"
+                    counter += 1
 
         except Exception as e:
             print(f"\n{ColorText.red(f'❌ Failed to create folder: {str(e)}')}")
             return None
 
+    def extract(self, file_path: str, extract_folder: str) -> bool:
+        """Extract, expand and post-process an MTZ file, going through the result cache"""
+        self.setup_logging()
+        try:
+            self.run(file_path, extract_folder)
+            return True
+        except Exception as e:
+            print(f"\n{ColorText.red(f'❌ Extraction failed: {str(e)}')}")
+            return False
+
+    def run(self, file_path: str, extract_folder: str) -> None:
+        """Same as extract, without a log file, raising errors instead of printing them"""
+        # Hashing and restoring count towards the elapsed time too
+        started = time.time()
+        # Incremental runs update the folder in place, a cached clone would not
+        key = None
+        if self.cache is not None and not self.incremental:
+            key = self.cache_key(file_path)
+            with self._animation(f"Restoring {ColorText.yellow(os.path.basename(file_path))}"):
+                with self.metrics.span("cache"):
+                    meta = self.cache.restore(key, extract_folder)
+            if meta is not None:
+                self.stats["start_time"] = started
+                self.stats["total_size"] = os.path.getsize(file_path)
+                self.stats["total_files"] = meta["total_files"]
+                self.stats["extracted_size"] = meta["size"]
+                self.stats["cache_hit"] = True
+                return
+
+        with self._animation(self._extracting_text(file_path)):
+            self.expand(file_path, extract_folder)
+        self.stats["start_time"] = started
+        self.process_files(extract_folder, expand=False)
+
+        if key is not None:
+            self.cache.store(key, extract_folder, self.stats["total_files"])
+
+    def cache_key(self, file_path: str) -> str:
+        """Cache key of an MTZ with the current settings, hashed once per file"""
+        if file_path not in self._cache_keys:
+            with self._animation(f"Hashing {ColorText.yellow(os.path.basename(file_path))}"):
+                with self.metrics.span("cache"):
+                    self._cache_keys[file_path] = self.cache.key_for(file_path, self._cache_variant())
+        return self._cache_keys[file_path]
+
+    def cached_plan(self, file_path: str) -> Optional[ExtractionPlan]:
+        """Plan of an extraction run() would restore from the cache, from the entry's metadata.
+
+        None when it would extract instead, planning that means inflating
+        every component archive once more, which a cache hit never does.
+        """
+        if self.cache is None or self.incremental:
+            return None
+        meta = self.cache.lookup(self.cache_key(file_path))
+        if meta is None:
+            return None
+        return ExtractionPlan(
+            file_path,
+            compressed_size=os.path.getsize(file_path),
+            outer_files=meta["total_files"],
+            file_count=meta["files"],
+            total_bytes=meta["size"],
+            peak_bytes=meta["size"],
+        )
+
+    def _cache_variant(self) -> str:
+        """Settings that change the extracted tree for the same MTZ bytes"""
+        extensions = ",".join(sorted(ext.lower() for ext in self.allowed_extensions))
+        variant = f"max_depth={self.max_depth};allowed={extensions}"
+        if self.path_filter is not None:
+            # Pattern order matters, the last matching pattern wins
+            variant += ";patterns=" + json.dumps(self.path_filter.patterns)
+        return variant
+
     def extract_mtz(self, file_path: str, extract_folder: str) -> bool:
         """Extract MTZ file to folder"""
         try:
             self.stats["start_time"] = time.time()
             self.stats["total_size"] = os.path.getsize(file_path)
 
-            with loading_animation(
-                f"Extracting {ColorText.yellow(os.path.basename(file_path))} ({self.format_size(self.stats['total_size'])})"
-            ):
-                with zipfile.ZipFile(file_path, "r") as zip_ref:
-                    zip_ref.extractall(extract_folder)
-                    self.stats["total_files"] = len(zip_ref.namelist())
+            with self._animation(self._extracting_text(file_path)):
+                if self.workers > 1 or self.store is not None:
+                    self.stats["total_files"] = self._extract_members(file_path, extract_folder)
+                else:
+                    with self._open_archive(file_path) as zip_ref, self.metrics.span("outer_extract"):
+                        members = self._selected_members(zip_ref.infolist())
+                        zip_ref.extractall(extract_folder, members)
+                        self._count_members(members)
+                        self.stats["total_files"] = len(members)
+            return True
+        except Exception as e:
+            print(f"\n{ColorText.red(f'❌ Extraction failed: {str(e)}')}")
+            return False
+
+    def extract_and_expand(self, file_path: str, extract_folder: str) -> bool:
+        """Extract MTZ file and expand component archives without writing them to disk"""
+        try:
+            with self._animation(self._extracting_text(file_path)):
+                self.expand(file_path, extract_folder)
+            return True
+        except Exception as e:
+            print(f"\n{ColorText.red(f'❌ Extraction failed: {str(e)}')}")
+            return False
+
+    def expand(self, file_path: str, extract_folder: str) -> None:
+        """Same as extract_and_expand, but errors are raised instead of printed"""
+        self.stats["start_time"] = time.time()
+        self.stats["total_size"] = os.path.getsize(file_path)
+
+        manifest = ExtractionManifest.load(extract_folder) if self.incremental else None
+        with self._create_expander(manifest, extract_folder) as expander, self.metrics.span("outer_extract"):
+            self.stats["total_files"] = self._map_members(
+                file_path,
+                lambda zip_ref, info: expander.extract_member(zip_ref, info, Path(extract_folder), 0),
+            )
+
+        if manifest is not None:
+            self.stats["unchanged_files"] = manifest.unchanged
+            self.stats["removed_files"] = manifest.remove_stale()
+            manifest.save()
+
+    def extract_stream(self, stream: IO[bytes], extract_folder: str) -> bool:
+        """Extract and post-process an MTZ read front to back, e.g. from stdin"""
+        self.setup_logging()
+        try:
+            with self._animation(f"Extracting {ColorText.yellow('stream')}"):
+                self.expand_stream(stream, extract_folder)
+            self.process_files(extract_folder, expand=False)
             return True
         except Exception as e:
             print(f"\n{ColorText.red(f'❌ Extraction failed: {str(e)}')}")
             return False
 
-    def process_files(self, folder: str) -> None:
-        """Process files after extraction"""
-        with loading_animation(f"Processing {ColorText.yellow(os.path.basename(folder))}"):
-            self._add_zip_extension_to_files(folder)
-            self._unzip_files_to_folders(folder)
-            self._cleanup_empty_folders(folder)
-            self.stats["extracted_size"] = self.calculate_folder_size(folder)
+    def expand_stream(self, stream: IO[bytes], extract_folder: str) -> None:
+        """Same as expand for a non-seekable stream, members are written as they arrive"""
+        self.stats["start_time"] = time.time()
+        reader = StreamingZipReader(stream)
+        folder = Path(extract_folder)
+        files = 0
+        with self._create_expander(root=extract_folder) as expander, self.metrics.span("outer_extract"):
+            for member in reader:
+                files += 1
+                self._extract_streamed(expander, member, folder)
+        self.stats["total_files"] = files
+        self.stats["total_size"] = reader.bytes_read
+        self.metrics.add("bytes_read", reader.bytes_read)
+
+    def _extract_streamed(self, expander: "ArchiveExpander", member: StreamMember, folder: Path) -> None:
+        info = member.info
+        target = folder / _member_path(info.filename)
+        select = expander.select
+        if info.is_dir():
+            if select is None or select(target, True):
+                target.mkdir(parents=True, exist_ok=True)
+            return
+
+        wanted = select is None or select(target, False)
+        archive_folder = folder / _member_path(_archive_name(info.filename, 0))
+        expand = self.max_depth > 0 and (select is None or select(archive_folder, True))
+        if not wanted and not expand:
+            # The reader skips it, without inflating when its size is known
+            return
+
+        if (
+            expand
+            and not _has_extension(info.filename, self.allowed_extensions)
+            and self.sniffer.detect(member.peek(ContentSniffer.HEADER_SIZE)) == "zip"
+        ):
+            # Only the central directory at its end makes an archive readable, so buffer it
+            buffer = spool(member, self.memory_threshold)
+            # Component archives expand in the caller, nested ones go to the pool
+            expander.expand(buffer, archive_folder, 1, target if wanted else None, info)
+            return
+
+        if wanted:
+            self._write_file(member, target)
+
+    def _extracting_text(self, file_path: str) -> str:
+        size = self.format_size(os.path.getsize(file_path))
+        return f"Extracting {ColorText.yellow(os.path.basename(file_path))} ({size})"
+
+    def _animation(self, description: str):
+        """Loading animation, or nothing for quiet extractors"""
+        if self.quiet:
+            return contextlib.nullcontext()
+        return loading_animation(description)
+
+    def _extract_members(self, file_path: str, extract_folder: str) -> int:
+        """Extract all members across the worker pool, output matches extractall"""
+        with self._open_archive(file_path) as zip_ref:
+            selected = self._selected_members(zip_ref.infolist())
+            # Create every directory up front so workers never race on makedirs
+            for info in selected:
+                parent = os.path.dirname(_member_path(info.filename))
+                os.makedirs(os.path.join(extract_folder, parent), exist_ok=True)
+                if info.is_dir():
+                    zip_ref.extract(info, extract_folder)
+
+        names = {info.filename for info in selected}
+
+        def extract(zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo) -> None:
+            if info.is_dir() or info.filename not in names:
+                return
+            if self.store is not None:
+                target = Path(extract_folder) / _member_path(info.filename)
+                self._write_member(zip_ref, info, target)
+            else:
+                zip_ref.extract(info, extract_folder)
+                self._count_members([info])
+
+        with self.metrics.span("outer_extract"):
+            self._map_members(file_path, extract)
+        return len(selected)
+
+    def _selected_members(self, infos: List[zipfile.ZipInfo]) -> List[zipfile.ZipInfo]:
+        """Outer members that are selected, or may hold something selected once expanded"""
+        path_filter = self.path_filter
+        if path_filter is None:
+            return infos
+        selected = []
+        for info in infos:
+            name = _member_path(info.filename)
+            if info.is_dir():
+                wanted = path_filter.wants_below(name)
+            else:
+                wanted = path_filter.matches(name) or (
+                    self.max_depth > 0
+                    and not _has_extension(info.filename, self.allowed_extensions)
+                    and path_filter.wants_below(_member_path(_archive_name(info.filename, 0)))
+                )
+            if wanted:
+                selected.append(info)
+        return selected
+
+    def _map_members(
+        self, file_path: str, func: Callable[[zipfile.ZipFile, zipfile.ZipInfo], None]
+    ) -> int:
+        """Run func on every member, largest first, each worker with its own ZipFile handle"""
+        with self._open_archive(file_path) as zip_ref:
+            infos = zip_ref.infolist()
+            if self.workers == 1:
+                for info in infos:
+                    func(zip_ref, info)
+                return len(infos)
+
+        # Longest-processing-time-first keeps the makespan close to optimal
+        infos = sorted(infos, key=lambda info: info.file_size, reverse=True)
+        local = threading.local()
+        handles = []
+        handles_lock = threading.Lock()
+
+        def run(info: zipfile.ZipInfo) -> None:
+            zip_ref = getattr(local, "zip_ref", None)
+            if zip_ref is None:
+                zip_ref = local.zip_ref = self._open_archive(file_path)
+                with handles_lock:
+                    handles.append(zip_ref)
+            func(zip_ref, info)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for future in [pool.submit(run, info) for info in infos]:
+                    future.result()
+        finally:
+            for zip_ref in handles:
+                zip_ref.close()
+        return len(infos)
+
+    def _open_archive(self, file_path: str) -> zipfile.ZipFile:
+        """Open an archive on disk, timing the central directory read"""
+        with self.metrics.span("open"):
+            zip_ref = open_zip(file_path)
+        self.metrics.add("archives_opened")
+        return zip_ref
+
+    def _count_members(self, infos: List[zipfile.ZipInfo]) -> None:
+        """Account for members extracted by zipfile itself"""
+        for info in infos:
+            if not info.is_dir():
+                self.metrics.add("bytes_read", info.compress_size)
+                self.metrics.add("bytes_written", info.file_size)
+
+    def _create_expander(
+        self, manifest: Optional[ExtractionManifest] = None, root: Optional[str] = None
+    ) -> "ArchiveExpander":
+        """Expander writing below root, which the path patterns are relative to"""
+        return ArchiveExpander(
+            self._is_archive_member,
+            self._open_nested,
+            self._write_file,
+            workers=self.workers,
+            max_depth=self.max_depth,
+            manifest=manifest,
+            write_member=self._write_member,
+            metrics=self.metrics,
+            select=self._selector(root),
+        )
+
+    def _selector(self, root: Optional[str]) -> Optional[Callable[[Path, bool], bool]]:
+        """Match paths below root against the patterns, None selects everything"""
+        path_filter = self.path_filter
+        if path_filter is None or root is None:
+            return None
+        root = Path(root)
+
+        def select(path: Path, below: bool) -> bool:
+            name = path.relative_to(root).as_posix()
+            return path_filter.wants_below(name) if below else path_filter.matches(name)
+
+        return select
+
+    def _is_archive_member(
+        self, zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, depth: int
+    ) -> bool:
+        """Members are archives when their content is a zip, whitelisted types stay packed"""
+        if _has_extension(info.filename, self.allowed_extensions):
+            return False
+        return self.sniffer.sniff(zip_ref, info) == "zip"
+
+    def _open_nested(self, zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo) -> IO[bytes]:
+        self.metrics.add("bytes_read", info.compress_size)
+        return open_member_archive(zip_ref, info, self.memory_threshold)
+
+    def _write_member(self, zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, target: Path) -> None:
+        """Write a leaf member, through the dedupe store when one is configured"""
+        self.metrics.add("bytes_read", info.compress_size)
+        if self.store is not None and info.file_size >= self.store.min_size:
+            if not self.store.materialize(lambda: zip_ref.open(info), target, info.CRC, info.file_size):
+                self.metrics.add("bytes_written", info.file_size)
+            return
+        with zip_ref.open(info) as source:
+            self._write_file(source, target)
+
+    def _write_file(self, source, target: Path) -> None:
+        """Copy a member stream to its final location, as a new file"""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            dest = open(target, "xb")
+        except FileExistsError:
+            # Never write through an existing file, it may be a hardlink shared with the
+            # store or the cache that other themes see too
+            target.unlink()
+            dest = open(target, "xb")
+        with dest:
+            shutil.copyfileobj(source, dest, COPY_BUFSIZE)
+            self.metrics.add("bytes_written", dest.tell())
+
+    def process_files(self, folder: str, expand: bool = True) -> None:
+        """Process files after extraction in a single pass over the tree"""
+        with self._animation(f"Processing {ColorText.yellow(os.path.basename(folder))}"):
+            # The walker removes empty folders and sums sizes in the same pass
+            if not expand:
+                with self.metrics.span("cleanup"), self.metrics.span("size"):
+                    self.stats["extracted_size"] = scan_tree(folder, remove_empty=True)
+                return
+
+            archives = []
+            select = self._selector(folder)
+            with self.metrics.span("classify"):
+                size = scan_tree(
+                    folder, lambda entry: self._classify_file(entry, archives, select), remove_empty=True
+                )
+            with self._create_expander(root=folder) as expander:
+                for file_path in archives:
+                    expander.submit(file_path, file_path.with_suffix(""), 1)
+
+            # Only the freshly expanded folders still need cleanup and sizing
+            with self.metrics.span("cleanup"), self.metrics.span("size"):
+                for file_path in archives:
+                    archive_folder = file_path.with_suffix("")
+                    if archive_folder.is_dir():
+                        size += scan_tree(str(archive_folder), remove_empty=True)
+                    if file_path.exists():
+                        size += file_path.stat().st_size
+            self.stats["extracted_size"] = size
 
     def calculate_folder_size(self, folder: str) -> int:
         """Calculate total folder size"""
-        total_size = 0
-        for dirpath, _, filenames in os.walk(folder):
-            for f in filenames:
-                fp = os.path.join(dirpath, f)
-                total_size += os.path.getsize(fp)
-        return total_size
-
-    def _add_zip_extension_to_files(self, folder: str) -> None:
-        """Add .zip extension to files that are not allowed extensions"""
-        for file_path in Path(folder).rglob("*"):
-            if file_path.is_file() and file_path.suffix not in self.allowed_extensions:
-                new_path = file_path.with_suffix(file_path.suffix + ".zip")
-                file_path.rename(new_path)
-
-    def _unzip_files_to_folders(self, folder: str) -> None:
-        """Extract .zip files to their respective folders"""
-        for file_path in Path(folder).rglob("*.zip"):
-            if file_path.is_file():
-                folder_path = file_path.with_suffix("")
-                folder_path.mkdir(exist_ok=True)
-
-                try:
-                    with zipfile.ZipFile(file_path, "r") as zip_ref:
-                        zip_ref.extractall(folder_path)
-                    file_path.unlink()
-                except Exception:
-                    continue
+        with self.metrics.span("size"):
+            return scan_tree(folder)
 
-    def _cleanup_empty_folders(self, folder: str) -> None:
-        """Remove empty folders"""
-        for dirpath, dirnames, filenames in os.walk(folder, topdown=False):
-            if not dirnames and not filenames:
-                try:
-                    os.rmdir(dirpath)
-                except OSError:
-                    continue
+    def _classify_file(
+        self,
+        entry: os.DirEntry,
+        archives: List[Path],
+        select: Optional[Callable[[Path, bool], bool]] = None,
+    ) -> bool:
+        """Give zip content a .zip extension and collect archives, False if collected or removed"""
+        if (
+            not _has_extension(entry.name, self.allowed_extensions)
+            and self.sniffer.sniff_file(entry.path) == "zip"
+        ):
+            file_path = Path(entry.path + ".zip")
+            os.rename(entry.path, file_path)
+        elif entry.name.endswith(".zip"):
+            file_path = Path(entry.path)
+        else:
+            if select is not None and not select(Path(entry.path), False):
+                os.unlink(entry.path)
+                return False
+            return True
+        if select is not None and not select(file_path.with_suffix(""), True):
+            file_path.unlink()
+            return False
+        archives.append(file_path)
+        return False
 
     def show_completion(self, extract_folder: str):
         """Display completion message with statistics"""
-        os.system("cls" if os.name == "nt" else "clear")
+        clear_screen()
         completion_time = time.time() - self.stats["start_time"]
         expansion_ratio = (
             (self.stats["extracted_size"] / self.stats["total_size"]) * 100
@@ -330,10 +1683,202 @@ class MTZExtractor:
             f"├─ Final size: {ColorText.yellow(self.format_size(self.stats['extracted_size']))}"
         )
         print(f"├─ Expansion ratio: {ColorText.yellow(f'{expansion_ratio:.1f}%')}")
+        if self.cache is not None:
+            cache_result = "hit" if self.stats["cache_hit"] else "miss"
+            print(f"├─ Cache: {ColorText.yellow(cache_result)}")
+        if self.store is not None:
+            print(f"├─ Deduplicated: {ColorText.yellow(self.format_size(self.store.stats['bytes_saved']))}")
+        if self.incremental:
+            print(f"├─ Unchanged files: {ColorText.yellow(str(self.stats['unchanged_files']))}")
+            print(f"├─ Removed files: {ColorText.yellow(str(self.stats['removed_files']))}")
         print(f"├─ Processing time: {ColorText.yellow(f'{completion_time:.1f} seconds')}")
         print(f"└─ Location: {ColorText.yellow(extract_folder)}\n")
 
 
+def _member_path(name: str) -> str:
+    """Sanitize an archive member name the same way ZipFile.extract does"""
+    arcname = name.replace("/", os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    invalid_path_parts = ("", os.path.curdir, os.path.pardir)
+    arcname = os.path.sep.join(
+        part for part in arcname.split(os.path.sep) if part not in invalid_path_parts
+    )
+    if os.path.sep == "\\":
+        arcname = zipfile.ZipFile._sanitize_windows_name(arcname, os.path.sep)
+    return arcname
+
+
+def format_size(size: int) -> str:
+    """Format file size in readable format"""
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.2f} {unit}"
+        size /= 1024
+    return f"{size:.2f} TB"
+
+
+def _has_extension(name: str, extensions: Set[str]) -> bool:
+    """Case-insensitive suffix check against an extension set"""
+    suffix = Path(name).suffix.lower()
+    return any(suffix == ext.lower() for ext in extensions)
+
+
+def _archive_name(name: str, depth: int) -> str:
+    """Folder name of an expanded archive, nested .zip files lose their suffix"""
+    if depth > 0 and name.lower().endswith(".zip"):
+        return name[:-4]
+    return name
+
+
+def _find_member(zip_ref: zipfile.ZipFile, name: str) -> Optional[zipfile.ZipInfo]:
+    try:
+        return zip_ref.getinfo(name)
+    except KeyError:
+        return None
+
+
+def buffer_member(
+    zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, memory_threshold: int = DEFAULT_MEMORY_THRESHOLD
+) -> IO[bytes]:
+    """Buffer a member in memory, spilling to a temp file above the threshold"""
+    with zip_ref.open(info) as source:
+        return spool(source, memory_threshold)
+
+
+class _SpooledFile(tempfile.SpooledTemporaryFile):
+    """SpooledTemporaryFile only has seekable() from Python 3.11 on, ZipFile needs it"""
+
+    def seekable(self) -> bool:
+        return True
+
+
+def spool(source: IO[bytes], memory_threshold: int = DEFAULT_MEMORY_THRESHOLD) -> IO[bytes]:
+    """Copy a stream into memory, spilling to a temp file above the threshold"""
+    if memory_threshold > 0:
+        buffer = _SpooledFile(max_size=memory_threshold)
+    else:
+        buffer = tempfile.TemporaryFile()
+    shutil.copyfileobj(source, buffer, COPY_BUFSIZE)
+    buffer.seek(0)
+    return buffer
+
+
+def open_mapped(file_path: str) -> IO[bytes]:
+    """Memory-map a file for reading, or open it buffered where it cannot be mapped"""
+    with open(file_path, "rb") as f:
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty files, pipes and some special filesystems
+            return open(file_path, "rb")
+    return _MappedFile(mapping, file_path)
+
+
+def open_zip(file_path: str) -> zipfile.ZipFile:
+    """Open an archive on disk through a memory map, closing the map with the archive"""
+    return _owning_zip(open_mapped(file_path))
+
+
+def _owning_zip(fileobj: IO[bytes]) -> zipfile.ZipFile:
+    """ZipFile that closes fileobj itself once it and its open members are closed"""
+    try:
+        zip_ref = zipfile.ZipFile(fileobj, "r")
+    except BaseException:
+        fileobj.close()
+        raise
+    zip_ref._filePassed = 0
+    return zip_ref
+
+
+def member_slice(zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo) -> Optional[_BufferReader]:
+    """Zero-copy view of a STORED member of a memory-mapped archive, None otherwise"""
+    fileobj = zip_ref.fp
+    if (
+        not isinstance(fileobj, _BufferReader)
+        or info.compress_type != zipfile.ZIP_STORED
+        or info.flag_bits & 0x1
+    ):
+        return None
+    header = struct.unpack(LOCAL_HEADER_FORMAT, fileobj.pread(info.header_offset, LOCAL_HEADER_SIZE))
+    start = info.header_offset + LOCAL_HEADER_SIZE + header[10] + header[11]
+    return fileobj.slice(start, info.file_size)
+
+
+def open_member_archive(
+    zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, memory_threshold: int = DEFAULT_MEMORY_THRESHOLD
+) -> IO[bytes]:
+    """Open an inner archive for reading, sliced from the map when possible, else buffered"""
+    view = member_slice(zip_ref, info)
+    if view is not None:
+        return view
+    return buffer_member(zip_ref, info, memory_threshold)
+
+
+def open_member_view(
+    zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, memory_threshold: int = DEFAULT_MEMORY_THRESHOLD
+) -> IO[bytes]:
+    """Open a member for random access without writing it anywhere.
+
+    STORED members are read in place, small compressed members are held in
+    memory and larger ones are streamed, paying a re-decompression on seeks.
+    """
+    view = member_slice(zip_ref, info)
+    if view is not None:
+        return view
+
+    fileobj = zip_ref.fp
+    if (
+        info.compress_type == zipfile.ZIP_STORED
+        and not info.flag_bits & 0x1
+        and fileobj is not None
+        and fileobj.seekable()
+    ):
+        fileobj.seek(info.header_offset)
+        header = struct.unpack(LOCAL_HEADER_FORMAT, fileobj.read(LOCAL_HEADER_SIZE))
+        start = info.header_offset + LOCAL_HEADER_SIZE + header[10] + header[11]
+        return _MemberSlice(fileobj, start, info.file_size)
+
+    if info.file_size <= memory_threshold:
+        with zip_ref.open(info) as source:
+            return io.BytesIO(source.read())
+    return zip_ref.open(info)
+
+
+def _has_size(path: Path, size: int) -> bool:
+    try:
+        return os.path.getsize(path) == size
+    except OSError:
+        return False
+
+
+def copy_tree(source: Path, target: Path) -> Tuple[int, int]:
+    """Copy a folder tree into target, returns (bytes, files)"""
+    size, files = 0, 0
+    for dirpath, _, filenames in os.walk(source):
+        folder = target / os.path.relpath(dirpath, source)
+        folder.mkdir(parents=True, exist_ok=True)
+        for name in filenames:
+            src = os.path.join(dirpath, name)
+            dest = folder / name
+            # Replace rather than overwrite, dest may be a store hardlink
+            if os.path.lexists(dest):
+                dest.unlink()
+            shutil.copy2(src, dest)
+            size += os.path.getsize(src)
+            files += 1
+    return size, files
+
+
+def free_space(path: str) -> int:
+    """Free bytes on the filesystem that holds path, or would hold it"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        path = os.path.dirname(path)
+    return shutil.disk_usage(path).free
+
+
 def get_user_input() -> str:
     """Function to get input from user"""
     return input(
@@ -341,32 +1886,275 @@ def get_user_input() -> str:
     ).strip()
 
 
-def main():
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Extract Xiaomi MIUI .mtz themes")
+    parser.add_argument(
+        "file", nargs="?", help="MTZ file to extract, '-' reads it from stdin, asked for if omitted"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="extraction threads"
+    )
+    parser.add_argument("--store", help="content-addressed store shared across themes")
+    parser.add_argument("--cache", help="cache of finished extractions keyed by MTZ hash")
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+        help="evict least recently used cache entries above this size",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="re-extract into the existing folder, rewriting only changed files",
+    )
+    parser.add_argument(
+        "-p",
+        "--pattern",
+        action="append",
+        help="extract only paths matching this glob (icons/**/*.png), '!' excludes, repeatable",
+    )
+    parser.add_argument("--metrics", help="write per-phase timings and counters to this file")
+    parser.add_argument(
+        "--metrics-format",
+        choices=["json", "prometheus"],
+        default="json",
+        help="format of the --metrics file",
+    )
+    args = parser.parse_args(argv)
+    if args.file == "-" and (args.incremental or args.cache or args.store):
+        parser.error("--incremental, --cache and --store need a file, not stdin")
+    return args
+
+
+def gc_main(argv: List[str]) -> None:
+    """Drop store blobs that no extracted theme references any more"""
+    parser = argparse.ArgumentParser(prog="mtz_extractor.py gc", description=gc_main.__doc__)
+    parser.add_argument("store", help="content-addressed store directory")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.store):
+        print(f"\n{ColorText.red('❌ Store not found!')}")
+        sys.exit(1)
+    removed, freed = BlobStore(args.store).gc()
+    print(f"{ColorText.green('✓')} Removed {removed} blobs, freed {format_size(freed)}")
+
+
+def cache_stats_main(argv: List[str]) -> None:
+    """Show hits, misses and bytes saved by the extraction cache"""
+    parser = argparse.ArgumentParser(prog="mtz_extractor.py cache-stats", description=cache_stats_main.__doc__)
+    parser.add_argument("cache", help="extraction cache directory")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.cache):
+        print(f"\n{ColorText.red('❌ Cache not found!')}")
+        sys.exit(1)
+    stats = ExtractionCache(args.cache).stats()
+    lookups = stats["hits"] + stats["misses"]
+    hit_rate = stats["hits"] / lookups * 100 if lookups else 0
+    print(f"{ColorText.cyan('📊 Cache Statistics:')}")
+    print(f"├─ Hits: {ColorText.yellow(str(stats['hits']))}")
+    print(f"├─ Misses: {ColorText.yellow(str(stats['misses']))}")
+    print(f"├─ Hit rate: {ColorText.yellow(f'{hit_rate:.1f}%')}")
+    print(f"├─ Bytes saved: {ColorText.yellow(format_size(stats['bytes_saved']))}")
+    print(f"├─ Entries: {ColorText.yellow(str(stats['entries']))}")
+    print(f"└─ Size: {ColorText.yellow(format_size(stats['size']))}")
+
+
+def collect_inputs(patterns: List[str]) -> List[str]:
+    """Expand files, directories, globs and '-' (a list on stdin) into MTZ paths"""
+    paths = []
+    for pattern in patterns:
+        if pattern == "-":
+            paths.extend(line.strip() for line in sys.stdin if line.strip())
+        elif os.path.isdir(pattern):
+            paths.extend(str(path) for path in sorted(Path(pattern).rglob("*.mtz")))
+        elif glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            paths.append(pattern)
+    # Overlapping patterns must not extract the same archive twice
+    return list(dict.fromkeys(paths))
+
+
+def _batch_extract(file_path: str, options: dict) -> dict:
+    """Extract one archive in a batch worker and describe the outcome"""
+    started = time.time()
+    result = {"path": file_path, "status": "error", "output": None}
+    # Capture the extractor's messages, stdout carries only result lines
+    with contextlib.redirect_stdout(io.StringIO()) as messages:
+        try:
+            extractor = MTZExtractor(
+                workers=options["workers"],
+                incremental=options["incremental"],
+                store=BlobStore(options["store"]) if options["store"] else None,
+                cache=ExtractionCache(options["cache"], options["cache_max_bytes"]) if options["cache"] else None,
+                patterns=options["patterns"],
+            )
+            if not extractor.validate_mtz_file(file_path):
+                result["status"] = "invalid"
+            else:
+                folder = extractor.create_extract_folder(
+                    file_path, reuse=options["incremental"], base_folder=options["output"]
+                )
+                if folder:
+                    try:
+                        # run() rather than extract(): no log file per job, jobs starting in the
+                        # same second would all write compression_<timestamp>.log
+                        extractor.run(file_path, folder)
+                    except Exception as e:
+                        print(f"Extraction failed: {str(e)}")
+                        with contextlib.suppress(OSError):
+                            os.rmdir(folder)
+                    else:
+                        result.update(
+                            status="ok",
+                            output=folder,
+                            files=extractor.stats["total_files"],
+                            compressed_size=extractor.stats["total_size"],
+                            extracted_size=extractor.stats["extracted_size"],
+                            cache_hit=extractor.stats["cache_hit"],
+                            metrics=extractor.metrics.to_dict(),
+                        )
+        except Exception as e:
+            print(str(e))
+
+    if result["status"] != "ok":
+        lines = ANSI_ESCAPE.sub("", messages.getvalue()).strip().splitlines()
+        result["error"] = lines[-1].strip("❌ ") if lines else result["status"]
+    result["seconds"] = round(time.time() - started, 3)
+    return result
+
+
+def batch_main(argv: List[str]) -> None:
+    """Extract many themes concurrently, printing one JSON result line per archive"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    parser = argparse.ArgumentParser(prog="mtz_extractor.py batch", description=batch_main.__doc__)
+    parser.add_argument(
+        "inputs", nargs="*", help="MTZ files, directories or globs, '-' reads a list from stdin"
+    )
+    parser.add_argument("-o", "--output", default="./extracted", help="base output folder")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1, help="archives extracted at once"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="extraction threads per archive")
+    parser.add_argument("--store", help="content-addressed store shared across themes")
+    parser.add_argument("--cache", help="cache of finished extractions keyed by MTZ hash")
+    parser.add_argument(
+        "--cache-max-mb", type=int, default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024)
+    )
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("-p", "--pattern", action="append", help="include glob, '!' excludes")
+    args = parser.parse_args(argv)
+
+    patterns = args.inputs or (["-"] if not sys.stdin.isatty() else [])
+    paths = collect_inputs(patterns)
+    if not paths:
+        parser.error("no input archives")
+
+    options = {
+        "output": args.output,
+        "workers": args.workers,
+        "store": args.store,
+        "cache": args.cache,
+        "cache_max_bytes": args.cache_max_mb * 1024 * 1024,
+        "incremental": args.incremental,
+        "patterns": args.pattern,
+    }
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = [pool.submit(_batch_extract, path, options) for path in paths]
+        for future in as_completed(futures):
+            result = future.result()
+            failed += result["status"] != "ok"
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+    if failed:
+        sys.exit(1)
+
+
+COMMANDS = {
+    "batch": batch_main,
+    "gc": gc_main,
+    "cache-stats": cache_stats_main,
+}
+
+
+def main(argv: Optional[List[str]] = None):
     """Main function"""
-    os.system("cls" if os.name == "nt" else "clear")
-    extractor = MTZExtractor()
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        COMMANDS[argv[0]](argv[1:])
+        return
+
+    args = parse_args(argv)
+    clear_screen()
+    extractor = MTZExtractor(
+        workers=args.workers,
+        incremental=args.incremental,
+        store=BlobStore(args.store) if args.store else None,
+        cache=ExtractionCache(args.cache, args.cache_max_mb * 1024 * 1024) if args.cache else None,
+        patterns=args.pattern,
+    )
     extractor.print_banner()
 
     try:
-        file_path = get_user_input()
+        file_path = args.file or get_user_input()
+
+        if file_path == "-":
+            # Nothing can be planned ahead, members are written as they arrive
+            extract_folder = extractor.create_extract_folder("stdin.mtz")
+            if not extract_folder:
+                sys.exit(1)
+            print(f"\n{ColorText.cyan('⏳')} Extracting from stdin...\n")
+            if not extractor.extract_stream(sys.stdin.buffer, extract_folder):
+                sys.exit(1)
+            if args.metrics:
+                extractor.metrics.write(args.metrics, args.metrics_format)
+            extractor.show_completion(extract_folder)
+            return
 
         if not extractor.validate_mtz_file(file_path):
             sys.exit(1)
 
-        extract_folder = extractor.create_extract_folder(file_path)
+        # A cache hit is planned from its metadata. An incremental run rewrites only what
+        # changed, so planning would inflate every component just for a rough estimate.
+        cached = extractor.cached_plan(file_path)
+        plan = cached
+        if plan is None and not args.incremental:
+            plan = extractor.plan_extraction(file_path)
+            if not plan:
+                sys.exit(1)
+        if plan is not None and not extractor.check_free_space(plan, "./extracted"):
+            sys.exit(1)
+
+        extract_folder = extractor.create_extract_folder(file_path, reuse=args.incremental)
         if not extract_folder:
             sys.exit(1)
 
-        print(f"\n{ColorText.cyan('⏳')} Starting extraction process...\n")
+        if cached is not None:
+            print(
+                f"\n{ColorText.cyan('⏳')} Restoring from cache... "
+                f"({plan.file_count} files, {extractor.format_size(plan.total_bytes)})\n"
+            )
+        elif plan is not None:
+            print(
+                f"\n{ColorText.cyan('⏳')} Starting extraction process... "
+                f"({plan.file_count} files, {plan.archive_count} archives, "
+                f"{extractor.format_size(plan.total_bytes)})\n"
+            )
+        else:
+            print(f"\n{ColorText.cyan('⏳')} Starting incremental extraction...\n")
 
-        if not extractor.extract_mtz(file_path, extract_folder):
+        if not extractor.extract(file_path, extract_folder):
             sys.exit(1)
+        if args.metrics:
+            extractor.metrics.write(args.metrics, args.metrics_format)
 
-        extractor.process_files(extract_folder)
         extractor.show_completion(extract_folder)
 
     except KeyboardInterrupt:
-        os.system("cls" if os.name == "nt" else "clear")
+        clear_screen()
         print(f"\n{ColorText.yellow('⚠️ Cancelled!')}\n")
         sys.exit(0)
     except Exception as e:
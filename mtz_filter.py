@@ -0,0 +1,86 @@
+from fnmatch import fnmatchcase
+from typing import List, Set, Tuple
+
+
+class PathFilter:
+    """Include and exclude glob patterns over paths inside a theme.
+
+    Patterns are matched against the whole path from the theme root, with
+    inner archives appearing as folders (icons/res/drawable/foo.png). `*`,
+    `?` and `[...]` stay within one path segment, `**` spans any number of
+    segments. A leading `!` makes a pattern exclude. The last pattern that
+    matches a path decides; paths no pattern matches are selected only if
+    every pattern is an exclude.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = list(patterns)
+        self.rules: List[Tuple[bool, List[str]]] = []
+        for pattern in self.patterns:
+            include = not pattern.startswith("!")
+            segments = [segment for segment in pattern.lstrip("!").split("/") if segment]
+            self.rules.append((include, segments))
+        self.has_includes = any(include for include, _ in self.rules)
+
+    def matches(self, path: str) -> bool:
+        """Whether the file at path is selected"""
+        parts = _split(path)
+        selected = not self.has_includes
+        for include, segments in self.rules:
+            if len(segments) in _states(segments, parts):
+                selected = include
+        return selected
+
+    def wants_below(self, path: str) -> bool:
+        """Whether any path below the folder or archive at path can be selected.
+
+        False means the whole subtree can be skipped, e.g. an inner archive
+        that does not need to be opened at all. True may be a false positive.
+        """
+        parts = _split(path)
+        # Walk back from the last pattern, the first one that settles the subtree decides
+        for include, segments in reversed(self.rules):
+            states = _states(segments, parts)
+            if include and any(i < len(segments) for i in states):
+                return True
+            if not include and any(_rest_is_wildcard(segments, i) for i in states):
+                return False
+        return not self.has_includes
+
+
+def _split(path: str) -> List[str]:
+    return [part for part in path.replace("\\", "/").split("/") if part]
+
+
+def _states(segments: List[str], parts: List[str]) -> Set[int]:
+    """Pattern positions reachable after matching parts, `**` may match zero segments"""
+    states = _skip_globstars(segments, {0})
+    for part in parts:
+        following = set()
+        for i in states:
+            if i == len(segments):
+                continue
+            if segments[i] == "**":
+                following.add(i)
+            elif fnmatchcase(part, segments[i]):
+                following.add(i + 1)
+        states = _skip_globstars(segments, following)
+        if not states:
+            break
+    return states
+
+
+def _skip_globstars(segments: List[str], states: Set[int]) -> Set[int]:
+    pending = list(states)
+    while pending:
+        i = pending.pop()
+        if i < len(segments) and segments[i] == "**" and i + 1 not in states:
+            states.add(i + 1)
+            pending.append(i + 1)
+    return states
+
+
+def _rest_is_wildcard(segments: List[str], i: int) -> bool:
+    """Whether segments[i:] is nothing but `**`, so it matches every deeper path"""
+    rest = segments[i:]
+    return bool(rest) and all(segment == "**" for segment in rest)
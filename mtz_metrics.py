@@ -0,0 +1,78 @@
+import json
+import time
+import threading
+import contextlib
+from typing import Dict
+
+
+class Metrics:
+    """Named timing spans and counters for one extraction or packing run.
+
+    Spans accumulate wall time and call count per name. They may nest or run
+    on several threads at once, so span totals can add up to more than the
+    run's wall clock.
+    """
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.spans: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        """Time the enclosed block under name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                span = self.spans.setdefault(name, {"seconds": 0.0, "count": 0})
+                span["seconds"] += elapsed
+                span["count"] += 1
+
+    def add(self, counter: str, value: int = 1) -> None:
+        """Increase a counter such as bytes_read, bytes_written or archives_opened"""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "tool": self.tool,
+                "spans": {name: dict(span) for name, span in self.spans.items()},
+                "counters": dict(self.counters),
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Render in the Prometheus text exposition format"""
+        data = self.to_dict()
+        tool = data["tool"]
+        lines = [
+            "# HELP mtz_span_seconds_total Wall time spent in each phase.",
+            "# TYPE mtz_span_seconds_total counter",
+        ]
+        for name, span in sorted(data["spans"].items()):
+            lines.append(f'mtz_span_seconds_total{{tool="{tool}",span="{name}"}} {span["seconds"]:.6f}')
+        lines += [
+            "# HELP mtz_span_calls_total Number of times each phase ran.",
+            "# TYPE mtz_span_calls_total counter",
+        ]
+        for name, span in sorted(data["spans"].items()):
+            lines.append(f'mtz_span_calls_total{{tool="{tool}",span="{name}"}} {span["count"]}')
+        for name, value in sorted(data["counters"].items()):
+            lines += [
+                f"# TYPE mtz_{name}_total counter",
+                f'mtz_{name}_total{{tool="{tool}"}} {value}',
+            ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str, fmt: str = "json") -> None:
+        """Write the metrics to path as json or prometheus text"""
+        text = self.to_prometheus() if fmt == "prometheus" else self.to_json() + "\n"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
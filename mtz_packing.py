@@ -1,357 +1,1036 @@
-import os
-import zipfile
-import shutil
-import logging
-import time
-import threading
-import sys
-import random
-from typing import Optional, List
-from pathlib import Path
-from itertools import cycle
-import contextlib
-from datetime import datetime
-
-
-class ColorText:
-    """Class untuk menangani warna text di terminal"""
-
-    HEADER = "\033[95m"
-    BLUE = "\033[94m"
-    CYAN = "\033[96m"
-    GREEN = "\033[92m"
-    YELLOW = "\033[93m"
-    RED = "\033[91m"
-    END = "\033[0m"
-    BOLD = "\033[1m"
-    UNDERLINE = "\033[4m"
-
-    @staticmethod
-    def blue(text: str) -> str:
-        return f"{ColorText.BLUE}{text}{ColorText.END}"
-
-    @staticmethod
-    def green(text: str) -> str:
-        return f"{ColorText.GREEN}{text}{ColorText.END}"
-
-    @staticmethod
-    def red(text: str) -> str:
-        return f"{ColorText.RED}{text}{ColorText.END}"
-
-    @staticmethod
-    def yellow(text: str) -> str:
-        return f"{ColorText.YELLOW}{text}{ColorText.END}"
-
-    @staticmethod
-    def cyan(text: str) -> str:
-        return f"{ColorText.CYAN}{text}{ColorText.END}"
-
-    @staticmethod
-    def bold(text: str) -> str:
-        return f"{ColorText.BOLD}{text}{ColorText.END}"
-
-
-class LoadingAnimation:
-    """Class untuk menangani animasi loading di terminal dengan efek smooth"""
-
-    def __init__(self, description: str = "Processing"):
-        self.description = description
-        self.is_running = False
-        self.animation_thread = None
-        self.progress = 0
-        self.animations = {
-            "smooth_bar": [
-                "▰▱▱▱▱▱▱▱▱▱",
-                "▰▰▱▱▱▱▱▱▱▱",
-                "▰▰▰▱▱▱▱▱▱▱",
-                "▰▰▰▰▱▱▱▱▱▱",
-                "▰▰▰▰▰▱▱▱▱▱",
-                "▰▰▰▰▰▰▱▱▱▱",
-                "▰▰▰▰▰▰▰▱▱▱",
-                "▰▰▰▰▰▰▰▰▱▱",
-                "▰▰▰▰▰▰▰▰▰▱",
-                "▰▰▰▰▰▰▰▰▰▰",
-            ],
-            "wave": ["≋", "≈", "≋", "≈", "≋"],
-            "spinner": ["◜", "◠", "◝", "◞", "◡", "◟"],
-            "pulse": ["⣾", "⣽", "⣻", "⢿", "⡿", "⣟", "⣯", "⣷"],
-        }
-        self.colors = [
-            ColorText.BLUE,
-            ColorText.CYAN,
-            ColorText.GREEN,
-            ColorText.YELLOW,
-        ]
-        self.current_color = random.choice(self.colors)
-        self.animation_chars = self.animations["smooth_bar"]
-
-    def start(self):
-        """Memulai animasi loading"""
-        self.is_running = True
-        self.animation_thread = threading.Thread(target=self._animate)
-        self.animation_thread.daemon = True
-        self.animation_thread.start()
-
-    def stop(self):
-        """Menghentikan animasi loading"""
-        self.is_running = False
-        if self.animation_thread:
-            self.animation_thread.join()
-        sys.stdout.write("\r" + " " * (len(self.description) + 30) + "\r")
-        sys.stdout.flush()
-
-    def _animate(self):
-        """Fungsi internal untuk menjalankan animasi dengan efek smooth"""
-        while self.is_running:
-            for frame in self.animation_chars:
-                if not self.is_running:
-                    break
-                animation = f"{self.current_color}{frame}{ColorText.END}"
-                sys.stdout.write(f"\r{animation} {self.description} ")
-                sys.stdout.flush()
-                time.sleep(0.1)
-
-
-@contextlib.contextmanager
-def loading_animation(description: str = "Processing"):
-    """Context manager untuk animasi loading"""
-    spinner = LoadingAnimation(description)
-    spinner.start()
-    try:
-        yield spinner
-    finally:
-        spinner.stop()
-
-
-class MTZCompressor:
-    """Class untuk menangani kompresi file MTZ"""
-
-    def __init__(self):
-        self.setup_logging()
-        self.stats = {
-            "start_time": None,
-            "total_files": 0,
-            "total_size": 0,
-            "compressed_size": 0,
-        }
-
-    def setup_logging(self) -> None:
-        log_folder = Path("logs")
-        log_folder.mkdir(exist_ok=True)
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_file = log_folder / f"compression_{timestamp}.log"
-
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-            handlers=[
-                logging.FileHandler(log_file, mode="w"),
-            ],
-        )
-
-    def print_banner(self):
-        """Menampilkan banner aplikasi"""
-        banner = f"""
-{ColorText.cyan('╔═════════════════════════════════════════╗')}
-{ColorText.cyan('║')}          {ColorText.bold(' MTZ Packing v2.0   ')}           {ColorText.cyan('║')}
-{ColorText.cyan('║')}      {ColorText.yellow('       BY Ryhshall           ')}      {ColorText.cyan('║')}
-{ColorText.cyan('╚═════════════════════════════════════════╝')}
-"""
-        print(banner)
-
-    def validate_folder(self, folder_path: str) -> bool:
-        if not os.path.exists(folder_path):
-            print(f"\n{ColorText.red('❌ Folder tidak ditemukan!')}")
-            return False
-
-        if not os.path.isdir(folder_path):
-            print(f"\n{ColorText.red('❌ Path bukan folder!')}")
-            return False
-
-        return True
-
-    def calculate_size(self, path: str) -> int:
-        """Menghitung ukuran folder/file"""
-        if os.path.isfile(path):
-            return os.path.getsize(path)
-        total = 0
-        for dirpath, _, filenames in os.walk(path):
-            for f in filenames:
-                fp = os.path.join(dirpath, f)
-                total += os.path.getsize(fp)
-        return total
-
-    def format_size(self, size: int) -> str:
-        """Format ukuran file dalam bentuk yang mudah dibaca"""
-        for unit in ["B", "KB", "MB", "GB"]:
-            if size < 1024:
-                return f"{size:.2f} {unit}"
-            size /= 1024
-        return f"{size:.2f} TB"
-
-    def zip_folder(self, folder_path: str) -> Optional[str]:
-        try:
-            folder_size = self.calculate_size(folder_path)
-            with loading_animation(
-                f"Mengompres {ColorText.yellow(os.path.basename(folder_path))} ({self.format_size(folder_size)})"
-            ):
-                zip_path = f"{folder_path}.zip"
-                with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as zipf:
-                    for root, dirs, files in os.walk(folder_path):
-                        if os.path.basename(root) in ["wallpaper", "preview"]:
-                            continue
-
-                        if not files and not dirs:
-                            arcname = os.path.relpath(root, folder_path) + "/"
-                            zipf.write(root, arcname)
-                        else:
-                            for file in files:
-                                file_path = os.path.join(root, file)
-                                arcname = os.path.relpath(file_path, folder_path)
-                                zipf.write(file_path, arcname)
-                                self.stats["total_files"] += 1
-                                self.stats["total_size"] += os.path.getsize(file_path)
-
-            return zip_path
-        except Exception as e:
-            logging.error(f"Error compressing folder: {str(e)}")
-            return None
-
-    def verify_zip(self, zip_path: str) -> bool:
-        with loading_animation(
-            f"Memverifikasi {ColorText.yellow(os.path.basename(zip_path))}"
-        ):
-            try:
-                with zipfile.ZipFile(zip_path, "r") as zipf:
-                    corrupt_file = zipf.testzip()
-                    if corrupt_file is not None:
-                        logging.error(f"File corrupt: {corrupt_file}")
-                        return False
-                    return True
-            except Exception as e:
-                logging.error(f"Error verifying ZIP: {str(e)}")
-                return False
-
-    def remove_zip_extension(self, folder_path: str) -> None:
-        with loading_animation(
-            f"Menghapus ekstensi ZIP dari {ColorText.yellow(os.path.basename(folder_path))}"
-        ):
-            try:
-                folder_path = os.path.abspath(folder_path)
-                for filename in os.listdir(folder_path):
-                    if filename.endswith(".zip"):
-                        old_path = os.path.join(folder_path, filename)
-                        new_path = os.path.join(folder_path, filename[:-4])
-                        os.rename(old_path, new_path)
-                        logging.info(f"Renamed: {old_path} to {new_path}")
-            except Exception as e:
-                logging.error(f"Error removing ZIP extensions: {str(e)}")
-
-    def create_mtz(self, folder_path: str) -> bool:
-        with loading_animation(f"Membuat file {ColorText.yellow('MTZ')}"):
-            try:
-                folder_path = os.path.abspath(folder_path)
-                mtz_path = folder_path + ".mtz"
-
-                with zipfile.ZipFile(mtz_path, "w", zipfile.ZIP_DEFLATED) as zf:
-                    for root, dirs, files in os.walk(folder_path):
-                        for file in files:
-                            full_path = os.path.join(root, file)
-                            rel_path = os.path.relpath(full_path, folder_path)
-                            zf.write(full_path, rel_path)
-                            logging.info(f"Added to MTZ: {rel_path}")
-
-                if os.path.exists(mtz_path):
-                    self.stats["compressed_size"] = os.path.getsize(mtz_path)
-                    shutil.rmtree(folder_path)
-                    return True
-                return False
-            except Exception as e:
-                logging.error(f"Error creating MTZ: {str(e)}")
-                return False
-
-    def show_completion(self, folder_path: str):
-        """Menampilkan pesan selesai dengan statistik"""
-        os.system("cls" if os.name == "nt" else "clear")
-        mtz_path = folder_path + ".mtz"
-
-        completion_time = time.time() - self.stats["start_time"]
-        compression_ratio = (
-            (self.stats["compressed_size"] / self.stats["total_size"]) * 100
-            if self.stats["total_size"] > 0
-            else 0
-        )
-
-        print(f"\n{ColorText.green('✨ Packing Berhasil! ✨')}")
-        print(f"\n{ColorText.cyan('📊 Statistik Packing:')}")
-        print(f"├─ Total file: {ColorText.yellow(str(self.stats['total_files']))}")
-        print(
-            f"├─ Ukuran awal: {ColorText.yellow(self.format_size(self.stats['total_size']))}"
-        )
-        print(
-            f"├─ Ukuran akhir: {ColorText.yellow(self.format_size(self.stats['compressed_size']))}"
-        )
-        print(f"├─ Rasio kompresi: {ColorText.yellow(f'{compression_ratio:.1f}%')}")
-        print(f"├─ Waktu proses: {ColorText.yellow(f'{completion_time:.1f} detik')}")
-        print(f"└─ File MTZ: {ColorText.yellow(mtz_path)}\n")
-
-
-def get_user_input() -> str:
-    """Fungsi untuk mendapatkan input dari user"""
-    return input(
-        f"{ColorText.cyan('📂')} Masukkan alamat folder yang akan dipacking: "
-    ).strip()
-
-
-def main():
-    """Fungsi utama"""
-    os.system("cls" if os.name == "nt" else "clear")
-    compressor = MTZCompressor()
-    compressor.print_banner()
-
-    try:
-        main_folder = get_user_input()
-
-        if not compressor.validate_folder(main_folder):
-            sys.exit(1)
-
-        print(f"\n{ColorText.cyan('🔄')} Memulai proses kompresi...\n")
-        compressor.stats["start_time"] = time.time()
-
-        # Step 1: Kompresi folder ke ZIP
-        for folder in os.listdir(main_folder):
-            folder_path = os.path.join(main_folder, folder)
-
-            if folder in ["wallpaper", "preview"]:
-                logging.info(f"Mengabaikan folder: {folder}")
-                continue
-
-            if os.path.isdir(folder_path):
-                zip_path = compressor.zip_folder(folder_path)
-                if zip_path and compressor.verify_zip(zip_path):
-                    shutil.rmtree(folder_path)
-                    print(f"{ColorText.green('✓')} {folder}")
-                    logging.info(f"Folder berhasil dikompres: {folder}")
-
-        # Step 2: Hapus ekstensi ZIP
-        compressor.remove_zip_extension(main_folder)
-
-        # Step 3: Buat file MTZ
-        if compressor.create_mtz(main_folder):
-            compressor.show_completion(main_folder)
-        else:
-            print(f"\n{ColorText.red('❌ Gagal membuat file MTZ!')}\n")
-            sys.exit(1)
-
-    except KeyboardInterrupt:
-        os.system("cls" if os.name == "nt" else "clear")
-        print(f"\n{ColorText.yellow('⚠️ Dibatalkan!')}\n")
-        sys.exit(0)
-    except Exception as e:
-        print(f"\n{ColorText.red('❌ Error:')} {str(e)}\n")
-        sys.exit(1)
-
-
-if __name__ == "__main__":
-    main()
+import os
+import zipfile
+import shutil
+import logging
+import time
+import threading
+import sys
+import random
+import tempfile
+import argparse
+import io
+import zlib
+import json
+import fnmatch
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, List, Tuple, Union, Dict
+from dataclasses import dataclass
+from pathlib import Path
+import contextlib
+from datetime import datetime
+
+from mtz_metrics import Metrics
+from mtz_walk import scan_tree
+
+
+DEFAULT_MEMORY_THRESHOLD = 64 * 1024 * 1024
+COPY_BUFSIZE = 1024 * 1024
+SKIPPED_FOLDERS = ["wallpaper", "preview"]
+POLICY_SAMPLE_SIZE = 256 * 1024
+COMPRESS_TYPES = {"stored": zipfile.ZIP_STORED, "deflated": zipfile.ZIP_DEFLATED}
+
+
+class ColorText:
+    """Class untuk menangani warna text di terminal"""
+
+    HEADER = "\033[95m"
+    BLUE = "\033[94m"
+    CYAN = "\033[96m"
+    GREEN = "\033[92m"
+    YELLOW = "\033[93m"
+    RED = "\033[91m"
+    END = "\033[0m"
+    BOLD = "\033[1m"
+    UNDERLINE = "\033[4m"
+
+    @staticmethod
+    def blue(text: str) -> str:
+        return f"{ColorText.BLUE}{text}{ColorText.END}"
+
+    @staticmethod
+    def green(text: str) -> str:
+        return f"{ColorText.GREEN}{text}{ColorText.END}"
+
+    @staticmethod
+    def red(text: str) -> str:
+        return f"{ColorText.RED}{text}{ColorText.END}"
+
+    @staticmethod
+    def yellow(text: str) -> str:
+        return f"{ColorText.YELLOW}{text}{ColorText.END}"
+
+    @staticmethod
+    def cyan(text: str) -> str:
+        return f"{ColorText.CYAN}{text}{ColorText.END}"
+
+    @staticmethod
+    def bold(text: str) -> str:
+        return f"{ColorText.BOLD}{text}{ColorText.END}"
+
+
+class LoadingAnimation:
+    """Class untuk menangani animasi loading di terminal dengan efek smooth"""
+
+    def __init__(self, description: str = "Processing"):
+        self.description = description
+        self.is_running = False
+        self.animation_thread = None
+        self.progress = 0
+        self.animations = {
+            "smooth_bar": [
+                "▰▱▱▱▱▱▱▱▱▱",
+                "▰▰▱▱▱▱▱▱▱▱",
+                "▰▰▰▱▱▱▱▱▱▱",
+                "▰▰▰▰▱▱▱▱▱▱",
+                "▰▰▰▰▰▱▱▱▱▱",
+                "▰▰▰▰▰▰▱▱▱▱",
+                "▰▰▰▰▰▰▰▱▱▱",
+                "▰▰▰▰▰▰▰▰▱▱",
+                "▰▰▰▰▰▰▰▰▰▱",
+                "▰▰▰▰▰▰▰▰▰▰",
+            ],
+            "wave": ["≋", "≈", "≋", "≈", "≋"],
+            "spinner": ["◜", "◠", "◝", "◞", "◡", "◟"],
+            "pulse": ["⣾", "⣽", "⣻", "⢿", "⡿", "⣟", "⣯", "⣷"],
+        }
+        self.colors = [
+            ColorText.BLUE,
+            ColorText.CYAN,
+            ColorText.GREEN,
+            ColorText.YELLOW,
+        ]
+        self.current_color = random.choice(self.colors)
+        self.animation_chars = self.animations["smooth_bar"]
+
+    def start(self):
+        """Memulai animasi loading"""
+        self.is_running = True
+        self.animation_thread = threading.Thread(target=self._animate)
+        self.animation_thread.daemon = True
+        self.animation_thread.start()
+
+    def stop(self):
+        """Menghentikan animasi loading"""
+        self.is_running = False
+        if self.animation_thread:
+            self.animation_thread.join()
+        sys.stdout.write("\r" + " " * (len(self.description) + 30) + "\r")
+        sys.stdout.flush()
+
+    def _animate(self):
+        """Fungsi internal untuk menjalankan animasi dengan efek smooth"""
+        while self.is_running:
+            for frame in self.animation_chars:
+                if not self.is_running:
+                    break
+                animation = f"{self.current_color}{frame}{ColorText.END}"
+                sys.stdout.write(f"\r{animation} {self.description} ")
+                sys.stdout.flush()
+                time.sleep(0.1)
+
+
+@contextlib.contextmanager
+def loading_animation(description: str = "Processing"):
+    """Context manager untuk animasi loading"""
+    spinner = LoadingAnimation(description)
+    spinner.start()
+    try:
+        yield spinner
+    finally:
+        spinner.stop()
+
+
+@dataclass
+class CompressionRule:
+    """Aturan kompresi: pola nama file (opsional per komponen) -> metode kompresi"""
+
+    name: str
+    patterns: List[str]
+    compress_type: int
+    component: Optional[str] = None
+
+    def matches(self, arcname: str, component: Optional[str]) -> bool:
+        if self.component is not None and self.component != component:
+            return False
+        filename = os.path.basename(arcname.rstrip("/")).lower()
+        return any(fnmatch.fnmatchcase(filename, pattern) for pattern in self.patterns)
+
+
+DEFAULT_COMPRESSION_RULES = [
+    CompressionRule(
+        "media",
+        ["*.png", "*.jpg", "*.jpeg", "*.webp", "*.gif", "*.mp3", "*.ogg", "*.m4a", "*.aac", "*.mp4", "*.webm", "*.zip"],
+        zipfile.ZIP_STORED,
+    ),
+    CompressionRule(
+        "text",
+        ["*.xml", "*.txt", "*.json", "*.css", "*.js", "*.html", "*.htm", "*.svg", "*.properties"],
+        zipfile.ZIP_DEFLATED,
+    ),
+]
+
+
+class PolicyReport:
+    """Ringkasan per aturan: jumlah file, byte dan waktu CPU yang dihemat.
+
+    Penghematan dihitung terhadap metode bawaan arsip (STORED untuk arsip
+    komponen, DEFLATED untuk MTZ). Biaya DEFLATE yang dilewati diperkirakan
+    dari sampel awal file.
+    """
+
+    def __init__(self):
+        self.rules: Dict[str, Dict[str, float]] = {}
+
+    def record(
+        self,
+        rule: str,
+        file_path: str,
+        file_size: int,
+        compress_size: int,
+        seconds: float,
+        compress_type: int,
+        baseline: int,
+    ) -> None:
+        bytes_saved, seconds_saved = 0, 0.0
+        if compress_type != baseline:
+            if baseline == zipfile.ZIP_STORED:
+                bytes_saved, seconds_saved = file_size - compress_size, -seconds
+            else:
+                estimated_size, estimated_seconds = _estimate_deflate(file_path, file_size)
+                bytes_saved = estimated_size - compress_size
+                seconds_saved = estimated_seconds - seconds
+
+        row = self.rules.setdefault(rule, {"files": 0, "bytes_saved": 0, "seconds_saved": 0.0})
+        row["files"] += 1
+        row["bytes_saved"] += bytes_saved
+        row["seconds_saved"] += seconds_saved
+
+    def merge(self, other: "PolicyReport") -> None:
+        for rule, other_row in other.rules.items():
+            row = self.rules.setdefault(rule, {"files": 0, "bytes_saved": 0, "seconds_saved": 0.0})
+            for key, value in other_row.items():
+                row[key] += value
+
+
+class CompressionPolicy:
+    """Memilih metode kompresi per file berdasarkan daftar aturan"""
+
+    def __init__(self, rules: Optional[List[CompressionRule]] = None):
+        self.rules = list(DEFAULT_COMPRESSION_RULES if rules is None else rules)
+
+    @classmethod
+    def load(cls, path: str) -> "CompressionPolicy":
+        """Membaca aturan tambahan dari file JSON, didahulukan dari aturan bawaan.
+
+        Format: [{"name": "...", "patterns": ["*.xml"], "compress": "stored",
+        "component": "icons"}], dengan "component" opsional.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        rules = [
+            CompressionRule(
+                entry["name"],
+                [pattern.lower() for pattern in entry["patterns"]],
+                COMPRESS_TYPES[entry["compress"]],
+                entry.get("component"),
+            )
+            for entry in entries
+        ]
+        return cls(rules + DEFAULT_COMPRESSION_RULES)
+
+    def choose(self, arcname: str, component: Optional[str] = None) -> Optional[CompressionRule]:
+        for rule in self.rules:
+            if rule.matches(arcname, component):
+                return rule
+        return None
+
+    def write(
+        self,
+        zipf: zipfile.ZipFile,
+        file_path: str,
+        arcname: str,
+        component: Optional[str],
+        report: PolicyReport,
+    ) -> None:
+        """Menulis satu file ke arsip sesuai aturan yang cocok"""
+        rule = self.choose(arcname, component)
+        compress_type = rule.compress_type if rule else zipf.compression
+        start = time.process_time()
+        zipf.write(file_path, arcname, compress_type=compress_type)
+        seconds = time.process_time() - start
+
+        zinfo = zipf.filelist[-1]
+        report.record(
+            rule.name if rule else "default",
+            file_path,
+            zinfo.file_size,
+            zinfo.compress_size,
+            seconds,
+            compress_type,
+            zipf.compression,
+        )
+
+
+class MTZCompressor:
+    """Class untuk menangani kompresi file MTZ"""
+
+    def __init__(
+        self,
+        memory_threshold: int = DEFAULT_MEMORY_THRESHOLD,
+        policy: Optional[CompressionPolicy] = None,
+    ):
+        self.memory_threshold = memory_threshold
+        self.policy = policy or CompressionPolicy()
+        self.report = PolicyReport()
+        # CRC dan ukuran tiap entri yang dicatat saat menulis, per path arsip
+        self.written: Dict[str, Dict[str, Tuple[int, int, int]]] = {}
+        self.metrics = Metrics("pack")
+        # File log baru dibuat oleh CLI, pemakai library (daemon, bench) tidak menulis logs/
+        self.log_file: Optional[Path] = None
+        self.stats = {
+            "start_time": None,
+            "total_files": 0,
+            "total_size": 0,
+            "compressed_size": 0,
+        }
+
+    def setup_logging(self) -> None:
+        """Siapkan file log, sekali per compressor"""
+        if self.log_file is not None:
+            return
+        log_folder = Path("logs")
+        log_folder.mkdir(exist_ok=True)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        log_file = self.log_file = log_folder / f"compression_{timestamp}.log"
+
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(levelname)s - %(message)s",
+            handlers=[
+                logging.FileHandler(log_file, mode="w"),
+            ],
+        )
+
+    def print_banner(self):
+        """Menampilkan banner aplikasi"""
+        banner = f"""
+{ColorText.cyan('╔═════════════════════════════════════════╗')}
+{ColorText.cyan('║')}          {ColorText.bold(' MTZ Packing v2.0   ')}           {ColorText.cyan('║')}
+{ColorText.cyan('║')}      {ColorText.yellow('       BY Ryhshall           ')}      {ColorText.cyan('║')}
+{ColorText.cyan('╚═════════════════════════════════════════╝')}
+"""
+        print(banner)
+
+    def validate_folder(self, folder_path: str) -> bool:
+        with self.metrics.span("validate"):
+            if not os.path.exists(folder_path):
+                print(f"\n{ColorText.red('❌ Folder tidak ditemukan!')}")
+                return False
+
+            if not os.path.isdir(folder_path):
+                print(f"\n{ColorText.red('❌ Path bukan folder!')}")
+                return False
+
+            return True
+
+    def calculate_size(self, path: str) -> int:
+        """Menghitung ukuran folder/file"""
+        return calculate_size(path)
+
+    def format_size(self, size: int) -> str:
+        """Format ukuran file dalam bentuk yang mudah dibaca"""
+        for unit in ["B", "KB", "MB", "GB"]:
+            if size < 1024:
+                return f"{size:.2f} {unit}"
+            size /= 1024
+        return f"{size:.2f} TB"
+
+    def zip_folder(self, folder_path: str) -> Optional[str]:
+        try:
+            folder_size = self.calculate_size(folder_path)
+            with loading_animation(
+                f"Mengompres {ColorText.yellow(os.path.basename(folder_path))} ({self.format_size(folder_size)})"
+            ), self.metrics.span("zip"):
+                zip_path = f"{folder_path}.zip"
+                with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as zipf:
+                    self._add_stats(write_component(zipf, folder_path, self.policy, self.report))
+                self._record_written(zip_path, _written_entries(zipf))
+
+            return zip_path
+        except Exception as e:
+            logging.error(f"Error compressing folder: {str(e)}")
+            return None
+
+    def zip_folders(self, folder_paths: List[str], jobs: int) -> List[Optional[str]]:
+        """Mengompres beberapa folder sekaligus di process pool"""
+        with loading_animation(
+            f"Mengompres {ColorText.yellow(str(len(folder_paths)))} folder"
+        ), self.metrics.span("zip"):
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(
+                    pool.map(_zip_folder_job, folder_paths, [self.policy] * len(folder_paths))
+                )
+
+        # Statistik dijumlahkan di sini, worker tidak menyentuh self.stats
+        zip_paths = []
+        for zip_path, files, size, report, entries in results:
+            if zip_path:
+                self._add_stats((files, size))
+                self.report.merge(report)
+                self._record_written(zip_path, entries)
+            zip_paths.append(zip_path)
+        return zip_paths
+
+    def _record_written(self, zip_path: str, entries: Dict[str, Tuple[int, int, int]]) -> None:
+        """Mencatat entri arsip yang baru ditulis untuk verifikasi dan metrik"""
+        self.written[zip_path] = entries
+        self.metrics.add("bytes_read", sum(file_size for _, file_size, _ in entries.values()))
+        self.metrics.add("bytes_written", os.path.getsize(zip_path))
+
+    def _add_stats(self, counts: Tuple[int, int]) -> None:
+        files, size = counts
+        self.stats["total_files"] += files
+        self.stats["total_size"] += size
+
+    def pack_streaming(
+        self, folder_path: str, jobs: int = 1, full_verify: bool = False
+    ) -> Optional[str]:
+        """Membuat file MTZ dalam satu kali jalan tanpa menghapus folder sumber.
+
+        Setiap komponen dibangun di buffer memori (dipindah ke file sementara
+        jika melebihi memory_threshold) lalu langsung dialirkan ke file MTZ.
+        Dengan jobs > 1 komponen dibangun dan dikompres paralel di process
+        pool, urutan isi MTZ tetap sama.
+        """
+        try:
+            folder_path = os.path.abspath(folder_path)
+            mtz_path = folder_path + ".mtz"
+
+            entries = []
+            for name in sorted(os.listdir(folder_path)):
+                entry_path = os.path.join(folder_path, name)
+                if os.path.isdir(entry_path) and name not in SKIPPED_FOLDERS:
+                    entries.append((entry_path, name, True))
+                elif os.path.isdir(entry_path):
+                    for root, _, files in os.walk(entry_path):
+                        for file in files:
+                            full_path = os.path.join(root, file)
+                            entries.append((full_path, os.path.relpath(full_path, folder_path), False))
+                else:
+                    entries.append((entry_path, name, False))
+
+            with self.metrics.span("mtz"):
+                with zipfile.ZipFile(mtz_path, "w", zipfile.ZIP_DEFLATED) as mtz:
+                    if jobs > 1:
+                        self._write_deflated(mtz, entries, jobs)
+                    else:
+                        for source_path, arcname, component in entries:
+                            if component:
+                                with loading_animation(
+                                    f"Mengompres {ColorText.yellow(arcname)} ({self.format_size(self.calculate_size(source_path))})"
+                                ):
+                                    with self._build_component(source_path) as buffer:
+                                        self._add_buffer(mtz, buffer, arcname, source_path)
+                                print(f"{ColorText.green('✓')} {arcname}")
+                                logging.info(f"Folder berhasil dikompres: {arcname}")
+                            else:
+                                self.policy.write(
+                                    mtz, source_path, arcname, _component_of(arcname), self.report
+                                )
+                            logging.info(f"Added to MTZ: {arcname}")
+                self._record_written(mtz_path, _written_entries(mtz))
+
+            if not self.verify_zip(mtz_path, full_verify, jobs):
+                return None
+            self.stats["compressed_size"] = os.path.getsize(mtz_path)
+            return mtz_path
+        except Exception as e:
+            logging.error(f"Error creating MTZ: {str(e)}")
+            return None
+
+    def _build_component(self, folder_path: str):
+        """Membangun arsip komponen di buffer memori"""
+        if self.memory_threshold > 0:
+            buffer = tempfile.SpooledTemporaryFile(max_size=self.memory_threshold)
+        else:
+            buffer = tempfile.TemporaryFile()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zipf:
+            self._add_stats(write_component(zipf, folder_path, self.policy, self.report))
+        buffer.seek(0)
+        return buffer
+
+    def _add_buffer(self, mtz: zipfile.ZipFile, buffer, arcname: str, source_path: str) -> None:
+        """Mengalirkan isi buffer ke file MTZ sebagai satu entri"""
+        buffer.seek(0, os.SEEK_END)
+        zinfo = _component_info(arcname, source_path)
+        zinfo.file_size = buffer.tell()
+        buffer.seek(0)
+        with mtz.open(zinfo, "w") as dest:
+            shutil.copyfileobj(buffer, dest, COPY_BUFSIZE)
+
+    def _write_deflated(
+        self, mtz: zipfile.ZipFile, entries: List[Tuple[str, str, bool]], jobs: int
+    ) -> None:
+        """Mengompres entri di process pool lalu menulis hasilnya sesuai urutan.
+
+        entries berisi (path sumber, nama di arsip, komponen?). Folder komponen
+        dibangun jadi arsip STORED dulu oleh worker sebelum dikompres.
+        """
+        tmp_dir = tempfile.mkdtemp(prefix="mtz_pack_")
+        try:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = []
+                for source_path, arcname, component in entries:
+                    if component:
+                        futures.append(
+                            pool.submit(
+                                _build_component_job,
+                                source_path,
+                                tmp_dir,
+                                self.memory_threshold,
+                                self.policy,
+                            )
+                        )
+                        continue
+
+                    rule = self.policy.choose(arcname, _component_of(arcname))
+                    if rule and rule.compress_type == zipfile.ZIP_STORED:
+                        # Tidak ada yang perlu dikompres, ditulis langsung nanti
+                        futures.append(None)
+                    else:
+                        futures.append(
+                            pool.submit(_deflate_job, source_path, tmp_dir, self.memory_threshold)
+                        )
+
+                # Satu animasi untuk semua entri, menghentikan animasi butuh ~0.1 detik
+                with loading_animation(f"Membuat file {ColorText.yellow('MTZ')}"):
+                    done = self._write_results(mtz, entries, futures)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        for arcname in done:
+            print(f"{ColorText.green('✓')} {arcname}")
+
+    def _write_results(
+        self, mtz: zipfile.ZipFile, entries: List[Tuple[str, str, bool]], futures: list
+    ) -> List[str]:
+        """Menulis hasil worker ke MTZ sesuai urutan, mengembalikan nama komponen"""
+        done = []
+        for (source_path, arcname, component), future in zip(entries, futures):
+            if future is None:
+                self.policy.write(
+                    mtz, source_path, arcname, _component_of(arcname), self.report
+                )
+            elif component:
+                raw, files, size, report = future.result()
+                self._add_stats((files, size))
+                self.report.merge(report)
+                write_raw(mtz, _component_info(arcname, source_path), raw)
+            else:
+                raw, seconds = future.result()
+                rule = self.policy.choose(arcname, _component_of(arcname))
+                zinfo = zipfile.ZipInfo.from_file(source_path, arcname)
+                write_raw(mtz, zinfo, raw)
+                self.report.record(
+                    rule.name if rule else "default",
+                    source_path,
+                    zinfo.file_size,
+                    zinfo.compress_size,
+                    seconds,
+                    zipfile.ZIP_DEFLATED,
+                    mtz.compression,
+                )
+            if component:
+                done.append(arcname)
+                logging.info(f"Folder berhasil dikompres: {arcname}")
+            logging.info(f"Added to MTZ: {arcname}")
+        return done
+
+    def verify_zip(self, zip_path: str, full: bool = False, jobs: int = 1) -> bool:
+        """Memverifikasi arsip yang baru ditulis.
+
+        Tanpa membaca ulang data: CRC dan ukuran yang dicatat saat menulis
+        dibandingkan dengan central directory. full=True juga mendekompresi
+        semua entri, dibagi ke beberapa proses. Arsip tanpa catatan diperiksa
+        dengan testzip seperti dulu.
+        """
+        with loading_animation(
+            f"Memverifikasi {ColorText.yellow(os.path.basename(zip_path))}"
+        ), self.metrics.span("verify"):
+            try:
+                expected = self.written.get(zip_path)
+                self.metrics.add("archives_opened")
+                with zipfile.ZipFile(zip_path, "r") as zipf:
+                    if expected is not None:
+                        mismatch = _compare_entries(expected, _written_entries(zipf))
+                        if mismatch is not None:
+                            logging.error(f"Entri tidak cocok dengan central directory: {mismatch}")
+                            return False
+                    elif not full:
+                        corrupt_file = zipf.testzip()
+                        if corrupt_file is not None:
+                            logging.error(f"File corrupt: {corrupt_file}")
+                            return False
+                    infos = zipf.infolist()
+
+                if full:
+                    corrupt_file = _test_members(zip_path, infos, jobs)
+                    if corrupt_file is not None:
+                        logging.error(f"File corrupt: {corrupt_file}")
+                        return False
+                return True
+            except Exception as e:
+                logging.error(f"Error verifying ZIP: {str(e)}")
+                return False
+
+    def remove_zip_extension(self, folder_path: str) -> None:
+        with loading_animation(
+            f"Menghapus ekstensi ZIP dari {ColorText.yellow(os.path.basename(folder_path))}"
+        ):
+            try:
+                folder_path = os.path.abspath(folder_path)
+                for filename in os.listdir(folder_path):
+                    if filename.endswith(".zip"):
+                        old_path = os.path.join(folder_path, filename)
+                        new_path = os.path.join(folder_path, filename[:-4])
+                        os.rename(old_path, new_path)
+                        logging.info(f"Renamed: {old_path} to {new_path}")
+            except Exception as e:
+                logging.error(f"Error removing ZIP extensions: {str(e)}")
+
+    def create_mtz(self, folder_path: str, jobs: int = 1, full_verify: bool = False) -> bool:
+        try:
+            folder_path = os.path.abspath(folder_path)
+            mtz_path = folder_path + ".mtz"
+
+            with self.metrics.span("mtz"):
+                if jobs > 1:
+                    # Kompresi DEFLATE dibagi ke beberapa proses
+                    entries = []
+                    for root, dirs, files in os.walk(folder_path):
+                        for file in files:
+                            full_path = os.path.join(root, file)
+                            entries.append((full_path, os.path.relpath(full_path, folder_path), False))
+
+                    with zipfile.ZipFile(mtz_path, "w", zipfile.ZIP_DEFLATED) as zf:
+                        self._write_deflated(zf, entries, jobs)
+                else:
+                    with loading_animation(f"Membuat file {ColorText.yellow('MTZ')}"):
+                        with zipfile.ZipFile(mtz_path, "w", zipfile.ZIP_DEFLATED) as zf:
+                            for root, dirs, files in os.walk(folder_path):
+                                for file in files:
+                                    full_path = os.path.join(root, file)
+                                    rel_path = os.path.relpath(full_path, folder_path)
+                                    self.policy.write(
+                                        zf, full_path, rel_path, _component_of(rel_path), self.report
+                                    )
+                                    logging.info(f"Added to MTZ: {rel_path}")
+                self._record_written(mtz_path, _written_entries(zf))
+
+            if os.path.exists(mtz_path) and self.verify_zip(mtz_path, full_verify, jobs):
+                self.stats["compressed_size"] = os.path.getsize(mtz_path)
+                shutil.rmtree(folder_path)
+                return True
+            return False
+        except Exception as e:
+            logging.error(f"Error creating MTZ: {str(e)}")
+            return False
+
+    def show_completion(self, folder_path: str):
+        """Menampilkan pesan selesai dengan statistik"""
+        os.system("cls" if os.name == "nt" else "clear")
+        mtz_path = folder_path + ".mtz"
+
+        completion_time = time.time() - self.stats["start_time"]
+        compression_ratio = (
+            (self.stats["compressed_size"] / self.stats["total_size"]) * 100
+            if self.stats["total_size"] > 0
+            else 0
+        )
+
+        print(f"\n{ColorText.green('✨ Packing Berhasil! ✨')}")
+        print(f"\n{ColorText.cyan('📊 Statistik Packing:')}")
+        print(f"├─ Total file: {ColorText.yellow(str(self.stats['total_files']))}")
+        print(
+            f"├─ Ukuran awal: {ColorText.yellow(self.format_size(self.stats['total_size']))}"
+        )
+        print(
+            f"├─ Ukuran akhir: {ColorText.yellow(self.format_size(self.stats['compressed_size']))}"
+        )
+        print(f"├─ Rasio kompresi: {ColorText.yellow(f'{compression_ratio:.1f}%')}")
+        print(f"├─ Waktu proses: {ColorText.yellow(f'{completion_time:.1f} detik')}")
+        print(f"└─ File MTZ: {ColorText.yellow(mtz_path)}\n")
+
+        if self.report.rules:
+            print(f"{ColorText.cyan('🗜️ Kebijakan Kompresi:')}")
+            rules = sorted(self.report.rules.items())
+            for index, (rule, row) in enumerate(rules):
+                branch = "└─" if index == len(rules) - 1 else "├─"
+                bytes_saved = row["bytes_saved"]
+                size_text = self.format_size(abs(bytes_saved))
+                if bytes_saved < 0:
+                    size_text = f"-{size_text}"
+                cpu_text = f"{row['seconds_saved']:+.2f} detik"
+                print(
+                    f"{branch} {rule}: {ColorText.yellow(str(row['files']))} file, "
+                    f"hemat {ColorText.yellow(size_text)}, CPU {ColorText.yellow(cpu_text)}"
+                )
+                logging.info(
+                    f"Aturan {rule}: {row['files']} file, hemat {bytes_saved} byte, "
+                    f"{row['seconds_saved']:+.3f} detik CPU"
+                )
+            print()
+
+
+def calculate_size(path: str) -> int:
+    """Menghitung ukuran folder/file"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return scan_tree(path)
+
+
+def write_component(
+    zipf: zipfile.ZipFile,
+    folder_path: str,
+    policy: CompressionPolicy,
+    report: PolicyReport,
+) -> Tuple[int, int]:
+    """Menulis isi folder komponen ke dalam arsip, mengembalikan (jumlah file, ukuran)"""
+    component = os.path.basename(folder_path)
+    total_files, total_size = 0, 0
+    for root, dirs, files in os.walk(folder_path):
+        if os.path.basename(root) in SKIPPED_FOLDERS:
+            continue
+
+        if not files and not dirs:
+            arcname = os.path.relpath(root, folder_path) + "/"
+            zipf.write(root, arcname)
+        else:
+            for file in files:
+                file_path = os.path.join(root, file)
+                arcname = os.path.relpath(file_path, folder_path)
+                policy.write(zipf, file_path, arcname, component, report)
+                total_files += 1
+                total_size += os.path.getsize(file_path)
+    return total_files, total_size
+
+
+def _zip_folder_job(
+    folder_path: str, policy: CompressionPolicy
+) -> Tuple[Optional[str], int, int, PolicyReport, Dict[str, Tuple[int, int, int]]]:
+    """Worker process pool untuk mode packing lama (folder.zip di disk)"""
+    report = PolicyReport()
+    try:
+        zip_path = f"{folder_path}.zip"
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as zipf:
+            files, size = write_component(zipf, folder_path, policy, report)
+        return zip_path, files, size, report, _written_entries(zipf)
+    except Exception as e:
+        logging.error(f"Error compressing folder: {str(e)}")
+        return None, 0, 0, report, {}
+
+
+def _build_component_job(
+    folder_path: str, tmp_dir: str, memory_threshold: int, policy: CompressionPolicy
+) -> Tuple[tuple, int, int, PolicyReport]:
+    """Worker process pool: membangun arsip komponen STORED lalu mengompresnya.
+
+    Mengembalikan (hasil _deflate, jumlah file, ukuran, laporan kebijakan).
+    """
+    report = PolicyReport()
+    if calculate_size(folder_path) <= memory_threshold:
+        buffer = io.BytesIO()
+    else:
+        buffer = tempfile.TemporaryFile(dir=tmp_dir)
+    with buffer:
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zipf:
+            files, size = write_component(zipf, folder_path, policy, report)
+        buffer.seek(0)
+        return _deflate(buffer, tmp_dir, memory_threshold), files, size, report
+
+
+def _deflate_job(file_path: str, tmp_dir: str, memory_threshold: int) -> tuple:
+    """Worker process pool: mengompres satu file, beserta waktu CPU-nya untuk laporan"""
+    start = time.process_time()
+    with open(file_path, "rb") as src:
+        raw = _deflate(src, tmp_dir, memory_threshold)
+    return raw, time.process_time() - start
+
+
+def _deflate(src, tmp_dir: str, memory_threshold: int) -> tuple:
+    """Mengompres stream dengan DEFLATE mentah seperti zipfile.
+
+    Mengembalikan (payload, CRC, ukuran asli, ukuran terkompresi). Payload
+    berupa bytes, atau path file di tmp_dir jika sumber lebih besar dari
+    memory_threshold.
+    """
+    src.seek(0, os.SEEK_END)
+    in_memory = src.tell() <= memory_threshold
+    src.seek(0)
+    if in_memory:
+        dest = io.BytesIO()
+    else:
+        fd, payload_path = tempfile.mkstemp(suffix=".deflate", dir=tmp_dir)
+        dest = os.fdopen(fd, "wb")
+
+    with dest:
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        crc, file_size = 0, 0
+        while True:
+            chunk = src.read(COPY_BUFSIZE)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+            file_size += len(chunk)
+            dest.write(compressor.compress(chunk))
+        dest.write(compressor.flush())
+        compress_size = dest.tell()
+        payload = dest.getvalue() if in_memory else payload_path
+    return payload, crc, file_size, compress_size
+
+
+def _estimate_deflate(file_path: str, file_size: int) -> Tuple[int, float]:
+    """Perkiraan ukuran dan waktu CPU DEFLATE dari sampel awal file"""
+    with open(file_path, "rb") as f:
+        sample = f.read(POLICY_SAMPLE_SIZE)
+    if not sample:
+        return 0, 0.0
+    start = time.process_time()
+    compressed = zlib.compress(sample)
+    seconds = time.process_time() - start
+    scale = file_size / len(sample)
+    return int(len(compressed) * scale), seconds * scale
+
+
+def _component_of(arcname: str) -> Optional[str]:
+    """Folder teratas tempat file berada di dalam MTZ, None untuk file di root"""
+    head, sep, _ = arcname.partition("/")
+    return head if sep else None
+
+
+def _written_entries(zipf: zipfile.ZipFile) -> Dict[str, Tuple[int, int, int]]:
+    """CRC, ukuran asli dan ukuran terkompresi tiap entri arsip"""
+    return {
+        zinfo.filename: (zinfo.CRC, zinfo.file_size, zinfo.compress_size)
+        for zinfo in zipf.infolist()
+    }
+
+
+def _compare_entries(
+    expected: Dict[str, Tuple[int, int, int]], actual: Dict[str, Tuple[int, int, int]]
+) -> Optional[str]:
+    """Nama entri pertama yang berbeda, hilang atau berlebih; None jika sama"""
+    for name in sorted(expected.keys() | actual.keys()):
+        if expected.get(name) != actual.get(name):
+            return name
+    return None
+
+
+def _test_members(zip_path: str, infos: List[zipfile.ZipInfo], jobs: int) -> Optional[str]:
+    """Mendekompresi semua entri dan memeriksa CRC-nya, dibagi rata ke beberapa proses"""
+    groups = [[] for _ in range(max(1, min(jobs, len(infos))))]
+    loads = [0] * len(groups)
+    for zinfo in sorted(infos, key=lambda info: info.file_size, reverse=True):
+        index = loads.index(min(loads))
+        groups[index].append(zinfo.filename)
+        loads[index] += zinfo.file_size
+
+    if len(groups) == 1:
+        return _test_members_job(zip_path, groups[0])
+    with ProcessPoolExecutor(max_workers=len(groups)) as pool:
+        for corrupt_file in pool.map(_test_members_job, [zip_path] * len(groups), groups):
+            if corrupt_file is not None:
+                return corrupt_file
+    return None
+
+
+def _test_members_job(zip_path: str, names: List[str]) -> Optional[str]:
+    """Worker process pool: membaca entri sampai habis, CRC dicek oleh zipfile"""
+    with zipfile.ZipFile(zip_path, "r") as zipf:
+        for name in names:
+            try:
+                with zipf.open(name) as f:
+                    while f.read(COPY_BUFSIZE):
+                        pass
+            except zipfile.BadZipFile:
+                return name
+    return None
+
+
+def _open_payload(payload: Union[bytes, str]):
+    """Membuka hasil worker sebagai file object"""
+    if isinstance(payload, bytes):
+        return io.BytesIO(payload)
+    return open(payload, "rb")
+
+
+def _component_info(arcname: str, source_path: str) -> zipfile.ZipInfo:
+    """ZipInfo untuk arsip komponen di dalam MTZ"""
+    zinfo = zipfile.ZipInfo(arcname, time.localtime(os.path.getmtime(source_path))[:6])
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.external_attr = 0o644 << 16
+    return zinfo
+
+
+def write_raw(mtz: zipfile.ZipFile, zinfo: zipfile.ZipInfo, raw: tuple) -> None:
+    """Menambahkan stream DEFLATE yang sudah jadi ke arsip tanpa kompresi ulang.
+
+    Meniru ZipFile._open_to_write dan _ZipWriteFile.close: header lokal
+    ditulis dengan CRC dan ukuran final, data disalin apa adanya, lalu entri
+    didaftarkan untuk central directory.
+    """
+    payload, zinfo.CRC, zinfo.file_size, zinfo.compress_size = raw
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.flag_bits = 0x00
+    if not zinfo.external_attr:
+        zinfo.external_attr = 0o600 << 16
+    zip64 = max(zinfo.file_size, zinfo.compress_size) > zipfile.ZIP64_LIMIT
+
+    with mtz._lock:
+        if mtz._writing:
+            raise ValueError("Tidak bisa menulis ke MTZ selagi ada entri lain yang terbuka")
+        if zip64 and not mtz._allowZip64:
+            raise zipfile.LargeZipFile("Filesize would require ZIP64 extensions")
+
+        mtz.fp.seek(mtz.start_dir)
+        zinfo.header_offset = mtz.fp.tell()
+        mtz._writecheck(zinfo)
+        mtz._didModify = True
+
+        mtz.fp.write(zinfo.FileHeader(zip64))
+        with _open_payload(payload) as src:
+            shutil.copyfileobj(src, mtz.fp, COPY_BUFSIZE)
+        mtz.start_dir = mtz.fp.tell()
+        mtz.filelist.append(zinfo)
+        mtz.NameToInfo[zinfo.filename] = zinfo
+
+    if not isinstance(payload, bytes):
+        os.remove(payload)
+
+
+def get_user_input() -> str:
+    """Fungsi untuk mendapatkan input dari user"""
+    return input(
+        f"{ColorText.cyan('📂')} Masukkan alamat folder yang akan dipacking: "
+    ).strip()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Membaca argumen command line"""
+    parser = argparse.ArgumentParser(description="Packing folder tema MIUI menjadi file .mtz")
+    parser.add_argument("folder", nargs="?", help="folder tema, ditanyakan jika kosong")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="packing satu kali jalan di memori tanpa menghapus folder sumber",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="jumlah proses untuk membangun dan mengompres komponen secara paralel",
+    )
+    policy = parser.add_mutually_exclusive_group()
+    policy.add_argument(
+        "--policy",
+        metavar="FILE",
+        help="file JSON berisi aturan kompresi tambahan (per pola/komponen)",
+    )
+    policy.add_argument(
+        "--no-policy",
+        action="store_true",
+        help="kompresi seperti dulu: STORED di komponen, DEFLATED di MTZ",
+    )
+    parser.add_argument(
+        "--full-verify",
+        action="store_true",
+        help="dekompresi dan cek CRC semua entri setelah menulis (paralel sesuai --jobs)",
+    )
+    parser.add_argument("--metrics", help="tulis durasi tiap fase dan counter ke file ini")
+    parser.add_argument(
+        "--metrics-format",
+        choices=["json", "prometheus"],
+        default="json",
+        help="format file --metrics",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Fungsi utama"""
+    args = parse_args(argv)
+    os.system("cls" if os.name == "nt" else "clear")
+    if args.no_policy:
+        policy = CompressionPolicy([])
+    elif args.policy:
+        policy = CompressionPolicy.load(args.policy)
+    else:
+        policy = None
+    compressor = MTZCompressor(policy=policy)
+    compressor.setup_logging()
+    compressor.print_banner()
+
+    try:
+        main_folder = args.folder or get_user_input()
+
+        if not compressor.validate_folder(main_folder):
+            sys.exit(1)
+
+        print(f"\n{ColorText.cyan('🔄')} Memulai proses kompresi...\n")
+        compressor.stats["start_time"] = time.time()
+
+        if args.stream:
+            if compressor.pack_streaming(main_folder, jobs=args.jobs, full_verify=args.full_verify):
+                if args.metrics:
+                    compressor.metrics.write(args.metrics, args.metrics_format)
+                compressor.show_completion(main_folder)
+            else:
+                print(f"\n{ColorText.red('❌ Gagal membuat file MTZ!')}\n")
+                sys.exit(1)
+            return
+
+        # Step 1: Kompresi folder ke ZIP
+        folders = []
+        for folder in sorted(os.listdir(main_folder)):
+            if folder in SKIPPED_FOLDERS:
+                logging.info(f"Mengabaikan folder: {folder}")
+            elif os.path.isdir(os.path.join(main_folder, folder)):
+                folders.append(folder)
+
+        folder_paths = [os.path.join(main_folder, folder) for folder in folders]
+        if args.jobs > 1:
+            zip_paths = compressor.zip_folders(folder_paths, args.jobs)
+        else:
+            zip_paths = [compressor.zip_folder(folder_path) for folder_path in folder_paths]
+
+        for folder, folder_path, zip_path in zip(folders, folder_paths, zip_paths):
+            if zip_path and compressor.verify_zip(zip_path, args.full_verify, args.jobs):
+                shutil.rmtree(folder_path)
+                print(f"{ColorText.green('✓')} {folder}")
+                logging.info(f"Folder berhasil dikompres: {folder}")
+
+        # Step 2: Hapus ekstensi ZIP
+        compressor.remove_zip_extension(main_folder)
+
+        # Step 3: Buat file MTZ
+        if compressor.create_mtz(main_folder, jobs=args.jobs, full_verify=args.full_verify):
+            if args.metrics:
+                compressor.metrics.write(args.metrics, args.metrics_format)
+            compressor.show_completion(main_folder)
+        else:
+            print(f"\n{ColorText.red('❌ Gagal membuat file MTZ!')}\n")
+            sys.exit(1)
+
+    except KeyboardInterrupt:
+        os.system("cls" if os.name == "nt" else "clear")
+        print(f"\n{ColorText.yellow('⚠️ Dibatalkan!')}\n")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n{ColorText.red('❌ Error:')} {str(e)}\n")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
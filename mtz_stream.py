@@ -0,0 +1,228 @@
+import io
+import zlib
+import struct
+import zipfile
+from typing import IO, Iterator, Optional, Tuple
+
+
+LOCAL_HEADER_FORMAT = "<4s5H3L2H"
+LOCAL_HEADER_SIZE = struct.calcsize(LOCAL_HEADER_FORMAT)
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+# Central directory, zip64 end record and end record: no more local entries follow
+END_SIGNATURES = (b"PK\x01\x02", b"PK\x06\x06", b"PK\x05\x06")
+FLAG_ENCRYPTED = 0x1
+FLAG_DESCRIPTOR = 0x8
+FLAG_UTF8 = 0x800
+ZIP64_EXTRA = 0x0001
+CHUNK_SIZE = 64 * 1024
+# Output cap per inflate call, keeps zip bombs from filling memory in one step
+INFLATE_LIMIT = 1024 * 1024
+
+
+class _Source:
+    """Forward-only reader over a stream, with push-back for over-read bytes"""
+
+    def __init__(self, stream: IO[bytes]):
+        self._read = getattr(stream, "read1", stream.read)
+        self._pending = b""
+        self.offset = 0
+
+    def read(self, size: int) -> bytes:
+        """Up to size bytes, returning what is available instead of waiting for all"""
+        if self._pending:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        else:
+            data = self._read(size)
+        self.offset += len(data)
+        return data
+
+    def read_exact(self, size: int) -> bytes:
+        parts = []
+        while size > 0:
+            data = self.read(size)
+            if not data:
+                raise zipfile.BadZipFile("Truncated zip stream")
+            parts.append(data)
+            size -= len(data)
+        return b"".join(parts)
+
+    def unread(self, data: bytes) -> None:
+        self._pending = data + self._pending
+        self.offset -= len(data)
+
+    def drain(self) -> None:
+        while self.read(CHUNK_SIZE):
+            pass
+
+
+class StreamMember(io.RawIOBase):
+    """Decompressed content of the current member, checked against its CRC at the end"""
+
+    def __init__(self, source: _Source, info: zipfile.ZipInfo, zip64: bool):
+        self.info = info
+        self._source = source
+        self._zip64 = zip64
+        self._descriptor = bool(info.flag_bits & FLAG_DESCRIPTOR)
+        self._left = None if self._descriptor else info.compress_size
+        self._decompressor = zlib.decompressobj(-15) if info.compress_type == zipfile.ZIP_DEFLATED else None
+        self._buffer = b""
+        self._offset = 0
+        self._crc = 0
+        self._size = 0
+        self.finished = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while self._offset >= len(self._buffer) and not self.finished:
+            self._buffer, self._offset = self._next_chunk(), 0
+        length = min(len(buffer), len(self._buffer) - self._offset)
+        buffer[:length] = self._buffer[self._offset:self._offset + length]
+        self._offset += length
+        return length
+
+    def peek(self, size: int) -> bytes:
+        """Up to size bytes from the current position, without consuming them"""
+        while len(self._buffer) - self._offset < size and not self.finished:
+            self._buffer, self._offset = self._buffer[self._offset:] + self._next_chunk(), 0
+        return self._buffer[self._offset:self._offset + size]
+
+    def skip(self) -> None:
+        """Consume the rest of the member, which also checks its CRC once it was read from"""
+        if not self.finished and self._left is not None and self._size == 0:
+            # Untouched and of known size, its raw bytes are discarded without inflating
+            while self._left:
+                data = self._source.read(min(CHUNK_SIZE, self._left))
+                if not data:
+                    raise zipfile.BadZipFile(f"Truncated member {self.info.filename!r}")
+                self._left -= len(data)
+            self.finished = True
+        while not self.finished:
+            self._next_chunk()
+        self._buffer, self._offset = b"", 0
+
+    def _next_chunk(self) -> bytes:
+        if self._decompressor is None:
+            data = self._source.read(min(CHUNK_SIZE, self._left)) if self._left else b""
+            if self._left and not data:
+                raise zipfile.BadZipFile(f"Truncated member {self.info.filename!r}")
+            self._left -= len(data)
+            end = not self._left
+        else:
+            data, end = self._inflate()
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        if end:
+            self._finish()
+        return data
+
+    def _inflate(self) -> Tuple[bytes, bool]:
+        decompressor = self._decompressor
+        raw = decompressor.unconsumed_tail
+        if not raw:
+            size = CHUNK_SIZE if self._left is None else min(CHUNK_SIZE, self._left)
+            raw = self._source.read(size) if size else b""
+            if self._left is not None:
+                self._left -= len(raw)
+        data = decompressor.decompress(raw, INFLATE_LIMIT)
+        if decompressor.eof:
+            # The deflate stream ends the member, anything after it belongs to the next record
+            self._source.unread(decompressor.unused_data)
+            return data, True
+        if not raw and not data:
+            raise zipfile.BadZipFile(f"Truncated member {self.info.filename!r}")
+        return data, False
+
+    def _finish(self) -> None:
+        self.finished = True
+        info = self.info
+        if self._descriptor:
+            signature = self._source.read_exact(4)
+            crc = signature if signature != DESCRIPTOR_SIGNATURE else self._source.read_exact(4)
+            sizes = self._source.read_exact(16 if self._zip64 else 8)
+            info.CRC = struct.unpack("<L", crc)[0]
+            info.compress_size, info.file_size = struct.unpack("<QQ" if self._zip64 else "<LL", sizes)
+        if self._crc != info.CRC or self._size != info.file_size:
+            raise zipfile.BadZipFile(f"Bad CRC-32 for file {info.filename!r}")
+
+
+class StreamingZipReader:
+    """Iterate over zip members front to back, without seeking.
+
+    Local file headers are read in order and the central directory is never
+    consulted, so a zip can be read from a pipe while it is still being
+    written. Each member must be read (or is skipped) before the next one
+    is returned. Members whose size is only known from a data descriptor
+    must be deflated, a STORED one has no end marker to find.
+    """
+
+    def __init__(self, stream: IO[bytes]):
+        self._source = _Source(stream)
+        self._member: Optional[StreamMember] = None
+
+    @property
+    def bytes_read(self) -> int:
+        return self._source.offset
+
+    def __iter__(self) -> Iterator[StreamMember]:
+        while True:
+            if self._member is not None:
+                self._member.skip()
+                self._member = None
+
+            signature = self._source.read(4)
+            if len(signature) < 4 or signature in END_SIGNATURES:
+                # Read the rest so an upstream writer never sees a broken pipe
+                self._source.drain()
+                return
+            if signature != LOCAL_HEADER_SIGNATURE:
+                raise zipfile.BadZipFile("Bad local file header signature")
+
+            self._member = self._read_member(signature + self._source.read_exact(LOCAL_HEADER_SIZE - 4))
+            yield self._member
+
+    def _read_member(self, header: bytes) -> StreamMember:
+        (_, version, flags, method, time, date, crc, compress_size, file_size,
+         name_length, extra_length) = struct.unpack(LOCAL_HEADER_FORMAT, header)
+        raw_name = self._source.read_exact(name_length)
+        extra = self._source.read_exact(extra_length)
+
+        name = raw_name.decode("utf-8" if flags & FLAG_UTF8 else "cp437")
+        info = zipfile.ZipInfo(name, ((date >> 9) + 1980, (date >> 5) & 0xF, date & 0x1F,
+                                      time >> 11, (time >> 5) & 0x3F, (time & 0x1F) * 2))
+        info.extract_version = version
+        info.flag_bits = flags
+        info.compress_type = method
+        info.CRC = crc
+        info.compress_size = compress_size
+        info.file_size = file_size
+        info.extra = extra
+
+        zip64 = False
+        for field_id, data in _extra_fields(extra):
+            if field_id == ZIP64_EXTRA:
+                zip64 = True
+                values = struct.unpack(f"<{len(data) // 8}Q", data[:len(data) // 8 * 8])
+                # Only the fields saturated in the header are present, in this order
+                if file_size == 0xFFFFFFFF and values:
+                    info.file_size, values = values[0], values[1:]
+                if compress_size == 0xFFFFFFFF and values:
+                    info.compress_size = values[0]
+
+        if flags & FLAG_ENCRYPTED:
+            raise NotImplementedError(f"{name!r} is encrypted")
+        if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise NotImplementedError(f"{name!r} uses unsupported compression method {method}")
+        if flags & FLAG_DESCRIPTOR and method == zipfile.ZIP_STORED:
+            raise NotImplementedError(f"{name!r} is STORED with a data descriptor, its size is unknown")
+        return StreamMember(self._source, info, zip64)
+
+
+def _extra_fields(extra: bytes) -> Iterator[tuple]:
+    offset = 0
+    while offset + 4 <= len(extra):
+        field_id, size = struct.unpack("<HH", extra[offset:offset + 4])
+        yield field_id, extra[offset + 4:offset + 4 + size]
+        offset += 4 + size
@@ -0,0 +1,52 @@
+import os
+from typing import Callable, Optional, Tuple
+
+
+def scan_tree(
+    root: str,
+    visit_file: Optional[Callable[[os.DirEntry], bool]] = None,
+    remove_empty: bool = False,
+) -> int:
+    """Walk a tree once with os.scandir and return the total size of its files.
+
+    visit_file is called for every regular file and returns False when it
+    took the file over (renamed, queued for expansion, ...), which leaves it
+    out of the size. With remove_empty, folders left without entries are
+    removed bottom-up, including root. Sizes come from the DirEntry stat
+    cache, so every file is stat'ed at most once.
+    """
+    size, kept = _scan(root, visit_file, remove_empty)
+    if remove_empty and not kept:
+        try:
+            os.rmdir(root)
+        except OSError:
+            pass
+    return size
+
+
+def _scan(
+    path: str, visit_file: Optional[Callable[[os.DirEntry], bool]], remove_empty: bool
+) -> Tuple[int, bool]:
+    """Size of the files below path and whether path still has entries"""
+    # Snapshot the listing, visit_file may add or rename entries
+    with os.scandir(path) as it:
+        entries = list(it)
+
+    total, kept = 0, False
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            size, child_kept = _scan(entry.path, visit_file, remove_empty)
+            total += size
+            if child_kept or not remove_empty:
+                kept = True
+                continue
+            try:
+                os.rmdir(entry.path)
+            except OSError:
+                kept = True
+            continue
+
+        kept = True
+        if entry.is_file(follow_symlinks=False) and (visit_file is None or visit_file(entry)):
+            total += entry.stat(follow_symlinks=False).st_size
+    return total, kept
@@ -5,15 +5,30 @@ import shutil
 import logging
 import time
 import platform
-import psutil
 import threading
+import queue
+import tempfile
+import struct
+import io
 import tkinter as tk
 from tkinter import filedialog, ttk, scrolledtext
-from typing import Set, Optional
+from typing import IO, Callable, Dict, List, Set, Optional, Tuple
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
 
+DEFAULT_MEMORY_THRESHOLD = 64 * 1024 * 1024
+DEFAULT_MAX_DEPTH = 4
+COPY_BUFSIZE = 1024 * 1024
+PROGRESS_INTERVAL = 0.1
+EVENT_POLL_MS = 50
+EVENT_BATCH = 200
+LOCAL_HEADER_FORMAT = "<4s2B4HL2L2H"
+LOCAL_HEADER_SIZE = struct.calcsize(LOCAL_HEADER_FORMAT)
+
+
 class MTZExtractorGUI:
     def __init__(self, root):
         self.root = root
@@ -32,12 +47,17 @@ class MTZExtractorGUI:
         
         self.root.configure(bg=self.bg_color)
         
+        # Worker threads only post events here, the Tk thread applies them
+        self.events = queue.Queue()
+        
         # Initialize extractor
-        self.extractor = MTZExtractor()
+        self.extractor = MTZExtractor(workers=os.cpu_count() or 1)
+        self.extractor.progress = ProgressReporter(self.events)
         self.selected_file = None
         self.is_processing = False
         
         self.setup_ui()
+        self.root.after(EVENT_POLL_MS, self.drain_events)
         
     def setup_ui(self):
         # Header Frame
@@ -208,6 +228,41 @@ class MTZExtractorGUI:
         self.log_text.config(state=tk.DISABLED)
     
     def log_message(self, message, level="INFO"):
+        """Queue a log line, safe to call from any thread"""
+        self.events.put(("log", message, level))
+    
+    def set_status(self, text):
+        """Queue a status line, safe to call from any thread"""
+        self.events.put(("status", text))
+    
+    def drain_events(self):
+        """Apply queued worker events on the Tk thread, then poll again"""
+        try:
+            for _ in range(EVENT_BATCH):
+                event = self.events.get_nowait()
+                kind = event[0]
+                if kind == "progress":
+                    self._show_progress(*event[1:])
+                elif kind == "log":
+                    self._append_log(*event[1:])
+                elif kind == "status":
+                    self.status_var.set(event[1])
+                elif kind == "done":
+                    self.reset_ui()
+        except queue.Empty:
+            pass
+        self.root.after(EVENT_POLL_MS, self.drain_events)
+    
+    def _show_progress(self, done, total, member):
+        self.progress_bar.config(maximum=max(total, 1))
+        self.progress_var.set(done)
+        if member:
+            self.status_var.set(
+                f"Extracting {member} ({self.extractor.format_size(done)} / "
+                f"{self.extractor.format_size(total)})"
+            )
+    
+    def _append_log(self, message, level):
         self.log_text.config(state=tk.NORMAL)
         timestamp = datetime.now().strftime("%H:%M:%S")
         
@@ -223,7 +278,6 @@ class MTZExtractorGUI:
         self.log_text.insert(tk.END, f"[{timestamp}] {prefix} {message}\n")
         self.log_text.see(tk.END)
         self.log_text.config(state=tk.DISABLED)
-        self.root.update()
     
     def browse_file(self):
         file_path = filedialog.askopenfilename(
@@ -253,51 +307,65 @@ class MTZExtractorGUI:
     def extract_process(self):
         try:
             # Validate file
-            self.status_var.set("Validating file...")
-            self.progress_var.set(10)
+            self.set_status("Validating file...")
+            self.extractor.progress.start(0)
             
             if not self.extractor.validate_mtz_file(self.selected_file):
                 self.log_message("Invalid MTZ file!", "ERROR")
-                self.reset_ui()
                 return
             
             self.log_message("File validation successful", "SUCCESS")
             
+            # Plan extraction from the central directories
+            self.set_status("Planning extraction...")
+            plan = self.extractor.plan_extraction(self.selected_file)
+            if not plan:
+                self.log_message("Failed to read MTZ file!", "ERROR")
+                return
+            
+            self.log_message(
+                f"Plan: {plan.file_count} files, {plan.archive_count} archives, "
+                f"{self.extractor.format_size(plan.total_bytes)}"
+            )
+            if not self.extractor.check_free_space(plan, "./extracted"):
+                self.log_message(
+                    f"Not enough disk space, need {self.extractor.format_size(plan.peak_bytes)}",
+                    "ERROR",
+                )
+                return
+            
+            # Progress is measured in extracted bytes from here on
+            self.extractor.progress.start(plan.total_bytes)
+            
             # Create extract folder
-            self.status_var.set("Creating extraction folder...")
-            self.progress_var.set(20)
+            self.set_status("Creating extraction folder...")
             
             extract_folder = self.extractor.create_extract_folder(self.selected_file)
             if not extract_folder:
                 self.log_message("Failed to create extraction folder!", "ERROR")
-                self.reset_ui()
                 return
             
             self.log_message(f"Extraction folder: {extract_folder}", "SUCCESS")
             
             # Extract MTZ
-            self.status_var.set("Extracting MTZ file...")
-            self.progress_var.set(40)
+            self.set_status("Extracting MTZ file...")
             self.log_message("Starting extraction process...")
             
-            if not self.extractor.extract_mtz(self.selected_file, extract_folder):
-                self.log_message("Extraction failed!", "ERROR")
-                self.reset_ui()
+            if not self.extractor.extract_and_expand(self.selected_file, extract_folder):
+                self.log_message(f"Extraction failed: {self.extractor.last_error}", "ERROR")
                 return
             
+            self.extractor.progress.finish()
             self.log_message(f"Extracted {self.extractor.stats['total_files']} files", "SUCCESS")
-            self.progress_var.set(70)
             
             # Process files
-            self.status_var.set("Processing extracted files...")
+            self.set_status("Processing extracted files...")
             self.log_message("Processing files...")
             
-            self.extractor.process_files(extract_folder)
-            self.progress_var.set(90)
+            self.extractor.process_files(extract_folder, expand=False)
             
             # Complete
-            self.status_var.set("Extraction completed!")
-            self.progress_var.set(100)
+            self.set_status("Extraction completed!")
             
             # Show statistics
             completion_time = time.time() - self.extractor.stats["start_time"]
@@ -321,7 +389,7 @@ class MTZExtractorGUI:
         except Exception as e:
             self.log_message(f"Error: {str(e)}", "ERROR")
         finally:
-            self.reset_ui()
+            self.events.put(("done",))
     
     def reset_ui(self):
         self.is_processing = False
@@ -329,10 +397,302 @@ class MTZExtractorGUI:
         self.browse_btn.config(state=tk.NORMAL)
 
 
+class ProgressReporter:
+    """Thread-safe byte progress that posts throttled events to a queue.
+
+    Events are ("progress", bytes_done, bytes_total, member) tuples, at most
+    one per interval plus a final one, so the consumer never falls behind.
+    """
+
+    def __init__(self, events: queue.Queue, interval: float = PROGRESS_INTERVAL):
+        self.events = events
+        self.interval = interval
+        self.done = 0
+        self.total = 0
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def start(self, total: int) -> None:
+        with self._lock:
+            self.done = 0
+            self.total = total
+            self._last = time.monotonic()
+        self.events.put(("progress", 0, total, ""))
+
+    def advance(self, nbytes: int, member: str) -> None:
+        """Count nbytes written for member, posting an event if the interval passed"""
+        with self._lock:
+            self.done += nbytes
+            now = time.monotonic()
+            if now - self._last < self.interval:
+                return
+            self._last = now
+            event = ("progress", self.done, self.total, member)
+        self.events.put(event)
+
+    def finish(self) -> None:
+        with self._lock:
+            event = ("progress", self.done, max(self.total, self.done), "")
+        self.events.put(event)
+
+
+@dataclass
+class ExtractionPlan:
+    """Sizes and counts of an extraction, read from central directories only"""
+
+    file_path: str
+    compressed_size: int = 0
+    outer_files: int = 0
+    file_count: int = 0
+    archive_count: int = 0
+    total_bytes: int = 0
+    peak_bytes: int = 0
+    components: Dict[str, int] = field(default_factory=dict)
+
+
+class _MemberSlice(io.RawIOBase):
+    """Read-only window onto a STORED member inside its parent archive file"""
+
+    def __init__(self, fileobj: IO[bytes], start: int, size: int):
+        self._fileobj = fileobj
+        self._start = start
+        self._size = size
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self._size
+        self._pos = min(max(offset, 0), self._size)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        length = min(len(buffer), self._size - self._pos)
+        if length <= 0:
+            return 0
+        self._fileobj.seek(self._start + self._pos)
+        data = self._fileobj.read(length)
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+class ContentSniffer:
+    """Class for detecting file types from their leading bytes"""
+
+    HEADER_SIZE = 16
+    SIGNATURES = [
+        ("zip", 0, b"PK\x03\x04"),
+        ("zip", 0, b"PK\x05\x06"),
+        ("png", 0, b"\x89PNG\r\n\x1a\n"),
+        ("jpeg", 0, b"\xff\xd8\xff"),
+        ("gif", 0, b"GIF87a"),
+        ("gif", 0, b"GIF89a"),
+        ("webp", 8, b"WEBP"),
+        ("wav", 8, b"WAVE"),
+        ("mp3", 0, b"ID3"),
+        ("ogg", 0, b"OggS"),
+        ("mp4", 4, b"ftyp"),
+        ("ttf", 0, b"\x00\x01\x00\x00"),
+        ("ttf", 0, b"true"),
+        ("otf", 0, b"OTTO"),
+        ("pdf", 0, b"%PDF"),
+        ("xml", 0, b"<?xml"),
+        ("elf", 0, b"\x7fELF"),
+    ]
+
+    def __init__(self, signatures: Optional[List[Tuple[str, int, bytes]]] = None):
+        self.signatures = list(signatures or self.SIGNATURES)
+        self.detectors = []
+        self._cache = {}
+
+    def register(self, kind: str, magic: bytes, offset: int = 0) -> None:
+        """Add a magic-byte signature"""
+        self.signatures.append((kind, offset, magic))
+        self._cache.clear()
+
+    def add_detector(self, detector: Callable[[bytes], Optional[str]]) -> None:
+        """Add a custom detector, consulted before the signature table"""
+        self.detectors.append(detector)
+        self._cache.clear()
+
+    def detect(self, header: bytes) -> Optional[str]:
+        """Return the detected kind of a header, or None if unknown"""
+        for detector in self.detectors:
+            kind = detector(header)
+            if kind:
+                return kind
+        for kind, offset, magic in self.signatures:
+            if header[offset:offset + len(magic)] == magic:
+                return kind
+        return None
+
+    def sniff(self, zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo) -> Optional[str]:
+        """Detect the kind of an archive member, reading only its first bytes"""
+        key = (info.filename, info.CRC, info.file_size)
+        if key not in self._cache:
+            with zip_ref.open(info) as source:
+                self._cache[key] = self.detect(source.read(self.HEADER_SIZE))
+        return self._cache[key]
+
+    def sniff_file(self, path: Path) -> Optional[str]:
+        """Detect the kind of a file on disk"""
+        with open(path, "rb") as source:
+            return self.detect(source.read(self.HEADER_SIZE))
+
+
+class ArchiveExpander:
+    """Class for expanding nested archives through a work queue and a thread pool"""
+
+    def __init__(
+        self,
+        is_archive: Callable[[zipfile.ZipFile, zipfile.ZipInfo, int], bool],
+        open_nested: Callable[[zipfile.ZipFile, zipfile.ZipInfo], IO[bytes]],
+        write_file: Callable[[IO[bytes], Path], None],
+        workers: int = 1,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+    ):
+        self.is_archive = is_archive
+        self.open_nested = open_nested
+        self.write_file = write_file
+        self.workers = max(1, workers)
+        self.max_depth = max_depth
+        self.archives = 0
+        self.errors = []
+        # One pending archive per worker, each one may hold a buffered member
+        self._queue = queue.Queue(maxsize=self.workers)
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def __enter__(self) -> "ArchiveExpander":
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._work)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._queue.join()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self.errors and exc_type is None:
+            raise self.errors[0]
+
+    def submit(
+        self, source, folder: Path, depth: int, fallback: Optional[Path] = None
+    ) -> None:
+        """Queue an archive (path or open buffer) for expansion into folder, waiting for room"""
+        self._queue.put((source, folder, depth, fallback))
+
+    def _offer(self, job: tuple) -> bool:
+        """Queue a job if there is room, False if the caller has to expand it itself"""
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            return False
+        return True
+
+    def expand(
+        self, source, folder: Path, depth: int, fallback: Optional[Path] = None
+    ) -> bool:
+        """Expand an archive in the calling thread, nested archives are queued while there is room.
+
+        A path source is deleted once expanded. A buffer that turns out not
+        to be a zip is written to fallback instead.
+        """
+        try:
+            try:
+                zip_ref = zipfile.ZipFile(source, "r")
+            except zipfile.BadZipFile:
+                if fallback is not None:
+                    source.seek(0)
+                    self.write_file(source, fallback)
+                return False
+
+            with zip_ref:
+                folder.mkdir(parents=True, exist_ok=True)
+                for info in zip_ref.infolist():
+                    self.extract_member(zip_ref, info, folder, depth)
+        finally:
+            if not isinstance(source, Path):
+                source.close()
+
+        if isinstance(source, Path):
+            source.unlink()
+        with self._lock:
+            self.archives += 1
+        return True
+
+    def extract_member(
+        self, zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, folder: Path, depth: int
+    ) -> None:
+        """Write a single member, queueing it for expansion if it is an archive"""
+        target = folder / _member_path(info.filename)
+        if info.is_dir():
+            target.mkdir(parents=True, exist_ok=True)
+            return
+
+        if depth < self.max_depth and self.is_archive(zip_ref, info, depth):
+            if depth > 0 and target.suffix.lower() == ".zip":
+                archive_folder = target.with_suffix("")
+            else:
+                archive_folder = target
+            buffer = self.open_nested(zip_ref, info)
+            job = (buffer, archive_folder, depth + 1, target)
+            # Component archives expand in the caller, nested ones too when every worker
+            # is busy. Blocking on the queue could deadlock workers that feed it.
+            if depth == 0 or not self._offer(job):
+                self.expand(*job)
+            return
+
+        with zip_ref.open(info) as source:
+            self.write_file(source, target)
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self.expand(*job)
+            except Exception as e:
+                with self._lock:
+                    self.errors.append(e)
+            finally:
+                self._queue.task_done()
+
+
 class MTZExtractor:
     """Class for handling MTZ file extraction"""
 
-    def __init__(self, allowed_extensions: Set[str] = None):
+    def __init__(
+        self,
+        allowed_extensions: Set[str] = None,
+        memory_threshold: int = DEFAULT_MEMORY_THRESHOLD,
+        sniffer: Optional[ContentSniffer] = None,
+        workers: int = 1,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+    ):
+        self.memory_threshold = memory_threshold
+        self.sniffer = sniffer or ContentSniffer()
+        self.workers = max(1, workers)
+        self.max_depth = max_depth
+        self.progress: Optional[ProgressReporter] = None
+        # Why the last extraction failed, for the GUI log
+        self.last_error: Optional[str] = None
         self.allowed_extensions = allowed_extensions or {
             ".java", ".kt", ".so", ".aar", ".jar", ".mp3", ".wav",
             ".mp4", ".3gp", ".txt", ".json", ".xml", ".html", ".css",
@@ -355,6 +715,54 @@ class MTZExtractor:
             size /= 1024
         return f"{size:.2f} TB"
 
+    def plan_extraction(self, file_path: str) -> Optional[ExtractionPlan]:
+        """Compute sizes and counts of an extraction without writing anything"""
+        try:
+            plan = ExtractionPlan(file_path, compressed_size=os.path.getsize(file_path))
+            spills = []
+            with zipfile.ZipFile(file_path, "r") as zip_ref:
+                plan.outer_files = len(zip_ref.infolist())
+                self._plan_archive(zip_ref, plan, spills, "", 0)
+
+            # Inner archives above the memory threshold spill to temp files, one per worker
+            spills.sort(reverse=True)
+            plan.peak_bytes = plan.total_bytes + sum(spills[:self.workers])
+            return plan
+        except Exception:
+            return None
+
+    def _plan_archive(
+        self, zip_ref: zipfile.ZipFile, plan: ExtractionPlan, spills: List[int], prefix: str, depth: int
+    ) -> None:
+        for info in zip_ref.infolist():
+            if info.is_dir():
+                continue
+
+            if depth < self.max_depth and self._is_archive_member(zip_ref, info, depth):
+                with open_member_view(zip_ref, info, self.memory_threshold) as view:
+                    try:
+                        inner_ref = zipfile.ZipFile(view, "r")
+                    except zipfile.BadZipFile:
+                        inner_ref = None
+
+                    if inner_ref is not None:
+                        with inner_ref:
+                            name = prefix + _archive_name(info.filename, depth)
+                            before = plan.total_bytes
+                            self._plan_archive(inner_ref, plan, spills, name + "/", depth + 1)
+                            plan.components[name] = plan.total_bytes - before
+                            plan.archive_count += 1
+                            if info.file_size > self.memory_threshold:
+                                spills.append(info.file_size)
+                        continue
+
+            plan.file_count += 1
+            plan.total_bytes += info.file_size
+
+    def check_free_space(self, plan: ExtractionPlan, folder: str) -> bool:
+        """Check that the planned peak disk usage fits where folder lives"""
+        return free_space(folder) >= plan.peak_bytes
+
     def validate_mtz_file(self, file_path: str) -> bool:
         """Validate if file is MTZ"""
         if not os.path.exists(file_path):
@@ -393,50 +801,250 @@ class MTZExtractor:
         except Exception:
             return False
 
-    def process_files(self, folder: str) -> None:
-        """Process files after extraction"""
-        self._add_zip_extension_to_files(folder)
-        self._unzip_files_to_folders(folder)
-        self._cleanup_empty_folders(folder)
-        self.stats["extracted_size"] = self.calculate_folder_size(folder)
+    def extract_and_expand(self, file_path: str, extract_folder: str) -> bool:
+        """Extract MTZ file and expand component archives without writing them to disk"""
+        try:
+            self.stats["start_time"] = time.time()
+            self.stats["total_size"] = os.path.getsize(file_path)
+
+            with self._create_expander() as expander:
+                self.stats["total_files"] = self._map_members(
+                    file_path,
+                    lambda zip_ref, info: expander.extract_member(
+                        zip_ref, info, Path(extract_folder), 0
+                    ),
+                )
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            return False
+
+    def _map_members(
+        self, file_path: str, func: Callable[[zipfile.ZipFile, zipfile.ZipInfo], None]
+    ) -> int:
+        """Run func on every member, largest first, each worker with its own ZipFile handle"""
+        with zipfile.ZipFile(file_path, "r") as zip_ref:
+            infos = zip_ref.infolist()
+            if self.workers == 1:
+                for info in infos:
+                    func(zip_ref, info)
+                return len(infos)
+
+        # Longest-processing-time-first keeps the makespan close to optimal
+        infos = sorted(infos, key=lambda info: info.file_size, reverse=True)
+        local = threading.local()
+        handles = []
+        handles_lock = threading.Lock()
+
+        def run(info: zipfile.ZipInfo) -> None:
+            zip_ref = getattr(local, "zip_ref", None)
+            if zip_ref is None:
+                zip_ref = local.zip_ref = zipfile.ZipFile(file_path, "r")
+                with handles_lock:
+                    handles.append(zip_ref)
+            func(zip_ref, info)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for future in [pool.submit(run, info) for info in infos]:
+                    future.result()
+        finally:
+            for zip_ref in handles:
+                zip_ref.close()
+        return len(infos)
+
+    def _create_expander(self) -> "ArchiveExpander":
+        return ArchiveExpander(
+            self._is_archive_member,
+            self._open_nested,
+            self._write_file,
+            workers=self.workers,
+            max_depth=self.max_depth,
+        )
+
+    def _is_archive_member(
+        self, zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, depth: int
+    ) -> bool:
+        """Members are archives when their content is a zip, whitelisted types stay packed"""
+        if self._is_allowed(info.filename):
+            return False
+        return self.sniffer.sniff(zip_ref, info) == "zip"
+
+    def _is_allowed(self, name: str) -> bool:
+        suffix = Path(name).suffix.lower()
+        return any(suffix == ext.lower() for ext in self.allowed_extensions)
+
+    def _open_nested(self, zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo):
+        """Buffer an inner archive in memory, spilling to a temp file above the threshold"""
+        if self.memory_threshold > 0:
+            buffer = _SpooledFile(max_size=self.memory_threshold)
+        else:
+            buffer = tempfile.TemporaryFile()
+        with zip_ref.open(info) as source:
+            shutil.copyfileobj(source, buffer, COPY_BUFSIZE)
+        buffer.seek(0)
+        return buffer
+
+    def _write_file(self, source, target: Path) -> None:
+        """Copy a member stream to its final location, reporting progress per chunk"""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, "wb") as dest:
+            if self.progress is None:
+                shutil.copyfileobj(source, dest, COPY_BUFSIZE)
+                return
+            while True:
+                chunk = source.read(COPY_BUFSIZE)
+                if not chunk:
+                    break
+                dest.write(chunk)
+                self.progress.advance(len(chunk), target.name)
+
+    def process_files(self, folder: str, expand: bool = True) -> None:
+        """Process files after extraction in a single pass over the tree"""
+        if not expand:
+            self.stats["extracted_size"] = scan_tree(folder, remove_empty=True)
+            return
+
+        archives = []
+        size = scan_tree(
+            folder, lambda entry: self._classify_file(entry, archives), remove_empty=True
+        )
+        with self._create_expander() as expander:
+            for file_path in archives:
+                expander.submit(file_path, file_path.with_suffix(""), 1)
+
+        # Only the freshly expanded folders still need cleanup and sizing
+        for file_path in archives:
+            archive_folder = file_path.with_suffix("")
+            if archive_folder.is_dir():
+                size += scan_tree(str(archive_folder), remove_empty=True)
+            if file_path.exists():
+                size += file_path.stat().st_size
+        self.stats["extracted_size"] = size
 
     def calculate_folder_size(self, folder: str) -> int:
         """Calculate total folder size"""
-        total_size = 0
-        for dirpath, _, filenames in os.walk(folder):
-            for f in filenames:
-                fp = os.path.join(dirpath, f)
-                total_size += os.path.getsize(fp)
-        return total_size
-
-    def _add_zip_extension_to_files(self, folder: str) -> None:
-        """Add .zip extension to files that are not allowed extensions"""
-        for file_path in Path(folder).rglob("*"):
-            if file_path.is_file() and file_path.suffix not in self.allowed_extensions:
-                new_path = file_path.with_suffix(file_path.suffix + ".zip")
-                file_path.rename(new_path)
-
-    def _unzip_files_to_folders(self, folder: str) -> None:
-        """Extract .zip files to their respective folders"""
-        for file_path in Path(folder).rglob("*.zip"):
-            if file_path.is_file():
-                folder_path = file_path.with_suffix("")
-                folder_path.mkdir(exist_ok=True)
-                try:
-                    with zipfile.ZipFile(file_path, "r") as zip_ref:
-                        zip_ref.extractall(folder_path)
-                    file_path.unlink()
-                except Exception:
-                    continue
-
-    def _cleanup_empty_folders(self, folder: str) -> None:
-        """Remove empty folders"""
-        for dirpath, dirnames, filenames in os.walk(folder, topdown=False):
-            if not dirnames and not filenames:
-                try:
-                    os.rmdir(dirpath)
-                except OSError:
-                    continue
+        return scan_tree(folder)
+
+    def _classify_file(self, entry: os.DirEntry, archives: List[Path]) -> bool:
+        """Give zip content a .zip extension and collect archives, False if collected"""
+        if not self._is_allowed(entry.name) and self.sniffer.sniff_file(entry.path) == "zip":
+            file_path = Path(entry.path + ".zip")
+            os.rename(entry.path, file_path)
+        elif entry.name.endswith(".zip"):
+            file_path = Path(entry.path)
+        else:
+            return True
+        archives.append(file_path)
+        return False
+
+
+def scan_tree(
+    root: str,
+    visit_file: Optional[Callable[[os.DirEntry], bool]] = None,
+    remove_empty: bool = False,
+) -> int:
+    """Walk a tree once with os.scandir and return the total size of its files.
+
+    Same walker as mtz_walk.scan_tree, kept here so the GUI stays a single file.
+    """
+    size, kept = _scan(root, visit_file, remove_empty)
+    if remove_empty and not kept:
+        try:
+            os.rmdir(root)
+        except OSError:
+            pass
+    return size
+
+
+def _scan(
+    path: str, visit_file: Optional[Callable[[os.DirEntry], bool]], remove_empty: bool
+) -> Tuple[int, bool]:
+    """Size of the files below path and whether path still has entries"""
+    with os.scandir(path) as it:
+        entries = list(it)
+
+    total, kept = 0, False
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            size, child_kept = _scan(entry.path, visit_file, remove_empty)
+            total += size
+            if child_kept or not remove_empty:
+                kept = True
+                continue
+            try:
+                os.rmdir(entry.path)
+            except OSError:
+                kept = True
+            continue
+
+        kept = True
+        if entry.is_file(follow_symlinks=False) and (visit_file is None or visit_file(entry)):
+            total += entry.stat(follow_symlinks=False).st_size
+    return total, kept
+
+
+def _member_path(name: str) -> str:
+    """Sanitize an archive member name the same way ZipFile.extract does"""
+    arcname = name.replace("/", os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    invalid_path_parts = ("", os.path.curdir, os.path.pardir)
+    arcname = os.path.sep.join(
+        part for part in arcname.split(os.path.sep) if part not in invalid_path_parts
+    )
+    if os.path.sep == "\\":
+        arcname = zipfile.ZipFile._sanitize_windows_name(arcname, os.path.sep)
+    return arcname
+
+
+def _archive_name(name: str, depth: int) -> str:
+    """Folder name of an expanded archive, nested .zip files lose their suffix"""
+    if depth > 0 and name.lower().endswith(".zip"):
+        return name[:-4]
+    return name
+
+
+class _SpooledFile(tempfile.SpooledTemporaryFile):
+    """SpooledTemporaryFile only has seekable() from Python 3.11 on, ZipFile needs it"""
+
+    def seekable(self) -> bool:
+        return True
+
+
+def open_member_view(
+    zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, memory_threshold: int = DEFAULT_MEMORY_THRESHOLD
+) -> IO[bytes]:
+    """Open a member for random access without writing it anywhere.
+
+    STORED members are read in place, small compressed members are held in
+    memory and larger ones are streamed, paying a re-decompression on seeks.
+    """
+    fileobj = zip_ref.fp
+    if (
+        info.compress_type == zipfile.ZIP_STORED
+        and not info.flag_bits & 0x1
+        and fileobj is not None
+        and fileobj.seekable()
+    ):
+        fileobj.seek(info.header_offset)
+        header = struct.unpack(LOCAL_HEADER_FORMAT, fileobj.read(LOCAL_HEADER_SIZE))
+        start = info.header_offset + LOCAL_HEADER_SIZE + header[10] + header[11]
+        return _MemberSlice(fileobj, start, info.file_size)
+
+    if info.file_size <= memory_threshold:
+        with zip_ref.open(info) as source:
+            return io.BytesIO(source.read())
+    return zip_ref.open(info)
+
+
+def free_space(path: str) -> int:
+    """Free bytes on the filesystem that holds path, or would hold it"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        path = os.path.dirname(path)
+    return shutil.disk_usage(path).free
 
 
 def main():
@@ -0,0 +1,33 @@
+import os
+import sys
+from typing import Dict
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mtz_bench import CorpusSpec, generate_theme  # noqa: E402
+
+
+SMALL_THEME = CorpusSpec(components=4, files=24, mean_size=2048, depth=3, wallpaper_size=64 * 1024, seed=1)
+
+
+def read_tree(folder) -> Dict[str, bytes]:
+    """Relative path -> content of every file below folder, sidecars excluded"""
+    tree = {}
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.startswith(".mtz_"):
+                continue
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                tree[os.path.relpath(path, folder).replace(os.sep, "/")] = f.read()
+    return tree
+
+
+@pytest.fixture(scope="session")
+def theme(tmp_path_factory) -> str:
+    """A small synthetic theme with component archives nested three deep"""
+    path = tmp_path_factory.mktemp("themes") / "sample.mtz"
+    generate_theme(str(path), SMALL_THEME)
+    return str(path)
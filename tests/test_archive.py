@@ -0,0 +1,33 @@
+import zipfile
+
+import pytest
+
+from mtz_extractor import MTZArchive
+
+
+def test_nested_archive_addressed_by_folder_name(theme):
+    with MTZArchive(theme) as archive:
+        assert archive.is_archive("icons")
+        assert archive.is_archive("icons/extra/nested3")
+        assert archive.is_archive("icons/extra/nested3/extra/nested2")
+        assert archive.getinfo("icons/extra/nested3/extra/nested2").filename == "extra/nested2.zip"
+        assert not archive.is_archive("icons/extra/nested3/res/drawable-xxhdpi/item0.png")
+
+        with archive.open("icons/extra/nested3") as source:
+            assert zipfile.is_zipfile(source)
+
+
+def test_reads_through_nested_archives(theme):
+    with MTZArchive(theme) as archive:
+        names = archive.namelist(recursive=True)
+        deepest = "icons/extra/nested3/extra/nested2/res/drawable-xxhdpi/item0.png"
+        assert deepest in names
+        assert archive.read(deepest).startswith(b"\x89PNG")
+        assert archive.getinfo(deepest).file_size == len(archive.read(deepest))
+
+
+def test_missing_names_raise_key_error(theme):
+    with MTZArchive(theme) as archive:
+        for name in ("missing", "icons/missing", "icons/extra/nested3/extra/missing"):
+            with pytest.raises(KeyError):
+                archive.getinfo(name)
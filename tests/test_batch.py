@@ -0,0 +1,33 @@
+import json
+import shutil
+
+import pytest
+
+from mtz_extractor import batch_main
+
+from conftest import read_tree
+
+
+def test_batch_extracts_every_archive_without_log_files(theme, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    paths = []
+    for index in range(4):
+        path = tmp_path / f"theme{index}.mtz"
+        shutil.copy(theme, path)
+        paths.append(str(path))
+    (tmp_path / "broken.mtz").write_bytes(b"not a zip")
+
+    with pytest.raises(SystemExit) as exit_info:
+        batch_main(paths + [str(tmp_path / "broken.mtz"), "-o", "out", "-j", "4"])
+    assert exit_info.value.code == 1
+
+    results = {json.loads(line)["path"]: json.loads(line) for line in capsys.readouterr().out.splitlines()}
+    assert [results[path]["status"] for path in paths] == ["ok"] * 4
+    broken = results[str(tmp_path / "broken.mtz")]
+    assert broken["status"] == "error"
+    assert broken["error"].startswith("Extraction failed")
+    assert not (tmp_path / "out/broken").exists()
+
+    expected = read_tree(tmp_path / "out/theme0")
+    assert all(read_tree(tmp_path / f"out/theme{index}") == expected for index in range(1, 4))
+    assert not (tmp_path / "logs").exists()
@@ -0,0 +1,99 @@
+import time
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import mtz_api
+from mtz_extractor import ExtractionCache, MTZExtractor
+
+from conftest import read_tree
+
+
+def test_cache_hit_restores_the_same_tree(theme, tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    miss = mtz_api.extract(theme, str(tmp_path / "miss"), cache=cache)
+    hit = mtz_api.extract(theme, str(tmp_path / "hit"), cache=cache)
+
+    assert not miss.cache_hit and hit.cache_hit
+    assert hit.files == miss.files
+    assert read_tree(tmp_path / "hit") == read_tree(tmp_path / "miss")
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_editing_output_never_reaches_the_cache(theme, tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    mtz_api.extract(theme, str(tmp_path / "miss"), cache=cache)
+    expected = read_tree(tmp_path / "miss")
+
+    # In place, the way an editor without atomic saves would
+    with open(tmp_path / "miss/description.xml", "r+b") as f:
+        f.write(b"<edited/>")
+    mtz_api.extract(theme, str(tmp_path / "hit"), cache=cache)
+    with open(tmp_path / "hit/description.xml", "r+b") as f:
+        f.write(b"<edited/>")
+
+    mtz_api.extract(theme, str(tmp_path / "again"), cache=cache)
+    assert read_tree(tmp_path / "again") == expected
+
+
+def test_patterns_are_cached_separately(theme, tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    icons = mtz_api.extract(theme, str(tmp_path / "icons"), cache=cache, patterns=["icons/**"])
+    full = mtz_api.extract(theme, str(tmp_path / "full"), cache=cache)
+
+    assert not icons.cache_hit and not full.cache_hit
+    assert set(read_tree(tmp_path / "icons")) < set(read_tree(tmp_path / "full"))
+
+
+def count_hits(root: str, times: int) -> None:
+    cache = ExtractionCache(root)
+    for _ in range(times):
+        cache._count("hits", 1)
+
+
+def test_stats_survive_concurrent_processes(tmp_path):
+    root = str(tmp_path / "cache")
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        for future in [pool.submit(count_hits, root, 50) for _ in range(4)]:
+            future.result()
+
+    stats = ExtractionCache(root).stats()
+    assert stats["hits"] == 200
+    assert stats["bytes_saved"] == 200
+
+
+class RacingCache(ExtractionCache):
+    """Another process evicts every entry right after this one listed it"""
+
+    def _read_meta(self, key):
+        meta = super()._read_meta(key)
+        self._meta_path(key).unlink(missing_ok=True)
+        shutil.rmtree(self.root / "entries" / key, ignore_errors=True)
+        return meta
+
+
+def test_eviction_tolerates_entries_removed_by_others(theme, tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    mtz_api.extract(theme, str(tmp_path / "a"), cache=cache)
+
+    racing = RacingCache(str(tmp_path / "cache"), max_bytes=0)
+    assert racing.evict() == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_cache_hit_elapsed_time_includes_hashing(theme, tmp_path, monkeypatch):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    mtz_api.extract(theme, str(tmp_path / "miss"), cache=cache)
+
+    key_for = ExtractionCache.key_for
+
+    def slow_key_for(file_path, variant=""):
+        time.sleep(0.05)
+        return key_for(file_path, variant)
+
+    monkeypatch.setattr(ExtractionCache, "key_for", staticmethod(slow_key_for))
+    extractor = MTZExtractor(cache=cache, quiet=True)
+    (tmp_path / "hit").mkdir()
+    extractor.run(theme, str(tmp_path / "hit"))
+
+    assert extractor.stats["cache_hit"]
+    assert time.time() - extractor.stats["start_time"] >= 0.05
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+import mtz_daemon
+from mtz_daemon import ExtractionDaemon
+
+from conftest import read_tree
+
+
+def _crash(*args) -> dict:
+    os._exit(1)
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    # Workers keep the cwd they were started in
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(mtz_daemon.JOB_KINDS, "crash", _crash)
+    daemon = ExtractionDaemon(workers=2)
+    daemon.start()
+    yield daemon
+    daemon.close()
+
+
+def run(daemon, kind, *args):
+    job = daemon.submit(kind, list(args))
+    assert job.done.wait(60)
+    return job
+
+
+def test_jobs_run_after_a_worker_dies(daemon, theme, tmp_path):
+    crashed = run(daemon, "crash")
+    assert crashed.state == "failed"
+
+    job = run(daemon, "extract", theme, str(tmp_path / "out"), {})
+    assert job.state == "done", job.error
+    assert read_tree(tmp_path / "out")
+    assert daemon.stats()["jobs"] == {"failed": 1, "done": 1}
+
+
+def test_pack_jobs_write_no_log_files(daemon, theme, tmp_path):
+    assert run(daemon, "extract", theme, str(tmp_path / "theme"), {}).state == "done"
+
+    job = run(daemon, "pack", str(tmp_path / "theme"), {})
+    assert job.state == "done", job.error
+    assert job.result["mtz_path"] == str(tmp_path / "theme.mtz")
+    assert not (tmp_path / "logs").exists()
@@ -0,0 +1,100 @@
+import io
+import zipfile
+import threading
+import contextlib
+
+import pytest
+
+import mtz_api
+from mtz_extractor import ExtractionCache, MTZExtractor
+
+from conftest import read_tree
+
+
+def legacy_extract(file_path: str, folder, workers: int) -> None:
+    """extract_mtz followed by process_files, the path behind the GUI"""
+    folder.mkdir()
+    extractor = MTZExtractor(workers=workers, quiet=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert extractor.extract_mtz(file_path, str(folder))
+        extractor.process_files(str(folder))
+
+
+@pytest.mark.parametrize("workers", [2, 4])
+def test_parallel_extraction_matches_serial(theme, tmp_path, workers):
+    serial = mtz_api.extract(theme, str(tmp_path / "serial"), workers=1)
+    parallel = mtz_api.extract(theme, str(tmp_path / "parallel"), workers=workers)
+
+    expected = read_tree(tmp_path / "serial")
+    assert len(expected) > 50
+    assert "icons/extra/nested3/extra/nested2/res/drawable-xxhdpi/item0.png" in expected
+    assert read_tree(tmp_path / "parallel") == expected
+    assert parallel.files == serial.files
+    assert parallel.extracted_size == serial.extracted_size
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_legacy_extraction_matches_expanding_path(theme, tmp_path, workers):
+    mtz_api.extract(theme, str(tmp_path / "expanded"))
+    legacy_extract(theme, tmp_path / "legacy", workers)
+
+    assert read_tree(tmp_path / "legacy") == read_tree(tmp_path / "expanded")
+
+
+def test_nested_buffers_are_bounded_by_workers(tmp_path):
+    nested = io.BytesIO()
+    with zipfile.ZipFile(nested, "w") as zipf:
+        zipf.writestr("res/values/colors.xml", b"<resources/>\n" * 64)
+    component = io.BytesIO()
+    with zipfile.ZipFile(component, "w") as zipf:
+        for index in range(40):
+            zipf.writestr(f"extra/nested{index}.zip", nested.getvalue())
+    theme = tmp_path / "wide.mtz"
+    with zipfile.ZipFile(theme, "w", zipfile.ZIP_DEFLATED) as mtz:
+        mtz.writestr("icons", component.getvalue())
+
+    workers = 2
+    extractor = MTZExtractor(workers=workers, quiet=True)
+    live, peak = [0], [0]
+    lock = threading.Lock()
+    open_nested = extractor._open_nested
+
+    def counting_open_nested(zip_ref, info):
+        buffer = open_nested(zip_ref, info)
+        close = buffer.close
+        with lock:
+            live[0] += 1
+            peak[0] = max(peak[0], live[0])
+
+        def counted_close():
+            with lock:
+                live[0] -= 1
+            close()
+
+        buffer.close = counted_close
+        return buffer
+
+    extractor._open_nested = counting_open_nested
+    extractor.expand(str(theme), str(tmp_path / "out"))
+
+    assert len(read_tree(tmp_path / "out")) == 40
+    # Queued jobs plus one buffer per nesting level in the caller and every worker
+    assert peak[0] <= workers + (workers + 1) * extractor.max_depth
+    assert live[0] == 0
+
+
+def test_planning_skipped_for_cache_hits_and_incremental_runs(theme, tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    first = mtz_api.extract(theme, str(tmp_path / "first"), cache=cache)
+    assert "plan" in first.metrics["spans"]
+
+    hit = mtz_api.extract(theme, str(tmp_path / "hit"), cache=cache)
+    assert hit.cache_hit
+    assert "plan" not in hit.metrics["spans"]
+    # Sized from the cache entry instead
+    assert hit.plan.total_bytes == first.plan.total_bytes
+    assert hit.plan.file_count == first.plan.file_count
+
+    again = mtz_api.extract(theme, str(tmp_path / "first"), incremental=True)
+    assert again.plan is None
+    assert "plan" not in again.metrics["spans"]
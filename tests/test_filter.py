@@ -0,0 +1,65 @@
+import pytest
+
+import mtz_api
+from mtz_filter import PathFilter
+
+from conftest import read_tree
+
+
+@pytest.mark.parametrize("pattern, path, expected", [
+    ("icons/**", "icons/res/drawable/foo.png", True),
+    ("icons/**", "icons", True),  # `**` may match zero segments
+    ("icons/**", "framework-res/res/foo.png", False),
+    ("**/*.png", "foo.png", True),
+    ("**/*.png", "icons/res/drawable/foo.png", True),
+    ("**/*.png", "icons/res/drawable/foo.webp", False),
+    ("icons/**/drawable/*.png", "icons/drawable/foo.png", True),
+    ("icons/**/drawable/*.png", "icons/a/b/drawable/foo.png", True),
+    ("icons/**/drawable/*.png", "icons/a/drawable/sub/foo.png", False),
+    ("icons/*.png", "icons/res/foo.png", False),
+    ("*/res/**", "com.miui.home/res/layout/a.xml", True),
+])
+def test_globstar_matching(pattern, path, expected):
+    assert PathFilter([pattern]).matches(path) is expected
+
+
+def test_last_matching_pattern_wins():
+    path_filter = PathFilter(["icons/**", "!**/*.webp", "icons/keep/*.webp"])
+    assert path_filter.matches("icons/res/a.png")
+    assert not path_filter.matches("icons/res/a.webp")
+    assert path_filter.matches("icons/keep/a.webp")
+    assert not path_filter.matches("framework-res/a.png")
+
+
+def test_only_excludes_select_the_rest():
+    path_filter = PathFilter(["!wallpaper/**"])
+    assert path_filter.matches("description.xml")
+    assert not path_filter.matches("wallpaper/default_wallpaper.jpg")
+
+
+@pytest.mark.parametrize("patterns, path, expected", [
+    (["icons/**"], "icons", True),
+    (["icons/**"], "icons/extra/nested", True),
+    (["icons/**"], "framework-res", False),
+    (["**/*.png"], "framework-res/extra/nested", True),
+    (["icons/res/*.png"], "icons/extra", False),
+    (["!**/extra/**"], "icons/extra", False),
+    (["!**/extra/**"], "icons", True),
+    (["!**/extra/**", "**/extra/keep/*"], "icons/extra", True),
+    (["icons/**", "!icons/extra/**"], "icons/extra/nested", False),
+])
+def test_wants_below_prunes_subtrees(patterns, path, expected):
+    assert PathFilter(patterns).wants_below(path) is expected
+
+
+@pytest.mark.parametrize("patterns", [["icons/**"], ["!**/extra/**"], ["**/*.png", "!icons/**"]])
+def test_filtered_extraction_skips_unwanted_archives(theme, tmp_path, patterns):
+    full = mtz_api.extract(theme, str(tmp_path / "full"))
+    filtered = mtz_api.extract(theme, str(tmp_path / "filtered"), patterns=patterns)
+
+    path_filter = PathFilter(patterns)
+    expected = {path: data for path, data in read_tree(tmp_path / "full").items() if path_filter.matches(path)}
+    assert expected
+    assert read_tree(tmp_path / "filtered") == expected
+    opened = filtered.metrics["counters"]["archives_opened"]
+    assert opened < full.metrics["counters"]["archives_opened"]
@@ -0,0 +1,40 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+import mtz_api
+
+from conftest import read_tree
+
+
+pytest.importorskip("tkinter")
+
+
+@pytest.fixture(scope="module")
+def gui():
+    """py/main.py, the single-file GUI, loaded without opening a window"""
+    path = Path(__file__).resolve().parent.parent / "py" / "main.py"
+    spec = importlib.util.spec_from_file_location("mtz_gui", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_gui_extraction_matches_api(gui, theme, tmp_path, workers):
+    mtz_api.extract(theme, str(tmp_path / "api"))
+
+    extractor = gui.MTZExtractor(workers=workers)
+    assert extractor.extract_and_expand(theme, str(tmp_path / "gui")), extractor.last_error
+    extractor.process_files(str(tmp_path / "gui"), expand=False)
+    assert read_tree(tmp_path / "gui") == read_tree(tmp_path / "api")
+
+
+def test_gui_extraction_reports_why_it_failed(gui, tmp_path):
+    broken = tmp_path / "broken.mtz"
+    broken.write_bytes(b"not a zip")
+
+    extractor = gui.MTZExtractor()
+    assert not extractor.extract_and_expand(str(broken), str(tmp_path / "out"))
+    assert "zip" in extractor.last_error
@@ -0,0 +1,88 @@
+import io
+import os
+import zipfile
+
+import mtz_api
+
+from conftest import read_tree
+
+
+def build_zip(files: dict, compression: int = zipfile.ZIP_STORED) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression) as zipf:
+        for name, data in files.items():
+            zipf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def write_theme(path, icons_b: bytes, description: bool = True, extra: bool = False) -> str:
+    nested = build_zip({"res/values/c.xml": b"<c/>\n"})
+    files = {
+        "icons": build_zip({"res/a.png": b"\x89PNG a", "res/b.png": icons_b, "extra/nested.zip": nested}),
+        "framework-res": build_zip({"res/x.xml": b"<x/>\n"}),
+    }
+    if description:
+        files["description.xml"] = b"<theme/>\n"
+    if extra:
+        files["preview/preview_0.jpg"] = b"\xff\xd8\xff new"
+    with open(path, "wb") as f:
+        f.write(build_zip(files, zipfile.ZIP_DEFLATED))
+    return str(path)
+
+
+def age(folder) -> None:
+    """Backdate every file so rewrites show up as a new mtime"""
+    for root, _, files in os.walk(folder):
+        for name in files:
+            os.utime(os.path.join(root, name), ns=(0, 0))
+
+
+def mtime(path) -> int:
+    return os.stat(path).st_mtime_ns
+
+
+def test_incremental_rewrites_only_changed_files(tmp_path):
+    out = tmp_path / "out"
+    mtz_api.extract(write_theme(tmp_path / "v1.mtz", b"\x89PNG b"), str(out), incremental=True)
+    age(out)
+
+    v2 = write_theme(tmp_path / "v2.mtz", b"\x89PNG b, redrawn", description=False, extra=True)
+    result = mtz_api.extract(v2, str(out), incremental=True)
+
+    mtz_api.extract(v2, str(tmp_path / "fresh"))
+    assert read_tree(out) == read_tree(tmp_path / "fresh")
+
+    # a.png as a leaf, c.xml and x.xml through unchanged inner archives
+    assert result.unchanged_files == 3
+    for name in ("icons/res/a.png", "icons/extra/nested/res/values/c.xml", "framework-res/res/x.xml"):
+        assert mtime(out / name) == 0
+    assert mtime(out / "icons/res/b.png") != 0
+
+    assert result.removed_files == 1
+    assert not (out / "description.xml").exists()
+
+
+def test_incremental_restores_locally_deleted_and_edited_files(tmp_path):
+    out = tmp_path / "out"
+    theme = write_theme(tmp_path / "v1.mtz", b"\x89PNG b")
+    mtz_api.extract(theme, str(out), incremental=True)
+    expected = read_tree(out)
+
+    (out / "framework-res/res/x.xml").unlink()
+    (out / "icons/res/a.png").write_bytes(b"edited locally")
+    result = mtz_api.extract(theme, str(out), incremental=True)
+
+    assert read_tree(out) == expected
+    assert result.removed_files == 0
+    # description.xml, b.png and c.xml, archives with damaged files are expanded again
+    assert result.unchanged_files == 3
+
+
+def test_incremental_without_manifest_extracts_everything(tmp_path):
+    out = tmp_path / "out"
+    theme = write_theme(tmp_path / "v1.mtz", b"\x89PNG b")
+    result = mtz_api.extract(theme, str(out), incremental=True)
+
+    assert result.unchanged_files == 0
+    assert (out / ".mtz_manifest.json").exists()
+    assert len(read_tree(out)) == 5
@@ -0,0 +1,61 @@
+import io
+import json
+import contextlib
+
+import mtz_api
+from mtz_extractor import MTZExtractor
+from mtz_metrics import Metrics
+from mtz_packing import MTZCompressor
+
+
+COUNTERS = {"bytes_read", "bytes_written", "archives_opened"}
+
+
+def test_api_extraction_records_spans_and_counters(theme, tmp_path):
+    result = mtz_api.extract(theme, str(tmp_path / "out"))
+    assert {"open", "outer_extract", "inner_expand", "cleanup", "size"} <= set(result.metrics["spans"])
+    assert set(result.metrics["counters"]) == COUNTERS
+
+
+def test_legacy_extraction_records_every_extractor_span(theme, tmp_path):
+    folder = tmp_path / "out"
+    folder.mkdir()
+    extractor = MTZExtractor(quiet=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert extractor.validate_mtz_file(theme)
+        assert extractor.extract_mtz(theme, str(folder))
+        extractor.process_files(str(folder))
+
+    spans = extractor.metrics.to_dict()["spans"]
+    assert {"validate", "open", "outer_extract", "classify", "inner_expand", "cleanup", "size"} <= set(spans)
+    assert extractor.stats["extracted_size"] > 0
+
+
+def test_packing_records_every_packing_span(theme, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "theme"
+    mtz_api.extract(theme, str(folder))
+
+    compressor = MTZCompressor()
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert compressor.validate_folder(str(folder))
+        zip_path = compressor.zip_folder(str(folder / "icons"))
+        assert compressor.verify_zip(zip_path)
+        assert compressor.create_mtz(str(folder))
+
+    assert {"validate", "zip", "verify", "mtz"} <= set(compressor.metrics.spans)
+    assert set(compressor.metrics.counters) == COUNTERS
+
+
+def test_export_formats():
+    metrics = Metrics("extract")
+    with metrics.span("size"):
+        pass
+    metrics.add("bytes_read", 42)
+
+    data = json.loads(metrics.to_json())
+    assert data["spans"]["size"]["count"] == 1
+    assert data["counters"] == {"bytes_read": 42}
+    text = metrics.to_prometheus()
+    assert 'mtz_span_calls_total{tool="extract",span="size"} 1' in text
+    assert 'mtz_bytes_read_total{tool="extract"} 42' in text
@@ -0,0 +1,80 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+import mtz_api
+from mtz_packing import MTZCompressor, _deflate, _deflate_job, write_raw
+
+from conftest import read_tree
+
+
+SOURCES = {
+    "description.xml": b"<theme><title>raw</title></theme>\n" * 40,
+    "res/drawable-xxhdpi/icon.png": b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 64,
+    "empty.txt": b"",
+}
+
+
+@pytest.mark.parametrize("memory_threshold", [1 << 20, 0])
+def test_write_raw_round_trips(tmp_path, memory_threshold):
+    path = tmp_path / "raw.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        # Regular entries before and after, write_raw must keep the archive consistent
+        zf.writestr("before.txt", b"written by zipfile\n")
+        for name, data in SOURCES.items():
+            # A threshold of 0 spills every payload to a temp file
+            raw = _deflate(io.BytesIO(data), str(tmp_path), memory_threshold)
+            write_raw(zf, zipfile.ZipInfo(name, (2024, 1, 1, 0, 0, 0)), raw)
+        zf.writestr("after.txt", b"written by zipfile too\n")
+
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".deflate")]
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["before.txt", *SOURCES, "after.txt"]
+        for name, data in SOURCES.items():
+            assert zf.read(name) == data
+            assert zf.getinfo(name).compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_deflate_job_reports_its_cpu_time(tmp_path):
+    path = tmp_path / "big.bin"
+    path.write_bytes(os.urandom(1 << 16) * 64)
+    raw, seconds = _deflate_job(str(path), str(tmp_path), 1 << 20)
+    assert seconds > 0
+    with zipfile.ZipFile(tmp_path / "raw.zip", "w") as zf:
+        write_raw(zf, zipfile.ZipInfo("big.bin"), raw)
+    with zipfile.ZipFile(tmp_path / "raw.zip") as zf:
+        assert zf.read("big.bin") == path.read_bytes()
+
+
+def test_write_raw_refuses_while_an_entry_is_open(tmp_path):
+    with zipfile.ZipFile(tmp_path / "raw.zip", "w") as zf, zf.open("open.txt", "w"):
+        with pytest.raises(ValueError):
+            write_raw(zf, zipfile.ZipInfo("late.txt"), _deflate(io.BytesIO(b"x"), str(tmp_path), 1024))
+
+
+def pack(folder, jobs: int) -> bytes:
+    compressor = MTZCompressor()
+    mtz_path = compressor.pack_streaming(str(folder), jobs=jobs, full_verify=True)
+    assert mtz_path == str(folder) + ".mtz"
+    with open(mtz_path, "rb") as f:
+        return f.read()
+
+
+def test_parallel_packing_round_trips(theme, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "theme"
+    mtz_api.extract(theme, str(folder))
+
+    serial = pack(folder, jobs=1)
+    parallel = pack(folder, jobs=2)
+    assert parallel == serial
+
+    with zipfile.ZipFile(io.BytesIO(parallel)) as mtz:
+        assert mtz.testzip() is None
+    mtz_api.extract(str(folder) + ".mtz", str(tmp_path / "again"))
+    assert read_tree(tmp_path / "again") == read_tree(folder)
+    # Only the CLI writes a log file
+    assert not (tmp_path / "logs").exists()
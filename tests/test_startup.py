@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+from mtz_bench import DEFERRED_MODULES, STARTUP_BUDGET_MS, eager_imports, measure_import
+
+
+@pytest.mark.parametrize("module", ["mtz_extractor", "mtz_api"])
+def test_heavy_modules_are_imported_lazily(module):
+    assert eager_imports(module, DEFERRED_MODULES) == []
+
+
+# Wall-clock timings are noisy on shared CI runners, so the budget is opt-in
+@pytest.mark.skipif(not os.environ.get("MTZ_CHECK_STARTUP"), reason="set MTZ_CHECK_STARTUP=1 to time imports")
+def test_import_time_within_budget():
+    # Best of several fresh interpreters with warm bytecode, the cold-start cost of the CLI
+    assert measure_import("mtz_extractor", repeat=5) <= STARTUP_BUDGET_MS
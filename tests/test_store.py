@@ -0,0 +1,87 @@
+import io
+import os
+import zlib
+import shutil
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import mtz_api
+from mtz_extractor import BlobStore
+
+from conftest import read_tree
+
+
+LOCK = b"\x7fELF" + bytes(range(256)) * 32
+
+
+def write_theme(path, lock: bytes, title: bytes) -> str:
+    component = io.BytesIO()
+    with zipfile.ZipFile(component, "w") as zipf:
+        zipf.writestr("lib/lock.so", lock)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as mtz:
+        mtz.writestr("description.xml", title)
+        mtz.writestr("lockscreen", component.getvalue())
+    return str(path)
+
+
+def test_themes_share_blobs(tmp_path):
+    store = BlobStore(str(tmp_path / "store"))
+    mtz_api.extract(write_theme(tmp_path / "a.mtz", LOCK, b"<a/>"), str(tmp_path / "a"), store=store)
+    mtz_api.extract(write_theme(tmp_path / "b.mtz", LOCK, b"<b/>"), str(tmp_path / "b"), store=store)
+
+    a, b = tmp_path / "a/lockscreen/lib/lock.so", tmp_path / "b/lockscreen/lib/lock.so"
+    assert os.path.samefile(a, b)
+    assert a.read_bytes() == LOCK
+    assert store.stats["stored"] == 1 and store.stats["linked"] == 2
+
+
+def test_rewrite_without_store_leaves_shared_blob_alone(tmp_path):
+    store = BlobStore(str(tmp_path / "store"))
+    mtz_api.extract(write_theme(tmp_path / "a.mtz", LOCK, b"<a/>"), str(tmp_path / "a"), store=store)
+    theme_b = write_theme(tmp_path / "b.mtz", LOCK, b"<b/>")
+    mtz_api.extract(theme_b, str(tmp_path / "b"), store=store, incremental=True)
+
+    # Theme b gets a new lock.so and is re-extracted in place, this time without the store
+    newer = b"\x7fELF newer" + bytes(4096)
+    mtz_api.extract(write_theme(theme_b, newer, b"<b/>"), str(tmp_path / "b"), incremental=True)
+
+    assert (tmp_path / "b/lockscreen/lib/lock.so").read_bytes() == newer
+    assert (tmp_path / "a/lockscreen/lib/lock.so").read_bytes() == LOCK
+    assert list(read_tree(tmp_path / "store/objects").values()) == [LOCK]
+
+
+def test_concurrent_stores_of_the_same_content_write_one_blob(tmp_path):
+    store = BlobStore(str(tmp_path / "store"))
+    # Both threads get past the index lookup before either one has stored the blob
+    barrier = threading.Barrier(2)
+
+    def opener():
+        barrier.wait(5)
+        return io.BytesIO(LOCK)
+
+    crc = zlib.crc32(LOCK)
+    targets = [tmp_path / "a/lock.so", tmp_path / "b/lock.so"]
+    with ThreadPoolExecutor(2) as pool:
+        reused = list(pool.map(lambda target: store.materialize(opener, target, crc, len(LOCK)), targets))
+
+    assert sorted(reused) == [False, True]
+    assert store.stats["stored"] == 1 and store.stats["bytes_saved"] == len(LOCK)
+    assert os.path.samefile(*targets)
+    assert list(read_tree(tmp_path / "store/objects").values()) == [LOCK]
+    assert not os.listdir(tmp_path / "store/tmp")
+
+
+def test_gc_waits_for_running_extractions(tmp_path):
+    store = BlobStore(str(tmp_path / "store"))
+    mtz_api.extract(write_theme(tmp_path / "a.mtz", LOCK, b"<a/>"), str(tmp_path / "a"), store=store)
+    shutil.rmtree(tmp_path / "a")
+
+    result = []
+    with store._shared():
+        gc = threading.Thread(target=lambda: result.append(BlobStore(str(tmp_path / "store")).gc()))
+        gc.start()
+        gc.join(0.3)
+        assert gc.is_alive()
+    gc.join(5)
+    assert result == [(1, len(LOCK))]
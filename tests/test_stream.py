@@ -0,0 +1,146 @@
+import io
+import zlib
+import struct
+import zipfile
+import contextlib
+
+import pytest
+
+import mtz_api
+from mtz_extractor import MTZExtractor
+from mtz_stream import StreamingZipReader
+
+from conftest import read_tree
+
+
+MEMBERS = {
+    "description.xml": b"<theme><title>stream</title></theme>\n" * 200,
+    "res/raw/noise.bin": bytes(range(256)) * 300,
+    "empty.txt": b"",
+}
+
+
+class Pipe(io.RawIOBase):
+    """Reads and writes with no seek or tell, as a pipe does"""
+
+    def __init__(self, data: bytes = b""):
+        self._data = io.BytesIO(data)
+        self.written = bytearray()
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        # Short reads, the way a pipe hands out what has arrived
+        data = self._data.read(min(len(buffer), 1000))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def write(self, data) -> int:
+        self.written += data
+        return len(data)
+
+
+def unseekable_zip(members: dict, compression: int = zipfile.ZIP_DEFLATED) -> bytes:
+    """Zip written to a pipe, sizes and CRCs then follow each member in a data descriptor"""
+    pipe = Pipe()
+    with zipfile.ZipFile(pipe, "w", compression) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return bytes(pipe.written)
+
+
+def descriptor_without_signature(name: str, data: bytes) -> bytes:
+    """One deflated member whose descriptor omits the optional PK\\x07\\x08 signature"""
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    deflated = compressor.compress(data) + compressor.flush()
+    raw_name = name.encode()
+    header = struct.pack("<4s5H3L2H", b"PK\x03\x04", 20, 0x8, zipfile.ZIP_DEFLATED, 0, 0x21, 0, 0, 0, len(raw_name), 0)
+    descriptor = struct.pack("<3L", zlib.crc32(data), len(deflated), len(data))
+    return header + raw_name + deflated + descriptor
+
+
+def read_all(data: bytes) -> dict:
+    return {member.info.filename: member.read() for member in StreamingZipReader(Pipe(data))}
+
+
+def test_members_with_data_descriptors():
+    data = unseekable_zip(MEMBERS)
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert all(info.flag_bits & 0x8 for info in zf.infolist())
+    assert read_all(data) == MEMBERS
+
+
+def test_descriptor_without_signature():
+    data = descriptor_without_signature("a.txt", MEMBERS["description.xml"])
+    data += descriptor_without_signature("b.bin", MEMBERS["res/raw/noise.bin"])
+    assert read_all(data) == {"a.txt": MEMBERS["description.xml"], "b.bin": MEMBERS["res/raw/noise.bin"]}
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+def test_unread_members_are_skipped(tmp_path, compression):
+    path = tmp_path / "plain.zip"
+    with zipfile.ZipFile(path, "w", compression) as zf:
+        for name, data in MEMBERS.items():
+            zf.writestr(name, data)
+
+    reader = StreamingZipReader(Pipe(path.read_bytes()))
+    names = []
+    for member in reader:
+        names.append(member.info.filename)
+        if member.info.filename == "res/raw/noise.bin":
+            assert member.read() == MEMBERS["res/raw/noise.bin"]
+    assert names == list(MEMBERS)
+    assert reader.bytes_read == path.stat().st_size
+
+
+def test_stream_extraction_matches_extract(theme, tmp_path):
+    with zipfile.ZipFile(theme) as zf:
+        data = unseekable_zip({info.filename: zf.read(info) for info in zf.infolist()})
+    mtz_api.extract(theme, str(tmp_path / "extracted"))
+
+    extractor = MTZExtractor(quiet=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        extractor.expand_stream(Pipe(data), str(tmp_path / "streamed"))
+        extractor.process_files(str(tmp_path / "streamed"), expand=False)
+    assert read_tree(tmp_path / "streamed") == read_tree(tmp_path / "extracted")
+
+
+def test_truncated_stream():
+    data = unseekable_zip(MEMBERS)
+    with pytest.raises(zipfile.BadZipFile, match="Truncated"):
+        read_all(data[:len(data) // 2])
+
+
+def test_truncated_header():
+    data = unseekable_zip(MEMBERS)
+    with pytest.raises(zipfile.BadZipFile, match="Truncated zip stream"):
+        read_all(data[:10])
+
+
+def test_bad_crc():
+    data = bytearray(descriptor_without_signature("a.txt", MEMBERS["description.xml"]))
+    data[-12] ^= 0xFF
+    with pytest.raises(zipfile.BadZipFile, match="Bad CRC-32"):
+        read_all(bytes(data))
+
+
+def test_bad_signature():
+    with pytest.raises(zipfile.BadZipFile, match="Bad local file header signature"):
+        read_all(b"MZ\x90\x00" + unseekable_zip(MEMBERS))
+
+
+def test_stored_member_with_descriptor_is_refused():
+    data = unseekable_zip(MEMBERS, zipfile.ZIP_STORED)
+    with pytest.raises(NotImplementedError, match="data descriptor"):
+        read_all(data)
+
+
+def test_encrypted_member_is_refused():
+    data = bytearray(descriptor_without_signature("secret.txt", b"hidden"))
+    data[6] |= 0x1
+    with pytest.raises(NotImplementedError, match="encrypted"):
+        read_all(bytes(data))